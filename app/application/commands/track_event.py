@@ -11,7 +11,7 @@ import asyncio
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List
+from typing import Any, List, Optional, Tuple
 
 from app.application.dto.tracking_dto import (
     TrackEventRequest,
@@ -20,6 +20,7 @@ from app.application.dto.tracking_dto import (
 )
 from app.application.interfaces.cache_port import DeduplicationPort
 from app.application.interfaces.tracker_port import TrackerPort
+from app.application.interfaces.unit_of_work import NullUnitOfWork, UnitOfWorkPort
 from app.domain.models.events import EventName, TrackingEvent
 from app.domain.models.values import ExternalId, UTMParams
 from app.domain.repositories.event_repo import EventRepository
@@ -45,7 +46,12 @@ class TrackEventHandler:
     2. Get/create visitor
     3. Create domain event
     4. Persist event
-    5. Send to external trackers (async)
+    5. Send to external trackers (awaited inside the caller's work-queue job)
+
+    Steps 2-4 run inside one unit of work: visitor upsert, event insert and
+    outbox insert share a single connection and commit atomically. The outbox
+    row is skipped when a Meta tracker delivers the event, so each event
+    reaches Meta through exactly one path.
 
     It's idempotent: same event_id = same result.
     """
@@ -56,11 +62,13 @@ class TrackEventHandler:
         visitor_repo: VisitorRepository,
         event_repo: EventRepository,
         trackers: List[TrackerPort],
+        uow: Optional[UnitOfWorkPort] = None,
     ):
         self.deduplicator = deduplicator
         self.visitor_repo = visitor_repo
         self.event_repo = event_repo
         self.trackers = trackers
+        self.uow = uow or NullUnitOfWork()
         self.tenant_id: str | None = None
 
     async def handle(self, cmd: TrackEventCommand) -> TrackEventResponse:
@@ -73,25 +81,61 @@ class TrackEventHandler:
         Returns:
             TrackEventResponse with result
         """
+        response, tracked = await self._record(cmd)
+        if tracked is not None:
+            # 7. Trackers — after commit, outside the transaction scope. Awaited so
+            # the send stays inside the lane's concurrency cap and drain()
+            await self._send_to_trackers(*tracked)
+        return response
+
+    async def _record(
+        self, cmd: TrackEventCommand
+    ) -> Tuple[TrackEventResponse, Optional[Tuple[TrackingEvent, Any]]]:
+        """Steps 1-6 (validation, dedup, persistence); returns what trackers must send."""
         try:
             # 1. Parse EventName
             try:
                 event_name = EventName(cmd.request.event_name)
             except ValueError:
-                return TrackEventResponse.error(f"Invalid event name: {cmd.request.event_name}")
+                return TrackEventResponse.error(f"Invalid event name: {cmd.request.event_name}"), None
 
             # 2. Create ExternalId
             external_id_result = ExternalId.from_string(cmd.request.external_id)
             if external_id_result.is_err:
-                return TrackEventResponse.error(external_id_result.unwrap_err())
+                return TrackEventResponse.error(external_id_result.unwrap_err()), None
             external_id = external_id_result.unwrap()
 
             # 3. Check deduplication (fast path)
             event_id_str = f"{cmd.request.event_name}:{external_id.value}:{int(datetime.now(timezone.utc).timestamp() / 3600)}"
             if not await self.deduplicator.is_unique(event_id_str):
                 logger.info("🔄 Duplicate event blocked: %s", event_id_str)
-                return TrackEventResponse.duplicate(event_id_str)
+                return TrackEventResponse.duplicate(event_id_str), None
+
+            # 4-6. Visitor + event + outbox in a single transaction
+            try:
+                visitor, event = await self._persist(cmd, event_name, external_id)
+            except Exception:
+                # Rollback: free the dedup key so the client's retry is not dropped
+                await self.deduplicator.release(event_id_str)
+                raise
 
+            logger.info("✅ Event tracked: %s (%s)", event.event_name.value, event.event_id)
+
+            response = TrackEventResponse(
+                success=True,
+                event_id=event.event_id.value,
+                status="queued",
+                message=f"{event.event_name.value} tracked successfully",
+            )
+            return response, (event, visitor)
+
+        except Exception as e:
+            logger.exception("❌ Error tracking event")
+            return TrackEventResponse.error(str(e)), None
+
+    async def _persist(self, cmd: TrackEventCommand, event_name: EventName, external_id: ExternalId):
+        """Visitor upsert + event insert (+ outbox) in one unit of work."""
+        async with self.uow.begin():
             # 4. Get or create visitor
             visitor = await self.visitor_repo.get_by_external_id(external_id)
             if not visitor:
@@ -139,24 +183,30 @@ class TrackEventHandler:
                 ),
             )
 
-            # 6. Persist event
-            await self.event_repo.save(event)
+            # 6. Persist event — sin fila de outbox si el tracker de Meta ya lo entrega
+            await self.event_repo.save(event, outbox=not self._delivers_to_meta)
 
-            logger.info("✅ Event tracked: %s (%s)", event.event_name.value, event.event_id)
+        return visitor, event
 
-            # 7. Start trackers (no await)
-            asyncio.create_task(self._send_to_trackers(event, visitor))
+    @property
+    def _delivers_to_meta(self) -> bool:
+        """True if a Meta tracker sends the event (the outbox relay would duplicate it)."""
+        return any(tracker.name == "meta_capi" for tracker in self.trackers)
 
-            return TrackEventResponse(
-                success=True,
-                event_id=event.event_id.value,
-                status="queued",
-                message=f"{event.event_name.value} tracked successfully",
-            )
+    async def handle_batch(self, cmds: List[TrackEventCommand]) -> List[TrackEventResponse]:
+        """
+        Executes the commands of one bulk ingestion request, in order.
 
-        except Exception as e:
-            logger.exception("❌ Error tracking event")
-            return TrackEventResponse.error(str(e))
+        Each event keeps its own dedup check and transaction, so one bad
+        event never rolls back the rest of the batch. Tracker sends start
+        together once everything is persisted, so the whole batch lands in
+        the same CAPI linger window (one Graph request, not one per event).
+        """
+        results = [await self._record(cmd) for cmd in cmds]
+        await asyncio.gather(
+            *(self._send_to_trackers(*tracked) for _, tracked in results if tracked is not None)
+        )
+        return [response for response, _ in results]
 
     async def _send_to_trackers(self, event: TrackingEvent, visitor) -> None:
         """
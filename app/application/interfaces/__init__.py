@@ -11,8 +11,11 @@ Esto invierte la dependencia:
 
 from app.application.interfaces.cache_port import DeduplicationPort
 from app.application.interfaces.tracker_port import TrackerPort
+from app.application.interfaces.unit_of_work import NullUnitOfWork, UnitOfWorkPort
 
 __all__ = [
     "DeduplicationPort",
+    "NullUnitOfWork",
     "TrackerPort",
+    "UnitOfWorkPort",
 ]
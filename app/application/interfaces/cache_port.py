@@ -33,6 +33,15 @@ class DeduplicationPort(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def release(self, event_key: str) -> None:
+        """
+        Libera una clave consumida por `is_unique` cuyo procesamiento falló.
+
+        Permite que el reintento del cliente no se bloquee como duplicado.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def mark_processed(self, event_key: str, ttl_seconds: int = 86400) -> None:
         """
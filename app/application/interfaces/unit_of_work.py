@@ -0,0 +1,35 @@
+"""
+🔁 Unit of Work Port - Interface para transacciones de aplicación.
+
+Implementaciones:
+- DatabaseUnitOfWork (PostgreSQL/SQLite vía db.transaction())
+- NullUnitOfWork (sin transacción compartida; cada repo usa su conexión)
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator
+
+
+class UnitOfWorkPort(ABC):
+    """
+    Puerto para agrupar operaciones de repositorios en una sola transacción.
+
+    Los repositorios que se ejecutan dentro de `begin()` comparten la misma
+    conexión: commit al salir sin errores, rollback ante cualquier excepción.
+    """
+
+    @abstractmethod
+    def begin(self) -> AsyncContextManager[None]:
+        """Abre el scope transaccional (reentrante: los scopes anidados se unen al externo)."""
+        raise NotImplementedError
+
+
+class NullUnitOfWork(UnitOfWorkPort):
+    """Scope vacío: mantiene el comportamiento de una conexión por operación."""
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[None]:
+        yield
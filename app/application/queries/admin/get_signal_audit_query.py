@@ -12,12 +12,12 @@ class GetSignalAuditQuery:
             async with db.connection() as conn:
                 cur = conn.cursor()
                 # 1. Total Contactos Únicos
-                cur.execute("SELECT COUNT(*) FROM leads")
-                total_leads = cur.fetchone()[0]
+                await cur.execute("SELECT COUNT(*) FROM leads")
+                total_leads = (await cur.fetchone())[0]
 
                 # 2. Total con fbclid (Proxy de calidad/señal)
-                cur.execute("SELECT COUNT(*) FROM leads WHERE fbclid IS NOT NULL")
-                leads_with_signal = cur.fetchone()[0]
+                await cur.execute("SELECT COUNT(*) FROM leads WHERE fbclid IS NOT NULL")
+                leads_with_signal = (await cur.fetchone())[0]
 
                 # 3. Discrepancy
                 match_rate = 0
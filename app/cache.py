@@ -6,11 +6,13 @@ Uses the shared RedisProvider singleton. No direct Upstash connections.
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
+from app.infrastructure.cache.local_dedup import local_dedup
 from app.infrastructure.cache.redis_provider import redis_provider
 from app.infrastructure.config.settings import settings
 
@@ -18,37 +20,64 @@ logger = logging.getLogger(__name__)
 
 
 class RedisCache:
-    """JSON cache wrapper using the shared RedisProvider."""
+    """
+    Async JSON cache wrapper using the shared RedisProvider.
 
-    async def get_json(self, key: str) -> Optional[Any]:
-        redis = redis_provider.sync_client
+    Every call runs on `redis_provider.async_client` under a timeout budget:
+    a slow Upstash round trip degrades to a cache miss instead of stalling
+    the page render.
+    """
+
+    def __init__(self, read_timeout: float = 0.3, write_timeout: float = 0.5):
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+
+    async def _call(self, op: str, coro_factory, timeout: float) -> Any:
+        redis = redis_provider.async_client
         if not redis:
             return None
         try:
-            data = redis.get(key)
-            if data:
-                return json.loads(data)
+            return await asyncio.wait_for(coro_factory(redis), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.debug("Redis %s timed out after %.0fms", op, timeout * 1000)
         except Exception as e:
-            logger.debug("Redis get error: %s", e)
+            logger.debug("Redis %s error: %s", op, e)
         return None
 
-    async def set_json(self, key: str, value: Any, expire: int = 3600) -> None:
-        redis = redis_provider.sync_client
-        if not redis:
-            return
+    @staticmethod
+    def _loads(data: Any) -> Optional[Any]:
+        if not data:
+            return None
         try:
-            redis.set(key, json.dumps(value), ex=expire)
-        except Exception as e:
-            logger.debug("Redis set error: %s", e)
+            return json.loads(data)
+        except (TypeError, ValueError):
+            return None
 
-    async def delete(self, key: str) -> None:
-        redis = redis_provider.sync_client
-        if not redis:
+    async def get_json(self, key: str) -> Optional[Any]:
+        data = await self._call("get", lambda r: r.get(key), self.read_timeout)
+        return self._loads(data)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """MGET: one round trip for several keys. Only hits are returned."""
+        if not keys:
+            return {}
+        values = await self._call("mget", lambda r: r.mget(*keys), self.read_timeout)
+        result: Dict[str, Any] = {}
+        for key, data in zip(keys, values or [], strict=False):
+            value = self._loads(data)
+            if value is not None:
+                result[key] = value
+        return result
+
+    async def set_json(self, key: str, value: Any, expire: int = 3600) -> None:
+        await self._call(
+            "set", lambda r: r.set(key, json.dumps(value), ex=expire), self.write_timeout
+        )
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
             return
-        try:
-            redis.delete(key)
-        except Exception as e:
-            logger.debug("Redis delete error: %s", e)
+        await self._call("delete", lambda r: r.delete(*keys), self.write_timeout)
 
 
 redis_cache = RedisCache()
@@ -71,8 +100,12 @@ def deduplicate_event(event_id: str, event_name: str = "event", ttl: int = 86400
     if REDIS_ENABLED:
         redis = redis_provider.sync_client
         if redis:
+            # Local tier: IDs this process already saw skip the REST round trip
+            if local_dedup.seen(cache_key):
+                return False
             try:
                 result = redis.set(cache_key, str(int(time.time())), ex=ttl, nx=True)
+                local_dedup.remember(cache_key, ttl)
                 return result is not None
             except Exception as e:
                 logger.warning(f"Redis dedup error: {e}")
@@ -54,11 +54,11 @@ async def check_database() -> Dict[str, Any]:
             cur = conn.cursor()
             
             if db.backend == "sqlite":
-                cur.execute("SELECT sqlite_version();")
-                row = cur.fetchone()
+                await cur.execute("SELECT sqlite_version();")
+                row = await cur.fetchone()
             else:
-                cur.execute("SELECT version();")
-                row = cur.fetchone()
+                await cur.execute("SELECT version();")
+                row = await cur.fetchone()
                 
             v = row[0] if row else "Unknown"
             status["status"] = "ok"
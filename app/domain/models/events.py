@@ -48,6 +48,13 @@ class EventName(Enum):
     WHATSAPP_CLICK = "WhatsAppClick"
 
 
+# Events that drive ad optimisation: delivered ahead of engagement traffic
+CONVERSION_EVENTS = frozenset(
+    {EventName.LEAD, EventName.CONTACT, EventName.PURCHASE, EventName.SCHEDULE}
+)
+CONVERSION_EVENT_NAMES = frozenset(e.value for e in CONVERSION_EVENTS)
+
+
 @dataclass(frozen=True, slots=True)
 class TrackingEvent:
     """
@@ -165,12 +172,7 @@ class TrackingEvent:
     @property
     def is_conversion_event(self) -> bool:
         """True if conversion event (Lead, Purchase, etc)."""
-        return self.event_name in [
-            EventName.LEAD,
-            EventName.CONTACT,
-            EventName.PURCHASE,
-            EventName.SCHEDULE,
-        ]
+        return self.event_name in CONVERSION_EVENTS
 
     def __repr__(self) -> str:
         return f"TrackingEvent({self.event_name.value}, {self.event_id})"
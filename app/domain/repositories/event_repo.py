@@ -27,11 +27,13 @@ class EventRepository(ABC):
     """
 
     @abstractmethod
-    async def save(self, event: TrackingEvent) -> None:
+    async def save(self, event: TrackingEvent, outbox: bool = True) -> None:
         """
         Persiste evento.
 
         Si ya existe (mismo event_id), ignora (idempotente).
+        `outbox=False` omite la fila del outbox cuando el llamador ya entrega
+        el evento a Meta (evita el doble envío).
         """
         raise NotImplementedError
 
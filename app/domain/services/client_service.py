@@ -1,26 +1,69 @@
 import hashlib
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, Optional, Tuple
 
+from app.infrastructure.cache.single_flight import SingleFlight
 from app.infrastructure.persistence.database import db
 
 logger = logging.getLogger(__name__)
 
+_CLIENT_COLUMNS = "c.id, c.name, c.meta_pixel_id, c.meta_access_token, c.plan"
+
+
+def hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
 
 class ClientService:
-    @staticmethod
-    async def get_client_by_api_key(api_key: str) -> Optional[Dict[str, Any]]:
-        """Look up client by hashed API key."""
+    # 🔑 API-key → client cache (por proceso), indexado por key_hash.
+    # Las claves válidas viven POSITIVE_TTL; las inválidas NEGATIVE_TTL (corto, para
+    # que una clave recién creada en otra instancia no quede bloqueada mucho tiempo).
+    # La revocación/creación invalida localmente; en otras instancias manda el TTL.
+    # `_generation` sube con cada invalidación: una carga iniciada antes no re-cachea
+    # un resultado que ya puede estar revocado.
+    POSITIVE_TTL = 300.0
+    NEGATIVE_TTL = 30.0
+    MAX_ENTRIES = 10_000
+
+    _key_cache: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+    _generation = 0
+    _lookup_flight = SingleFlight("api_keys")
+    _stats: Dict[str, int] = {"hits": 0, "negative_hits": 0, "misses": 0, "preloaded": 0}
+
+    @classmethod
+    def _cache_put(cls, key_hash: str, client: Optional[Dict[str, Any]]) -> None:
+        if len(cls._key_cache) >= cls.MAX_ENTRIES and key_hash not in cls._key_cache:
+            # Descarta la entrada más antigua (dict conserva orden de inserción)
+            cls._key_cache.pop(next(iter(cls._key_cache)))
+        ttl = cls.POSITIVE_TTL if client else cls.NEGATIVE_TTL
+        cls._key_cache[key_hash] = (time.monotonic() + ttl, client)
+
+    @classmethod
+    async def get_client_by_api_key(cls, api_key: str) -> Optional[Dict[str, Any]]:
+        """Resolve an API key to its client; cached (positive and negative) by key hash."""
         if not api_key:
             return None
 
-        key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        key_hash = hash_api_key(api_key)
+        entry = cls._key_cache.get(key_hash)
+        if entry is not None and entry[0] > time.monotonic():
+            cls._stats["hits" if entry[1] else "negative_hits"] += 1
+            return entry[1]
 
+        cls._stats["misses"] += 1
+        # Ráfagas con la misma clave nueva → una sola consulta
+        return await cls._lookup_flight.do(key_hash, lambda: cls._load_client(key_hash))
+
+    @classmethod
+    async def _load_client(cls, key_hash: str) -> Optional[Dict[str, Any]]:
+        """Look up client by hashed API key."""
+        generation = cls._generation
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                query = """
-                    SELECT c.id, c.name, c.meta_pixel_id, c.meta_access_token, c.plan
+                query = f"""
+                    SELECT {_CLIENT_COLUMNS}
                     FROM clients c
                     JOIN api_keys ak ON c.id = ak.client_id
                     WHERE ak.key_hash = %s AND ak.status = 'active' AND c.status = 'active'
@@ -28,19 +71,100 @@ class ClientService:
                 if db.backend == "sqlite":
                     query = query.replace("%s", "?")
 
-                cur.execute(query, (key_hash,))
-                row = cur.fetchone()
+                await cur.execute(query, (key_hash,))
+                row = await cur.fetchone()
+                client = None
                 if row:
                     # Map row to dict
                     if hasattr(cur, "description") and cur.description:
                         cols = [col[0] for col in cur.description]
-                        return dict(zip(cols, row, strict=False))
-                    return {"id": row[0]}  # Fallback
-            return None
+                        client = dict(zip(cols, row, strict=False))
+                    else:
+                        client = {"id": row[0]}  # Fallback
         except Exception as e:
+            # Error de BD ≠ clave inválida: no se cachea
             logger.error(f"Error looking up client by API key: {e}")
             return None
 
+        if generation == cls._generation:
+            cls._cache_put(key_hash, client)
+        return client
+
+    @classmethod
+    async def preload_active_keys(cls) -> int:
+        """Carga todas las claves activas en memoria: la auth pasa a ser un lookup de dict."""
+        generation = cls._generation
+        try:
+            async with db.connection() as conn:
+                cur = conn.cursor()
+                await cur.execute(
+                    f"""
+                    SELECT ak.key_hash, {_CLIENT_COLUMNS}
+                    FROM clients c
+                    JOIN api_keys ak ON c.id = ak.client_id
+                    WHERE ak.status = 'active' AND c.status = 'active'
+                    """
+                )
+                rows = await cur.fetchall()
+                cols = [col[0] for col in cur.description][1:]
+        except Exception as e:
+            logger.warning(f"⚠️ API key preload skipped: {e}")
+            return 0
+
+        if generation != cls._generation:
+            # Hubo una revocación durante la consulta: la foto puede estar obsoleta
+            logger.info("🔑 API key preload discarded (invalidated meanwhile)")
+            return 0
+        for row in rows[: cls.MAX_ENTRIES]:
+            cls._cache_put(row[0], dict(zip(cols, row[1:], strict=False)))
+        cls._stats["preloaded"] = len(rows)
+        logger.info(f"🔑 Preloaded {len(rows)} active API keys")
+        return len(rows)
+
+    @classmethod
+    def invalidate_api_key(cls, api_key: Optional[str] = None, key_hash: Optional[str] = None) -> None:
+        """Olvida la entrada (positiva o negativa) de una clave."""
+        if api_key:
+            key_hash = hash_api_key(api_key)
+        if key_hash:
+            cls._generation += 1
+            cls._key_cache.pop(key_hash, None)
+
+    @classmethod
+    def invalidate_client(cls, client_id: Any) -> None:
+        """Olvida todas las claves cacheadas de un cliente (p. ej. al suspenderlo)."""
+        cls._generation += 1
+        for key_hash, (_, client) in list(cls._key_cache.items()):
+            if client and client.get("id") == client_id:
+                cls._key_cache.pop(key_hash, None)
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, int]:
+        return {**cls._stats, "entries": len(cls._key_cache)}
+
+    @classmethod
+    async def revoke_api_key(
+        cls, api_key: Optional[str] = None, key_hash: Optional[str] = None
+    ) -> bool:
+        """Marca la clave (en claro o su hash) como revocada y la saca de la caché local."""
+        key_hash = hash_api_key(api_key) if api_key else key_hash
+        if not key_hash:
+            return False
+        try:
+            async with db.connection() as conn:
+                cur = conn.cursor()
+                query = "UPDATE api_keys SET status = 'revoked' WHERE key_hash = %s"
+                if db.backend == "sqlite":
+                    query = query.replace("%s", "?")
+                await cur.execute(query, (key_hash,))
+                revoked = bool(getattr(cur, "rowcount", 0))
+        except Exception as e:
+            logger.error(f"Error revoking API key: {e}")
+            return False
+        finally:
+            cls.invalidate_api_key(key_hash=key_hash)
+        return revoked
+
     @staticmethod
     async def create_client(
         name: str,
@@ -54,7 +178,7 @@ class ClientService:
         import secrets
 
         api_key = f"ag_{secrets.token_urlsafe(32)}"
-        key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+        key_hash = hash_api_key(api_key)
 
         try:
             async with db.connection() as conn:
@@ -66,14 +190,14 @@ class ClientService:
                         VALUES (%s, %s, %s, %s, %s, %s)
                         RETURNING id
                     """
-                    cur.execute(
+                    await cur.execute(
                         query_client, (name, email, company, meta_pixel_id, meta_access_token, plan)
                     )
-                    row = cur.fetchone()
+                    row = await cur.fetchone()
                     client_id = row[0] if row else None
                 else:
                     query_client = "INSERT INTO clients (name, email, company, meta_pixel_id, meta_access_token, plan) VALUES (?, ?, ?, ?, ?, ?)"
-                    cur.execute(
+                    await cur.execute(
                         query_client, (name, email, company, meta_pixel_id, meta_access_token, plan)
                     )
                     client_id = cur.lastrowid
@@ -86,8 +210,10 @@ class ClientService:
                 if db.backend == "sqlite":
                     query_key = query_key.replace("%s", "?")
 
-                cur.execute(query_key, (client_id, key_hash, "Default Key"))
+                await cur.execute(query_key, (client_id, key_hash, "Default Key"))
 
+            # Una búsqueda previa pudo dejar la clave en caché negativa
+            ClientService.invalidate_api_key(key_hash=key_hash)
             return {"client_id": client_id, "api_key": api_key}
         except Exception as e:
             logger.exception(f"Error creating client: {e}")
@@ -2,12 +2,17 @@
 💾 Cache Implementations.
 """
 
+from app.infrastructure.cache.local_dedup import LocalDedupTier, local_dedup
 from app.infrastructure.cache.memory_cache import (
     InMemoryDeduplication,
 )
 from app.infrastructure.cache.redis_cache import RedisDeduplication
+from app.infrastructure.cache.single_flight import SingleFlight
 
 __all__ = [
     "InMemoryDeduplication",
+    "LocalDedupTier",
+    "local_dedup",
     "RedisDeduplication",
+    "SingleFlight",
 ]
@@ -0,0 +1,190 @@
+"""
+⚡ Local Dedup Tier (in-process, in front of Redis).
+
+Redis `SET NX` is the source of truth across instances, but every call is a
+REST round trip to Upstash (~10-30 ms). Most duplicates are retries and
+browser/server double-fires that hit the *same* process seconds apart, so a
+local tier answers "definitely seen" without touching the network:
+
+- `TTLLRUSet`: bounded LRU of recently seen IDs with per-entry expiry.
+- `BloomFilter` (optional): probabilistic memory of IDs evicted from the LRU.
+  It can yield false positives (`error_rate`), so it is disabled by default.
+
+Only possibly-new IDs go to Redis. Hit/miss counters via `stats()`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class TTLLRUSet:
+    """LRU acotado de claves con expiración individual (thread-safe)."""
+
+    def __init__(self, maxsize: int = 10_000, ttl_seconds: int = 86400):
+        self.maxsize = max(1, maxsize)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def contains(self, key: str, now: Optional[float] = None) -> bool:
+        now = now or time.monotonic()
+        with self._lock:
+            expires_at = self._data.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= now:
+                del self._data[key]
+                return False
+            self._data.move_to_end(key)
+            return True
+
+    def add(self, key: str, ttl_seconds: Optional[int] = None) -> Optional[str]:
+        """Registra la clave. Devuelve la clave desalojada (si hubo)."""
+        expires_at = time.monotonic() + (ttl_seconds or self.ttl_seconds)
+        with self._lock:
+            self._data[key] = expires_at
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                return evicted
+        return None
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class BloomFilter:
+    """
+    Bloom filter con rotación de dos generaciones.
+
+    Al llenarse la generación actual pasa a ser la anterior y se abre una
+    nueva, así la memoria es fija y las claves antiguas "envejecen".
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._current = bytearray((self.num_bits + 7) // 8)
+        self._previous = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _has(bits: bytearray, positions) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        return self._has(self._current, positions) or self._has(self._previous, positions)
+
+    def add(self, key: str) -> None:
+        positions = self._positions(key)
+        with self._lock:
+            if self._count >= self.capacity:
+                self._previous = self._current
+                self._current = bytearray(len(self._previous))
+                self._count = 0
+            for p in positions:
+                self._current[p >> 3] |= 1 << (p & 7)
+            self._count += 1
+
+
+class LocalDedupTier:
+    """Tier local de deduplicación: LRU con TTL + Bloom opcional + contadores."""
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: int = 86400,
+        bloom_capacity: int = 0,
+        bloom_error_rate: float = 0.001,
+    ):
+        self._lru = TTLLRUSet(max_entries, ttl_seconds)
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity > 0 else None
+        self._stats: Dict[str, int] = {
+            "local_hits": 0,
+            "bloom_hits": 0,
+            "misses": 0,
+        }
+
+    def seen(self, key: str) -> bool:
+        """True si el ID ya pasó por este proceso (duplicado seguro sin ir a Redis)."""
+        if self._lru.contains(key):
+            self._stats["local_hits"] += 1
+            return True
+        if self._bloom is not None and key in self._bloom:
+            self._stats["bloom_hits"] += 1
+            return True
+        self._stats["misses"] += 1
+        return False
+
+    def remember(self, key: str, ttl_seconds: Optional[int] = None) -> None:
+        """Registra un ID confirmado (nuevo o duplicado según Redis)."""
+        evicted = self._lru.add(key, ttl_seconds)
+        if evicted is not None and self._bloom is not None:
+            self._bloom.add(evicted)
+
+    def forget(self, key: str) -> None:
+        """Retira un ID cuyo procesamiento falló (el reintento no es un duplicado)."""
+        self._lru.discard(key)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self._stats["local_hits"] + self._stats["bloom_hits"] + self._stats["misses"]
+        hits = self._stats["local_hits"] + self._stats["bloom_hits"]
+        return {
+            **self._stats,
+            "entries": len(self._lru),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _build_local_dedup() -> LocalDedupTier:
+    from app.infrastructure.config.settings import settings
+
+    cfg = settings.redis
+    return LocalDedupTier(
+        max_entries=cfg.dedup_local_max_entries,
+        bloom_capacity=cfg.dedup_bloom_capacity,
+        bloom_error_rate=cfg.dedup_bloom_error_rate,
+    )
+
+
+# Singleton compartido por todos los caminos de dedup (evt:{id})
+local_dedup = _build_local_dedup()
+
+
+def _register_metrics() -> None:
+    from app.infrastructure.monitoring.metrics import metrics
+
+    metrics.counter(
+        "dedup_lookups_total", "Local dedup tier lookups by result", ("result",)
+    ).set_function(
+        lambda: {
+            (result,): local_dedup._stats[key]
+            for result, key in (("local_hit", "local_hits"), ("bloom_hit", "bloom_hits"), ("miss", "misses"))
+        }
+    )
+    metrics.gauge("dedup_hit_ratio", "Local dedup tier hit ratio").set_function(
+        lambda: local_dedup.stats()["hit_ratio"]
+    )
+
+
+_register_metrics()
@@ -47,6 +47,10 @@ class InMemoryDeduplication(DeduplicationPort):
         )
         return True
 
+    async def release(self, event_key: str) -> None:
+        """Olvida la clave (el evento no llegó a persistirse)."""
+        self._store.pop(f"dedup:{event_key}", None)
+
     async def mark_processed(self, event_key: str, ttl_seconds: int = 86400) -> None:
         """Marca evento como procesado."""
         self._store[f"dedup:{event_key}"] = CacheEntry(
@@ -6,6 +6,7 @@ import asyncio
 import logging
 
 from app.application.interfaces.cache_port import DeduplicationPort
+from app.infrastructure.cache.local_dedup import local_dedup
 from app.infrastructure.cache.redis_provider import redis_provider
 
 logger = logging.getLogger(__name__)
@@ -15,33 +16,54 @@ class RedisDeduplication(DeduplicationPort):
     """
     Deduplicación usando Redis SET NX — consistent `evt:` key prefix.
     
-    Uses the shared RedisProvider singleton.
+    Uses the shared RedisProvider singleton. IDs already seen by this
+    process are answered by the local tier without a Redis round trip.
     """
 
     DEFAULT_TTL_SECONDS = 86400
 
     async def is_unique(self, event_key: str) -> bool:
+        cache_key = f"evt:{event_key}"
+        if local_dedup.seen(cache_key):
+            logger.debug(f"🔄 Duplicate event detected (local): {event_key}")
+            return False
+
         redis = redis_provider.async_client
         if not redis:
-            return True  # No Redis → process everything
+            local_dedup.remember(cache_key, self.DEFAULT_TTL_SECONDS)
+            return True  # No Redis → local tier only
 
         try:
-            cache_key = f"evt:{event_key}"
             result = await redis.set(
                 cache_key,
                 "1",
                 nx=True,
                 ex=self.DEFAULT_TTL_SECONDS,
             )
+            local_dedup.remember(cache_key, self.DEFAULT_TTL_SECONDS)
             is_new = result is not None
             if not is_new:
                 logger.debug(f"🔄 Duplicate event detected: {event_key}")
             return is_new
         except Exception as e:
             logger.warning(f"Redis dedup error: {e}")
+            local_dedup.remember(cache_key, self.DEFAULT_TTL_SECONDS)
             return True
 
+    async def release(self, event_key: str) -> None:
+        cache_key = f"evt:{event_key}"
+        local_dedup.forget(cache_key)
+        redis = redis_provider.async_client
+        if not redis:
+            return
+
+        try:
+            await redis.delete(cache_key)
+        except Exception as e:
+            logger.warning(f"Redis dedup release error: {e}")
+
     async def mark_processed(self, event_key: str, ttl_seconds: int = 86400) -> None:
+        local_dedup.remember(f"evt:{event_key}", ttl_seconds)
         redis = redis_provider.async_client
         if not redis:
             return
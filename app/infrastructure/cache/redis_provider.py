@@ -23,13 +23,82 @@ Usage:
 
 from __future__ import annotations
 
+import functools
+import inspect
 import logging
-from typing import Any, Optional
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from app.infrastructure.config.settings import settings
+from app.infrastructure.monitoring import server_timing
+from app.infrastructure.monitoring.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+REDIS_LATENCY = metrics.histogram(
+    "upstash_command_duration_seconds",
+    "Upstash Redis REST call latency per command",
+    ("client", "command"),
+)
+REDIS_ERRORS = metrics.counter(
+    "upstash_command_errors_total", "Failed Upstash Redis calls per command", ("client", "command")
+)
+
+
+class _InstrumentedRedis:
+    """Proxy fino sobre el cliente Upstash: mide cada comando (get, set, eval...)."""
+
+    def __init__(self, client: Any, kind: str):
+        self._client = client
+        self._kind = kind
+        self._wrapped: Dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        attr = getattr(self._client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        wrapped = self._wrapped[name] = self._wrap(name, attr)
+        return wrapped
+
+    def _wrap(self, command: str, fn: Callable) -> Callable:
+        kind = self._kind
+
+        def observe(start: float) -> None:
+            elapsed = time.perf_counter() - start
+            REDIS_LATENCY.observe(elapsed, kind, command)
+            server_timing.record("redis", elapsed)
+
+        async def timed(awaitable: Awaitable[Any]) -> Any:
+            start = time.perf_counter()
+            try:
+                return await awaitable
+            except Exception:
+                REDIS_ERRORS.inc(kind, command)
+                raise
+            finally:
+                observe(start)
+
+        @functools.wraps(fn)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                REDIS_ERRORS.inc(kind, command)
+                observe(start)
+                raise
+            # El cliente async de upstash devuelve awaitables (no son coroutine
+            # functions): se mide el await, no la creación del awaitable
+            if inspect.isawaitable(result):
+                return timed(result)
+            observe(start)
+            return result
+
+        return call
+
 
 class RedisProvider:
     """
@@ -60,13 +129,19 @@ class RedisProvider:
             from upstash_redis import Redis
             from upstash_redis.asyncio import Redis as AsyncRedis
 
-            self._sync_client = Redis(
-                url=settings.UPSTASH_REDIS_REST_URL,
-                token=settings.UPSTASH_REDIS_REST_TOKEN,
+            self._sync_client = _InstrumentedRedis(
+                Redis(
+                    url=settings.UPSTASH_REDIS_REST_URL,
+                    token=settings.UPSTASH_REDIS_REST_TOKEN,
+                ),
+                "sync",
             )
-            self._async_client = AsyncRedis(
-                url=settings.UPSTASH_REDIS_REST_URL,
-                token=settings.UPSTASH_REDIS_REST_TOKEN,
+            self._async_client = _InstrumentedRedis(
+                AsyncRedis(
+                    url=settings.UPSTASH_REDIS_REST_URL,
+                    token=settings.UPSTASH_REDIS_REST_TOKEN,
+                ),
+                "async",
             )
             self._available = True
             logger.info("✅ RedisProvider: Connected to Upstash (Sync + Async)")
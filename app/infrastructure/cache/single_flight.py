@@ -0,0 +1,94 @@
+"""
+🛫 Single-Flight (request coalescing) for read-through caches.
+
+Keeps at most ONE load/refresh in flight per key. Concurrent callers either
+join the in-flight task (`do`) or are dropped (`schedule`, fire-and-forget
+SWR refresh). `schedule` waits a random jitter before running so keys that
+went stale together don't all hit the backend at the same instant.
+
+Usage:
+    flight = SingleFlight("cms", jitter=1.0)
+    flight.schedule("services_config", lambda: refresh("services_config"))
+    visitor = await flight.do(external_id, lambda: repo.get(external_id))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalescing de cargas concurrentes por clave (una en vuelo como máximo)."""
+
+    def __init__(self, name: str = "single_flight", jitter: float = 0.0):
+        self.name = name
+        self.jitter = jitter
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._stats: Dict[str, int] = {"started": 0, "coalesced": 0}
+
+    def _current(self, key: Hashable) -> Optional[asyncio.Task]:
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            return None
+        # Una tarea de otro event loop (p. ej. tests) nunca terminará aquí
+        try:
+            if task.get_loop() is not asyncio.get_running_loop():
+                return None
+        except RuntimeError:
+            return None
+        return task
+
+    def is_refreshing(self, key: Hashable) -> bool:
+        """True mientras haya una carga en vuelo (o esperando su jitter) para `key`."""
+        return self._current(key) is not None
+
+    def _start(
+        self, key: Hashable, fn: Callable[[], Awaitable[T]], delay: float
+    ) -> asyncio.Task:
+        async def _run() -> T:
+            if delay > 0:
+                await asyncio.sleep(random.uniform(0, delay))
+            return await fn()
+
+        task = asyncio.create_task(_run(), name=f"{self.name}:{key}")
+        self._inflight[key] = task
+        self._stats["started"] += 1
+
+        def _done(t: asyncio.Task) -> None:
+            if self._inflight.get(key) is t:
+                del self._inflight[key]
+            if not t.cancelled() and t.exception() is not None:
+                logger.debug("[%s] load for %r failed: %s", self.name, key, t.exception())
+
+        task.add_done_callback(_done)
+        return task
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Ejecuta `fn` o se une a la ejecución en vuelo para `key` (sin jitter)."""
+        task = self._current(key)
+        if task is None:
+            task = self._start(key, fn, delay=0)
+        else:
+            self._stats["coalesced"] += 1
+        # shield: cancelar a un llamador no cancela la carga compartida
+        return await asyncio.shield(task)
+
+    def schedule(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]], jitter: Optional[float] = None
+    ) -> bool:
+        """Refresh fire-and-forget. False si ya había uno en vuelo para `key`."""
+        if self._current(key) is not None:
+            self._stats["coalesced"] += 1
+            return False
+        self._start(key, fn, delay=self.jitter if jitter is None else jitter)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "in_flight": len(self._inflight)}
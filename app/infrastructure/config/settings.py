@@ -15,7 +15,7 @@ import logging
 import os
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, model_validator, validator
@@ -73,7 +73,15 @@ class DatabaseSettings(BaseModel):
         alias="DATABASE_URL",
         validation_alias="DATABASE_URL",
     )
+    direct_url: Optional[str] = Field(
+        default=None,
+        description="Direct (session-mode) URL for LISTEN/NOTIFY; falls back to DATABASE_URL",
+        alias="DATABASE_DIRECT_URL",
+        validation_alias="DATABASE_DIRECT_URL",
+    )
     pool_size: int = Field(default=5, ge=1, le=20)
+    pool_min_size: int = Field(default=1, ge=0, le=20)
+    pool_max_idle: int = Field(default=300, ge=30)
     max_overflow: int = Field(default=10, ge=0)
     pool_timeout: int = Field(default=30, ge=5)
 
@@ -106,6 +114,11 @@ class RedisSettings(BaseModel):
     rest_token: Optional[str] = Field(default=None, alias="UPSTASH_REDIS_REST_TOKEN", validation_alias="UPSTASH_REDIS_REST_TOKEN")
     url: Optional[str] = Field(default=None, alias="REDIS_URL", validation_alias="REDIS_URL")
 
+    # Local dedup tier in front of Redis (0 disables the Bloom filter)
+    dedup_local_max_entries: int = Field(default=10000, ge=1)
+    dedup_bloom_capacity: int = Field(default=0, ge=0)
+    dedup_bloom_error_rate: float = Field(default=0.001, gt=0, lt=1)
+
     @property
     def is_configured(self) -> bool:
         return bool(self.url or (self.rest_url and self.rest_token))
@@ -157,6 +170,14 @@ class MetaSettings(BaseModel):
     test_event_code: Optional[str] = Field(default=None)
     sandbox_mode: bool = Field(default=False)
 
+    # CAPI batching: events are coalesced per (pixel, token) into one request
+    batch_max_size: int = Field(default=500, ge=1, le=1000)
+    batch_max_linger_ms: int = Field(default=200, ge=0, le=5000)
+
+    # Ventana adaptativa de requests en vuelo hacia Graph API (AIMD)
+    graph_initial_concurrency: int = Field(default=8, ge=1)
+    graph_max_concurrency: int = Field(default=64, ge=1)
+
     @property
     def is_configured(self) -> bool:
         return bool(self.pixel_id and self.access_token)
@@ -167,6 +188,35 @@ class MetaSettings(BaseModel):
         return f"https://graph.facebook.com/{self.api_version}/{self.pixel_id}/events"
 
 
+class WorkerSettings(BaseModel):
+    """Work queue in-process para efectos secundarios del tracking."""
+
+    class Config:
+        extra = "ignore"
+
+    # Tareas en curso por lane (tipo de tarea): WORKERS__CONCURRENCY='{"conversions": 16}'
+    # conversions/engagement comparten pool: el tope menor de engagement reserva
+    # workers para las conversiones
+    concurrency: Dict[str, int] = Field(
+        default={"conversions": 8, "engagement": 6, "visitors": 4, "crm": 2, "webhooks": 2}
+    )
+    # Tareas en cola por lane antes de aplicar la política de descarte
+    max_queue: Dict[str, int] = Field(
+        default={
+            "conversions": 5000,
+            "engagement": 2000,
+            "visitors": 2000,
+            "crm": 500,
+            "webhooks": 500,
+        }
+    )
+    # Peso en el weighted round-robin de lanes que comparten pool
+    weights: Dict[str, int] = Field(default={"conversions": 4, "engagement": 1})
+    # Ocupación de la cola de engagement a partir de la cual se muestrea
+    shed_above: float = Field(default=0.5, ge=0.0, lt=1.0)
+    drain_timeout_seconds: float = Field(default=10.0, ge=0)
+
+
 class SecuritySettings(BaseSettings):
     """Configuración de seguridad."""
 
@@ -216,6 +266,13 @@ class FeatureFlags(BaseSettings):
     meta_tracking: bool = Field(default=True)
     maintenance_mode: bool = Field(default=False)
     booking_enabled: bool = Field(default=True)
+    # In-process outbox dispatcher (solo despliegues long-running, no serverless)
+    outbox_dispatcher: bool = Field(default=False)
+    # Heartbeat de lag del event loop + captura de stacks bloqueantes (/admin/loop).
+    # Solo long-running: en serverless se ignora
+    loop_monitor: bool = Field(default=True)
+    # Fracción de requests con header Server-Timing (0 = solo opt-in por header)
+    server_timing_sample_rate: float = Field(default=0.0, ge=0.0, le=1.0)
 
     # A/B Testing
     cta_variant: Literal["whatsapp", "form", "call"] = Field(default="whatsapp")
@@ -291,6 +348,7 @@ class Settings(BaseSettings):
     redis: RedisSettings = Field(default_factory=RedisSettings)
     cloudflare: CloudflareSettings = Field(default_factory=CloudflareSettings)
     meta: MetaSettings = Field(default_factory=MetaSettings)
+    workers: WorkerSettings = Field(default_factory=WorkerSettings)
     security: SecuritySettings = Field(default_factory=SecuritySettings)
     features: FeatureFlags = Field(default_factory=FeatureFlags)
     observability: ObservabilitySettings = Field(default_factory=ObservabilitySettings)
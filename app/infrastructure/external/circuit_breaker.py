@@ -7,16 +7,42 @@ This implementation uses Upstash Redis to maintain global state:
 - CLOSED: Everything is fine.
 - OPEN: Fast failure, don't execute the external call.
 - HALF-OPEN: One test request is allowed to see if the service recovered.
+
+Hybrid mode: each process keeps the breaker state in memory and only reads
+Redis once per `refresh_interval_sec`. Redis is written only on transitions
+(OPEN/CLOSED) or when the failure counter changes, so the happy path costs
+zero REST calls. Other instances converge on their next refresh.
 """
 
 import logging
+import time
 from contextlib import asynccontextmanager
-from typing import Type
+from dataclasses import dataclass
+from typing import Any, Dict, Type
 
 from app.infrastructure.cache.redis_provider import redis_provider
 
 logger = logging.getLogger(__name__)
 
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+
+
+@dataclass
+class _LocalBreakerState:
+    """Estado en proceso, compartido por todas las instancias del mismo servicio."""
+
+    state: str = CLOSED
+    open_until: float = 0.0  # time.monotonic() deadline (locally opened)
+    remote_open: bool = False  # OPEN key seen in Redis (TTL unknown locally)
+    failures: int = 0  # failures recorded by this process since last reset
+    refreshed_at: float = float("-inf")
+    source: Any = None  # Redis client the state was last synced with
+    probe_in_flight: bool = False
+
+
+_local_states: Dict[str, _LocalBreakerState] = {}
+
 
 class CircuitBreakerOpenException(Exception):
     """Raised when the circuit breaker is OPEN and preventing requests."""
@@ -31,16 +57,18 @@ class DistributedCircuitBreaker:
         failure_threshold: int = 3,
         recovery_timeout_sec: int = 30,
         expected_exceptions: tuple[Type[Exception], ...] = (Exception,),
+        refresh_interval_sec: float = 2.0,
     ):
         self.service_name = service_name
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout_sec
         self.expected_exceptions = expected_exceptions
+        self.refresh_interval = refresh_interval_sec
 
         # Redis Keys
         self.state_key = f"cb:{service_name}:state"  # 'OPEN' or not exists (CLOSED)
         self.fails_key = f"cb:{service_name}:failures"  # Integer count
-        self.half_open_key = f"cb:{service_name}:halfopen"  # Lock for half-open test
+        self.half_open_key = f"cb:{service_name}:halfopen"  # Legacy probe lock (cleared on transitions)
 
     async def _get_redis(self):
         """Helper to safely fetch async redis client"""
@@ -48,18 +76,62 @@ class DistributedCircuitBreaker:
             return None
         return redis_provider.async_client
 
+    @property
+    def _local(self) -> _LocalBreakerState:
+        return _local_states.setdefault(self.service_name, _LocalBreakerState())
+
+    async def _sync_state(self, redis) -> _LocalBreakerState:
+        """Refreshes the local state from Redis at most once per refresh interval."""
+        st = self._local
+        now = time.monotonic()
+        if st.source is redis and now - st.refreshed_at < self.refresh_interval:
+            return st
+
+        try:
+            remote = await redis.get(self.state_key)
+        except Exception as e:
+            logger.warning(f"⚠️ [Circuit Breaker] {self.service_name} state refresh failed: {e}")
+            return st
+
+        st.refreshed_at = now
+        st.source = redis
+        if remote == OPEN:
+            if st.state != OPEN:
+                logger.warning(
+                    f"⚡ [Circuit Breaker] {self.service_name} opened by another instance."
+                )
+                st.state = OPEN
+            # Stay open while the key lives in Redis
+            st.remote_open = True
+        else:
+            st.remote_open = False
+            if st.state == OPEN:
+                # Remote OPEN expired or was cleared: allow a half-open probe now
+                st.open_until = min(st.open_until, now)
+        return st
+
+    def _rejects(self, st: _LocalBreakerState) -> bool:
+        return st.state == OPEN and (
+            st.remote_open or time.monotonic() < st.open_until or st.probe_in_flight
+        )
+
     async def is_open(self) -> bool:
         """Check if the circuit is currently OPEN."""
         redis = await self._get_redis()
         if not redis:
             return False  # Bypass circuit breaker if Redis is down
 
-        state = await redis.get(self.state_key)
-        if state == "OPEN":
-            # Are we ready for Half-Open? The TTL of the state_key determines this.
-            # If state_key exists, it means we are still deep in the recovery timeout.
-            return True
-        return False
+        st = await self._sync_state(redis)
+        return self._rejects(st)
+
+    async def _open(self, redis, st: _LocalBreakerState) -> None:
+        """Transition to OPEN: local first, then publish to Redis."""
+        st.state = OPEN
+        st.open_until = time.monotonic() + self.recovery_timeout
+        st.failures = 0
+        await redis.set(self.state_key, OPEN, ex=self.recovery_timeout)
+        # Reset the half-open lock and failures
+        await redis.delete(self.fails_key, self.half_open_key)
 
     async def record_failure(self):
         """Record a failure and optionally open the circuit."""
@@ -67,6 +139,8 @@ class DistributedCircuitBreaker:
         if not redis:
             return
 
+        st = self._local
+        st.failures += 1
         fails = await redis.incr(self.fails_key)
         # Set expiration so sporadic errors don't accumulate forever
         if fails == 1:
@@ -76,20 +150,28 @@ class DistributedCircuitBreaker:
             logger.error(
                 f"🛑 [Circuit Breaker] {self.service_name} failure threshold reached! Opening circuit for {self.recovery_timeout}s."
             )
-            await redis.set(self.state_key, "OPEN", ex=self.recovery_timeout)
-            # Reset the half-open lock and failures
-            await redis.delete(self.fails_key)
-            await redis.delete(self.half_open_key)
+            await self._open(redis, st)
 
     async def record_success(self):
-        """Reset failures on success."""
+        """Reset failures on success (writes to Redis only if something changed)."""
         redis = await self._get_redis()
         if not redis:
             return
 
-        await redis.delete(self.fails_key)
-        await redis.delete(self.state_key)
-        await redis.delete(self.half_open_key)
+        st = self._local
+        if st.state == CLOSED and st.failures == 0:
+            return  # Happy path: nothing to publish
+
+        was_open = st.state == OPEN
+        st.state = CLOSED
+        st.failures = 0
+        st.open_until = 0.0
+        st.remote_open = False
+        await redis.delete(self.fails_key, self.state_key, self.half_open_key)
+        if was_open:
+            logger.info(
+                f"🟢 [Circuit Breaker] {self.service_name} Probe successful! Circuit CLOSED."
+            )
 
     @asynccontextmanager
     async def execute(self):
@@ -104,44 +186,34 @@ class DistributedCircuitBreaker:
             yield
             return
 
-        # Check state
-        state = await redis.get(self.state_key)
-
-        if state == "OPEN":
-            logger.warning(
-                f"⚡ [Circuit Breaker] {self.service_name} is OPEN. Rejecting request."
-            )
-            raise CircuitBreakerOpenException(
-                f"Circuit Breaker is OPEN for {self.service_name}"
-            )
+        st = await self._sync_state(redis)
+        is_probe = False
 
-        # At this point, it's either CLOSED or the OPEN TTL expired (moving to HALF-OPEN)
-        # If failures key is 0 or non-existent, we are CLOSED.
-        # But if the state_key expired, we might be the lucky request that probes the service.
-        yield_test_probe = False
-
-        # If it was recently open but the key expired, we use a simple SETNX to lock the probe
-        probe_locked = await redis.set(self.half_open_key, "1", nx=True, ex=10)
-        if probe_locked:
-            # We are the probe!
-            yield_test_probe = True
+        if st.state == OPEN:
+            if self._rejects(st):
+                logger.warning(
+                    f"⚡ [Circuit Breaker] {self.service_name} is OPEN. Rejecting request."
+                )
+                raise CircuitBreakerOpenException(
+                    f"Circuit Breaker is OPEN for {self.service_name}"
+                )
+            # Recovery timeout elapsed: this request is the HALF-OPEN probe
+            st.probe_in_flight = True
+            is_probe = True
 
         try:
             yield
             # If we get here without exception, success!
             await self.record_success()
-            if yield_test_probe:
-                logger.info(
-                    f"🟢 [Circuit Breaker] {self.service_name} Probe successful! Circuit CLOSED."
-                )
         except self.expected_exceptions as e:
             # Specific exceptions happen -> track failure
             logger.warning(f"⚠️ [Circuit Breaker] {self.service_name} call failed: {e}")
-            await self.record_failure()
-            if yield_test_probe:
+            if is_probe:
                 # Probe failed, reopen immediately
-                await redis.set(self.state_key, "OPEN", ex=self.recovery_timeout)
-            raise
-        except Exception:
-            # Unrelated exceptions pass through without tripping circuit
+                await self._open(redis, st)
+            else:
+                await self.record_failure()
             raise
+        finally:
+            if is_probe:
+                st.probe_in_flight = False
@@ -0,0 +1,192 @@
+"""
+🌐 Outbound HTTP Client Registry.
+
+One pooled httpx client per upstream (Meta Graph, Turnstile, QStash,
+Tinybird, n8n) with tuned limits and keep-alive, instead of a new client
+(and TLS handshake) per call.
+
+- Async clients are bound to the event loop that created them (like the
+  Postgres pool): a different running loop gets a fresh client.
+- `open()` / `aclose()` are called from the FastAPI lifespan; `get()` also
+  creates clients lazily for serverless invocations and scripts.
+
+Usage:
+    from app.infrastructure.external.http_clients import http_clients
+
+    response = await http_clients.get("meta").post(url, json=payload)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.infrastructure.monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_LATENCY = metrics.histogram(
+    "upstream_request_duration_seconds",
+    "Outbound HTTP latency (until response headers) per upstream (status=error: timeout/transport failure)",
+    ("upstream", "status"),
+)
+
+
+def _metric_hooks(name: str, is_async: bool) -> dict:
+    """Event hooks de httpx que miden cada llamada al upstream `name`."""
+
+    def on_request(request: httpx.Request) -> None:
+        request.extensions["metrics_start"] = time.perf_counter()
+
+    def on_response(response: httpx.Response) -> None:
+        start = response.request.extensions.get("metrics_start")
+        if start is not None:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, name, str(response.status_code))
+
+    if not is_async:
+        return {"request": [on_request], "response": [on_response]}
+
+    async def on_request_async(request: httpx.Request) -> None:
+        on_request(request)
+
+    async def on_response_async(response: httpx.Response) -> None:
+        on_response(response)
+
+    return {"request": [on_request_async], "response": [on_response_async]}
+
+
+class _MeteredAsyncClient(httpx.AsyncClient):
+    """AsyncClient que además registra timeouts/errores de conexión (los hooks no los ven)."""
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(event_hooks=_metric_hooks(upstream, is_async=True), **kwargs)
+        self._upstream = upstream
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            return await super().send(request, **kwargs)
+        except httpx.HTTPError:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, self._upstream, "error")
+            raise
+
+
+class _MeteredClient(httpx.Client):
+    """Variante síncrona de `_MeteredAsyncClient`."""
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(event_hooks=_metric_hooks(upstream, is_async=False), **kwargs)
+        self._upstream = upstream
+
+    def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            return super().send(request, **kwargs)
+        except httpx.HTTPError:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, self._upstream, "error")
+            raise
+
+
+@dataclass(frozen=True)
+class UpstreamConfig:
+    """Pool configuration for one external service."""
+
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+
+    def client_kwargs(self) -> dict:
+        return {
+            "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "http2": self.http2,
+        }
+
+
+UPSTREAMS: Dict[str, UpstreamConfig] = {
+    # Graph API: alto volumen, multiplexado HTTP/2 sobre pocas conexiones
+    "meta": UpstreamConfig(timeout=10.0, max_connections=50, max_keepalive=20, http2=True),
+    "turnstile": UpstreamConfig(timeout=5.0, max_connections=20, http2=True),
+    "qstash": UpstreamConfig(timeout=5.0, max_connections=10),
+    "tinybird": UpstreamConfig(timeout=10.0, max_connections=10, http2=True),
+    # n8n self-hosted: HTTP/1.1, bajo volumen
+    "n8n": UpstreamConfig(timeout=10.0, max_connections=5, max_keepalive=2),
+}
+
+
+class HTTPClientRegistry:
+    """Owns the per-upstream httpx pools for the whole process."""
+
+    def __init__(self, upstreams: Optional[Dict[str, UpstreamConfig]] = None):
+        self._upstreams = upstreams or UPSTREAMS
+        self._async: Dict[str, Tuple[httpx.AsyncClient, Optional[asyncio.AbstractEventLoop]]] = {}
+        self._sync: Dict[str, httpx.Client] = {}
+
+    def _config(self, name: str) -> UpstreamConfig:
+        try:
+            return self._upstreams[name]
+        except KeyError:
+            raise KeyError(f"Unknown upstream '{name}'") from None
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Async client for `name`, bound to the current event loop."""
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        entry = self._async.get(name)
+        if entry is not None and not entry[0].is_closed and entry[1] is loop:
+            return entry[0]
+
+        client = _MeteredAsyncClient(name, **self._config(name).client_kwargs())
+        self._async[name] = (client, loop)
+        return client
+
+    def get_sync(self, name: str) -> httpx.Client:
+        """Sync client for `name` (legacy sync paths: send_event, n8n)."""
+        client = self._sync.get(name)
+        if client is None or client.is_closed:
+            client = _MeteredClient(name, **self._config(name).client_kwargs())
+            self._sync[name] = client
+        return client
+
+    async def open(self) -> None:
+        """Creates every async pool up front (startup)."""
+        for name in self._upstreams:
+            self.get(name)
+        logger.info("🌐 HTTP clients ready: %s", ", ".join(self._upstreams))
+
+    async def aclose(self) -> None:
+        """Closes every pool (shutdown)."""
+        async_clients, self._async = self._async, {}
+        sync_clients, self._sync = self._sync, {}
+
+        current = asyncio.get_running_loop()
+        for name, (client, loop) in async_clients.items():
+            # Un cliente de otro loop (ya cerrado) no se puede cerrar desde aquí
+            if loop is not None and loop is not current:
+                continue
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"⚠️ HTTP client '{name}' close failed: {e}")
+        for client in sync_clients.values():
+            client.close()
+        logger.info("🌐 HTTP clients closed")
+
+
+# Singleton
+http_clients = HTTPClientRegistry()
@@ -2,6 +2,18 @@
 📘 Meta CAPI Integration.
 """
 
+from app.infrastructure.external.meta_capi.batcher import CAPIBatchDispatcher
+from app.infrastructure.external.meta_capi.limiter import (
+    AdaptiveConcurrencyLimiter,
+    LimiterTimeout,
+    graph_limiter,
+)
 from app.infrastructure.external.meta_capi.tracker import MetaTracker
 
-__all__ = ["MetaTracker"]
+__all__ = [
+    "AdaptiveConcurrencyLimiter",
+    "CAPIBatchDispatcher",
+    "LimiterTimeout",
+    "MetaTracker",
+    "graph_limiter",
+]
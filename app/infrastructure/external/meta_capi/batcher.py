@@ -0,0 +1,250 @@
+"""
+📦 Meta CAPI Batch Dispatcher.
+
+Coalesces single events into multi-event Conversions API requests.
+
+Meta accepts up to 1000 events per POST to /{pixel_id}/events. Instead of
+one request per event, callers submit their event and await its result while
+the dispatcher groups pending events by (pixel_id, access_token) and flushes
+each group when:
+- it reaches `max_batch_size` events, or
+- the oldest event has waited `max_linger_seconds`, or
+- an `urgent` event (conversion) joins it: conversions never wait out the
+  linger window; the engagement events already pending ride along.
+
+Each caller receives the outcome of its own event. When Meta rejects a
+multi-event batch as invalid (HTTP 400, Graph error code 100), the batch is
+re-sent event by event so a single malformed event cannot fail its
+neighbours. Other 400s (throttling, expired token) fail the whole batch:
+fanning them out would multiply the requests Meta is already refusing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# (pixel_id, access_token)
+BatchKey = Tuple[str, str]
+BatchSender = Callable[[str, Dict[str, Any]], Awaitable[httpx.Response]]
+
+GRAPH_EVENTS_URL = "https://graph.facebook.com/{version}/{pixel_id}/events"
+# Graph "Invalid parameter": the only 400 caused by the events themselves
+PAYLOAD_ERROR_CODES = frozenset({100})
+
+
+def _graph_error_code(response: httpx.Response) -> Optional[int]:
+    try:
+        return response.json().get("error", {}).get("code")
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+@dataclass
+class _PendingBatch:
+    """Events waiting to be flushed for a single (pixel, token) pair."""
+
+    loop: asyncio.AbstractEventLoop
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    test_event_code: Optional[str] = None
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class CAPIBatchDispatcher:
+    """
+    Async batching dispatcher for Meta CAPI.
+
+    The transport is injected as `sender(url, payload) -> httpx.Response` so
+    each caller keeps ownership of its HTTP client and resilience policy
+    (circuit breaker, retries).
+    """
+
+    MAX_EVENTS_PER_REQUEST = 1000
+
+    def __init__(
+        self,
+        sender: BatchSender,
+        max_batch_size: int = 500,
+        max_linger_seconds: float = 0.2,
+        api_version: str = "v21.0",
+    ):
+        self._sender = sender
+        self.max_batch_size = max(1, min(max_batch_size, self.MAX_EVENTS_PER_REQUEST))
+        self.max_linger_seconds = max(0.0, max_linger_seconds)
+        self.api_version = api_version
+
+        self._batches: Dict[BatchKey, _PendingBatch] = {}
+        self._inflight: Set[asyncio.Task] = set()
+        self._stats: Dict[str, int] = {
+            "events_submitted": 0,
+            "requests_sent": 0,
+            "events_failed": 0,
+            "isolated_resends": 0,
+            "urgent_flushes": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(
+        self,
+        event: Dict[str, Any],
+        pixel_id: str,
+        access_token: str,
+        test_event_code: Optional[str] = None,
+        urgent: bool = False,
+    ) -> bool:
+        """
+        Enqueues a single CAPI event and waits for its delivery result.
+
+        `urgent` flushes the batch immediately instead of waiting for the linger.
+
+        Returns:
+            True if Meta accepted the event, False if it was rejected.
+
+        Raises:
+            Transport errors (e.g. httpx.RequestError) from the batch request,
+            so existing retry policies keep working.
+        """
+        loop = asyncio.get_running_loop()
+        key: BatchKey = (pixel_id, access_token)
+
+        batch = self._batches.get(key)
+        if batch is not None and batch.loop is not loop:
+            # Stale batch from a closed loop (tests, worker restarts)
+            self._discard(key)
+            batch = None
+
+        if batch is None:
+            batch = _PendingBatch(loop=loop, test_event_code=test_event_code)
+            self._batches[key] = batch
+            if self.max_linger_seconds > 0:
+                batch.timer = loop.call_later(
+                    self.max_linger_seconds, self._flush_key, key
+                )
+
+        future: asyncio.Future = loop.create_future()
+        batch.events.append(event)
+        batch.futures.append(future)
+        self._stats["events_submitted"] += 1
+        if urgent:
+            self._stats["urgent_flushes"] += 1
+
+        if urgent or len(batch.events) >= self.max_batch_size or self.max_linger_seconds <= 0:
+            self._flush_key(key)
+
+        return await future
+
+    async def flush_all(self) -> None:
+        """Flushes every pending batch and waits for in-flight requests (shutdown)."""
+        for key in list(self._batches.keys()):
+            self._flush_key(key)
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    @property
+    def pending_events(self) -> int:
+        return sum(len(b.events) for b in self._batches.values())
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for observability (requests vs events ratio)."""
+        return {**self._stats, "pending_events": self.pending_events}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _discard(self, key: BatchKey) -> None:
+        batch = self._batches.pop(key, None)
+        if batch and batch.timer:
+            batch.timer.cancel()
+
+    def _flush_key(self, key: BatchKey) -> None:
+        batch = self._batches.pop(key, None)
+        if batch is None or not batch.events:
+            return
+        if batch.timer:
+            batch.timer.cancel()
+
+        task = batch.loop.create_task(self._dispatch(key, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    def _build_request(
+        self,
+        key: BatchKey,
+        events: List[Dict[str, Any]],
+        test_event_code: Optional[str],
+    ) -> Tuple[str, Dict[str, Any]]:
+        pixel_id, access_token = key
+        url = GRAPH_EVENTS_URL.format(version=self.api_version, pixel_id=pixel_id)
+        payload: Dict[str, Any] = {"data": events, "access_token": access_token}
+        if test_event_code:
+            payload["test_event_code"] = test_event_code
+        return url, payload
+
+    async def _dispatch(self, key: BatchKey, batch: _PendingBatch) -> None:
+        try:
+            results = await self._send(key, batch.events, batch.test_event_code)
+        except Exception as exc:
+            self._stats["events_failed"] += len(batch.futures)
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, ok in zip(batch.futures, results, strict=False):
+            if not ok:
+                self._stats["events_failed"] += 1
+            if not future.done():
+                future.set_result(ok)
+
+    async def _send(
+        self,
+        key: BatchKey,
+        events: List[Dict[str, Any]],
+        test_event_code: Optional[str],
+    ) -> List[bool]:
+        url, payload = self._build_request(key, events, test_event_code)
+        self._stats["requests_sent"] += 1
+        response = await self._sender(url, payload)
+
+        if response.status_code == 200:
+            logger.info(
+                "[META CAPI BATCH] ✅ %d event(s) sent to pixel %s", len(events), key[0]
+            )
+            return [True] * len(events)
+
+        if (
+            response.status_code == 400
+            and len(events) > 1
+            and _graph_error_code(response) in PAYLOAD_ERROR_CODES
+        ):
+            # Meta rejects the whole request if one event is invalid:
+            # isolate the offender so the rest still get delivered.
+            logger.warning(
+                "[META CAPI BATCH] ⚠️ Batch of %d rejected (400). Isolating events...",
+                len(events),
+            )
+            self._stats["isolated_resends"] += 1
+            results = await asyncio.gather(
+                *(self._send(key, [event], test_event_code) for event in events),
+                return_exceptions=True,
+            )
+            return [r[0] if isinstance(r, list) else False for r in results]
+
+        logger.warning(
+            "[META CAPI BATCH] ⚠️ %d event(s) failed (%d): %s",
+            len(events),
+            response.status_code,
+            response.text,
+        )
+        return [False] * len(events)
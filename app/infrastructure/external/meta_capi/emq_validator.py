@@ -9,14 +9,27 @@ Meta penaliza (cobra más) cuando EMQ < 6.0:
 - EMQ 6-8: Costo normal
 - EMQ < 6: +30% CPC (penalización)
 - EMQ < 4: +50% CPC (severa)
+
+Historial: log append-only segmentado por día (`<dir>/YYYY-MM-DD.jsonl`, una
+línea compacta por evento) + ring buffer en memoria de los últimos eventos +
+agregados diarios incrementales. Validar un evento es un append de una línea;
+el reporte diario lee el agregado sin recorrer eventos.
+
+Cada agregado se persiste en `<dir>/YYYY-MM-DD.agg.json` junto con el offset
+del segmento que cubre (al rotar, al cerrar y cada `AGG_FLUSH_EVERY` eventos).
+El arranque es perezoso (primer uso, no al importar) y solo lee esos JSON, las
+líneas posteriores al offset y la cola del segmento de hoy para el ring buffer:
+no depende del tamaño total del historial.
 """
 
 import json
 import logging
-from dataclasses import dataclass
+import os
+from collections import deque
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import IO, Any, Deque, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +69,28 @@ class EMQEvent:
     user_data: Dict[str, Any]
 
 
+@dataclass
+class EMQDailyAggregate:
+    """Métricas de un día, mantenidas de forma incremental por evento"""
+
+    total_events: int = 0
+    score_sum: float = 0.0
+    min_emq: float = 10.0
+    max_emq: float = 0.0
+    events_by_type: Dict[str, int] = field(default_factory=dict)
+    level_distribution: Dict[str, int] = field(
+        default_factory=lambda: {"excellent": 0, "good": 0, "fair": 0, "poor": 0, "critical": 0}
+    )
+
+    def add(self, event_name: str, score: float) -> None:
+        self.total_events += 1
+        self.score_sum += score
+        self.min_emq = min(self.min_emq, score)
+        self.max_emq = max(self.max_emq, score)
+        self.events_by_type[event_name] = self.events_by_type.get(event_name, 0) + 1
+        self.level_distribution[EMQScore.from_score(score).name.lower()] += 1
+
+
 class EMQValidator:
     """
     Valida y monitorea Event Match Quality para Meta CAPI.
@@ -96,11 +131,18 @@ class EMQValidator:
     EMQ_THRESHOLD_WARNING = 6.0  # Alerta si baja de aquí
     EMQ_THRESHOLD_CRITICAL = 4.0  # Bloquear ads si baja de aquí
 
-    def __init__(self, storage_path: str = ".logs/emq_history.json"):
+    MAX_EVENTS = 1000  # Ring buffer de eventos recientes en memoria
+    MAX_SEGMENTS = 30  # Días de historial en disco
+    AGG_FLUSH_EVERY = 100  # Eventos entre escrituras del agregado del día
+
+    def __init__(self, storage_path: str = ".logs/emq_history"):
         self.storage_path = storage_path
-        self.events: List[EMQEvent] = []
-        self.daily_scores: Dict[str, Dict[str, float]] = {}
-        self._load_history()
+        self.events: Deque[EMQEvent] = deque(maxlen=self.MAX_EVENTS)
+        self.daily: Dict[str, EMQDailyAggregate] = {}
+        self._segment_day: Optional[str] = None
+        self._segment: Optional[IO[str]] = None
+        self._unsaved = 0
+        self._loaded = False
 
     def calculate_emq(self, user_data: Dict[str, Any]) -> Dict:
         """
@@ -121,12 +163,12 @@ class EMQValidator:
         recommendations = []
 
         # Verificar cada campo ponderado
-        for field, weight in self.FIELD_WEIGHTS.items():
-            if self._has_valid_field(user_data, field):
+        for key, weight in self.FIELD_WEIGHTS.items():
+            if self._has_valid_field(user_data, key):
                 score += weight
-                matched.append(field)
+                matched.append(key)
             else:
-                missing.append(field)
+                missing.append(key)
 
         # Normalizar a escala 0-10
         max_possible = sum(self.FIELD_WEIGHTS.values())
@@ -202,8 +244,7 @@ class EMQValidator:
             match_keys={k: k in emq_result["matched_fields"] for k in self.FIELD_WEIGHTS.keys()},
             user_data=user_data,
         )
-        self.events.append(event)
-        self._save_history()
+        self._record(event)
 
         # Alertas
         if emq_result["score"] < self.EMQ_THRESHOLD_CRITICAL:
@@ -227,48 +268,26 @@ class EMQValidator:
         """
         if date is None:
             date = datetime.utcnow()
+        self._ensure_loaded()
 
         date_str = date.strftime("%Y-%m-%d")
 
-        # Filtrar eventos del día
-        day_events = [e for e in self.events if e.timestamp.strftime("%Y-%m-%d") == date_str]
-
-        if not day_events:
+        day = self.daily.get(date_str)
+        if day is None or not day.total_events:
             return {"error": "No events for date", "date": date_str}
 
-        # Calcular métricas
-        scores = [e.emq_score for e in day_events]
-        avg_score = sum(scores) / len(scores)
-
-        events_by_type = {}
-        for e in day_events:
-            events_by_type[e.event_name] = events_by_type.get(e.event_name, 0) + 1
-
-        # Eventos por nivel de EMQ
-        level_counts = {"excellent": 0, "good": 0, "fair": 0, "poor": 0, "critical": 0}
-        for score in scores:
-            level = EMQScore.from_score(score)
-            if level == EMQScore.EXCELLENT:
-                level_counts["excellent"] += 1
-            elif level == EMQScore.GOOD:
-                level_counts["good"] += 1
-            elif level == EMQScore.FAIR:
-                level_counts["fair"] += 1
-            elif level == EMQScore.POOR:
-                level_counts["poor"] += 1
-            else:
-                level_counts["critical"] += 1
+        avg_score = day.score_sum / day.total_events
 
         report = {
             "date": date_str,
-            "total_events": len(day_events),
+            "total_events": day.total_events,
             "avg_emq": round(avg_score, 2),
-            "min_emq": round(min(scores), 2),
-            "max_emq": round(max(scores), 2),
+            "min_emq": round(day.min_emq, 2),
+            "max_emq": round(day.max_emq, 2),
             "level": EMQScore.from_score(avg_score).name,
             "penalty_risk": avg_score < 6.0,
-            "events_by_type": events_by_type,
-            "level_distribution": level_counts,
+            "events_by_type": dict(day.events_by_type),
+            "level_distribution": dict(day.level_distribution),
             "recommendation": self._get_recommendation(avg_score),
         }
 
@@ -287,59 +306,172 @@ class EMQValidator:
         else:
             return "🚨 EMQ crítico. NO INICIAR ADS hasta resolver."
 
-    def _load_history(self):
-        """Carga historial de eventos desde disco"""
+    # ── Historial append-only ───────────────────────────────────
+
+    def _record(self, event: EMQEvent, persist: bool = True) -> None:
+        """Ring buffer + agregado del día (+ append al segmento del día)"""
+        self._ensure_loaded()
+        day = event.timestamp.strftime("%Y-%m-%d")
+        self.events.append(event)
+        self.daily.setdefault(day, EMQDailyAggregate()).add(event.event_name, event.emq_score)
+        if persist:
+            self._append(day, event)
+
+    def _append(self, day: str, event: EMQEvent) -> None:
+        """Escribe UNA línea JSONL al segmento del día (rota al cambiar de día)"""
         try:
-            import os
-
-            if os.path.exists(self.storage_path):
-                with open(self.storage_path, "r") as f:
-                    data = json.load(f)
-                    # Reconstruir objetos EMQEvent
-                    for e in data.get("events", [])[-1000:]:  # Mantener últimos 1000
-                        self.events.append(
-                            EMQEvent(
-                                event_name=e["event_name"],
-                                event_id=e["event_id"],
-                                timestamp=datetime.fromisoformat(e["timestamp"]),
-                                emq_score=e["emq_score"],
-                                match_keys=e["match_keys"],
-                                user_data=e["user_data"],
-                            )
-                        )
+            if self._segment is None or self._segment_day != day:
+                self._open_segment(day)
+            self._segment.write(self._serialize(event) + "\n")
+            self._segment.flush()
+            self._unsaved += 1
+            if self._unsaved >= self.AGG_FLUSH_EVERY:
+                self._save_aggregate()
         except Exception as e:
-            logger.warning(f"Could not load EMQ history: {e}")
+            logger.warning(f"Could not save EMQ history: {e}")
 
-    def _save_history(self):
-        """Guarda historial de eventos a disco"""
-        try:
-            import os
-
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-
-            # Mantener solo últimos 1000 eventos
-            recent_events = self.events[-1000:]
-
-            data = {
-                "events": [
-                    {
-                        "event_name": e.event_name,
-                        "event_id": e.event_id,
-                        "timestamp": e.timestamp.isoformat(),
-                        "emq_score": e.emq_score,
-                        "match_keys": e.match_keys,
-                        "user_data": e.user_data,
-                    }
-                    for e in recent_events
-                ]
-            }
+    def _agg_path(self, day: str) -> str:
+        return os.path.join(self.storage_path, f"{day}.agg.json")
+
+    def _save_aggregate(self) -> None:
+        """Persiste el agregado del segmento abierto y el offset que cubre"""
+        if self._segment is None or self._segment_day not in self.daily:
+            return
+        data = {"offset": self._segment.tell(), **asdict(self.daily[self._segment_day])}
+        path = self._agg_path(self._segment_day)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
+        self._unsaved = 0
+
+    def _open_segment(self, day: str) -> None:
+        self.close()
+        os.makedirs(self.storage_path, exist_ok=True)
+        self._segment = open(os.path.join(self.storage_path, f"{day}.jsonl"), "a")
+        self._segment_day = day
+        self._prune(keep=day)
+
+    def _segments(self) -> list:
+        if not os.path.isdir(self.storage_path):
+            return []
+        return sorted(f for f in os.listdir(self.storage_path) if f.endswith(".jsonl"))
+
+    def _prune(self, keep: str) -> None:
+        """Borra segmentos (y agregados) más antiguos que MAX_SEGMENTS días"""
+        segments = self._segments()
+        for name in segments[: max(0, len(segments) - self.MAX_SEGMENTS)]:
+            if name[:-6] != keep:
+                os.remove(os.path.join(self.storage_path, name))
+                if os.path.exists(self._agg_path(name[:-6])):
+                    os.remove(self._agg_path(name[:-6]))
+        for day in sorted(self.daily)[: max(0, len(self.daily) - self.MAX_SEGMENTS)]:
+            del self.daily[day]
+
+    def close(self) -> None:
+        if self._segment is not None:
+            try:
+                self._save_aggregate()
+            except OSError as e:
+                logger.warning(f"Could not save EMQ aggregate: {e}")
+            self._segment.close()
+            self._segment = None
+
+    @staticmethod
+    def _serialize(e: EMQEvent) -> str:
+        return json.dumps(
+            {
+                "event_name": e.event_name,
+                "event_id": e.event_id,
+                "timestamp": e.timestamp.isoformat(),
+                "emq_score": e.emq_score,
+                "match_keys": e.match_keys,
+                "user_data": e.user_data,
+            },
+            separators=(",", ":"),
+            default=str,
+        )
 
-            with open(self.storage_path, "w") as f:
-                json.dump(data, f, indent=2)
+    @staticmethod
+    def _deserialize(e: Dict[str, Any]) -> EMQEvent:
+        return EMQEvent(
+            event_name=e["event_name"],
+            event_id=e["event_id"],
+            timestamp=datetime.fromisoformat(e["timestamp"]),
+            emq_score=e["emq_score"],
+            match_keys=e["match_keys"],
+            user_data=e["user_data"],
+        )
 
-        except Exception as e:
-            logger.warning(f"Could not save EMQ history: {e}")
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self._loaded = True
+            self._load_history()
 
+    def _load_history(self):
+        """Agregados persistidos + líneas posteriores a su offset + cola de hoy (ring buffer)"""
+        try:
+            self._migrate_legacy()
+            segments = self._segments()[-self.MAX_SEGMENTS :]
+            for name in segments:
+                self.daily[name[:-6]] = self._load_aggregate(name[:-6])
+            if segments:
+                path = os.path.join(self.storage_path, segments[-1])
+                for line in self._tail_lines(path, self.MAX_EVENTS):
+                    try:
+                        self.events.append(self._deserialize(json.loads(line)))
+                    except (ValueError, KeyError):
+                        continue  # Línea truncada por un crash: se ignora
+        except Exception as e:
+            logger.warning(f"Could not load EMQ history: {e}")
 
-# Singleton
+    def _load_aggregate(self, day: str) -> EMQDailyAggregate:
+        """Agregado guardado; los eventos escritos después de su offset se re-suman"""
+        aggregate, offset = EMQDailyAggregate(), 0
+        segment = os.path.join(self.storage_path, f"{day}.jsonl")
+        try:
+            with open(self._agg_path(day), "r") as f:
+                data = json.load(f)
+            offset = data.pop("offset")
+            aggregate = EMQDailyAggregate(**data)
+        except (OSError, ValueError, TypeError, KeyError):
+            pass  # Sin agregado (crash, historial previo): se reconstruye del segmento
+        if offset > os.path.getsize(segment):
+            aggregate, offset = EMQDailyAggregate(), 0
+        with open(segment, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    e = json.loads(line)
+                    aggregate.add(e["event_name"], e["emq_score"])
+                except (ValueError, KeyError):
+                    continue
+        return aggregate
+
+    @staticmethod
+    def _tail_lines(path: str, count: int, block: int = 64 * 1024) -> List[bytes]:
+        """Últimas `count` líneas leyendo el archivo desde el final"""
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position, data = f.tell(), b""
+            while position > 0 and data.count(b"\n") <= count:
+                step = min(block, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        return [line for line in data.splitlines() if line][-count:]
+
+    def _migrate_legacy(self) -> None:
+        """Importa el antiguo `emq_history.json` (reescrito entero por evento) a segmentos"""
+        legacy = f"{self.storage_path}.json"
+        if not os.path.exists(legacy) or self._segments():
+            return
+        with open(legacy, "r") as f:
+            events = [self._deserialize(e) for e in json.load(f).get("events", [])]
+        for event in events:
+            self._append(event.timestamp.strftime("%Y-%m-%d"), event)
+        self.close()
+        os.replace(legacy, f"{legacy}.migrated")
+
+
+# Singleton (el historial se carga en el primer uso, no al importar)
 emq_validator = EMQValidator()
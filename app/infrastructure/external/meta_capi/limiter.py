@@ -0,0 +1,346 @@
+"""
+🚦 Adaptive Concurrency Limiter (Meta Graph API).
+
+Acota los requests en vuelo hacia Graph API con una ventana que se ajusta
+sola (AIMD + gradiente de latencia, al estilo de los limiters de Netflix /
+Envoy):
+
+- Aumento aditivo: cada respuesta sana suma `1/limit` (≈ +1 por ventana
+  completa), solo si la ventana se está usando de verdad.
+- Gradiente: si la latencia suavizada supera `latency_tolerance` veces la
+  latencia base (mínimo reciente) y al menos `min_latency_excess` en absoluto,
+  la cola está creciendo en Meta → reducción suave. Latencia y base se llevan
+  por tamaño de lote (1, 2-3, 4-7, ... eventos): un POST de 500 eventos no se
+  compara con la base de los de 1.
+- Disminución multiplicativa: 429, errores de throttling de Graph
+  (códigos 4/17/32/613/80004) o uso ≥ `usage_throttle`% en
+  `X-App-Usage` / `X-Business-Use-Case-Usage` → `limit * throttle_backoff`;
+  5xx y errores de transporte → `limit * error_backoff`. Una sola reducción
+  por `cooldown` (las respuestas del mismo pico no la encadenan).
+- `estimated_time_to_regain_access` de Meta pausa los envíos hasta entonces.
+- Con uso ≥ `usage_hold`% la ventana deja de crecer: se queda justo debajo
+  del throttling en vez de oscilar contra él.
+
+`allow_retry()` es False mientras dura el throttling: los reintentos no
+amplifican la carga que Meta ya está rechazando.
+
+Usage:
+    async with graph_limiter.slot(size=len(payload["data"])) as permit:
+        response = await client.post(url, json=payload)
+        permit.observe(response)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import httpx
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+USAGE_HEADERS = ("x-app-usage", "x-business-use-case-usage", "x-ad-account-usage")
+# Códigos de error Graph de rate limiting (app, usuario, página, BUC, CAPI)
+THROTTLE_ERROR_CODES = frozenset({4, 17, 32, 613, 80004})
+
+
+class LimiterTimeout(Exception):
+    """No se liberó un hueco en la ventana dentro del tiempo de espera."""
+
+
+def parse_usage(headers: httpx.Headers) -> Tuple[float, float]:
+    """
+    (uso máximo en %, segundos hasta recuperar acceso) de los headers de Meta.
+
+    X-App-Usage: {"call_count": 28, "total_time": 25, "total_cputime": 25}
+    X-Business-Use-Case-Usage: {"<id>": [{"type": "...", "call_count": 98, ...,
+                                          "estimated_time_to_regain_access": 2}]}
+    """
+    usage, regain_minutes = 0.0, 0.0
+    for name in USAGE_HEADERS:
+        raw = headers.get(name)
+        if not raw:
+            continue
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(data, dict):
+            continue
+        entries = [data] if "call_count" in data else [
+            entry for group in data.values() if isinstance(group, list) for entry in group
+        ]
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            for key in ("call_count", "total_time", "total_cputime", "acc_id_util_pct"):
+                value = entry.get(key)
+                if isinstance(value, (int, float)):
+                    usage = max(usage, float(value))
+            regain = entry.get("estimated_time_to_regain_access")
+            if isinstance(regain, (int, float)):
+                regain_minutes = max(regain_minutes, float(regain))
+    return usage, regain_minutes * 60
+
+
+def _is_throttle_error(response: httpx.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    if response.status_code not in (400, 403):
+        return False
+    try:
+        code = response.json().get("error", {}).get("code")
+    except (ValueError, AttributeError):
+        return False
+    return code in THROTTLE_ERROR_CODES
+
+
+def _size_bucket(size: int) -> int:
+    """Bucket de tamaño de lote (1, 2-3, 4-7, ..., 256-511 eventos)."""
+    return max(1, size).bit_length()
+
+
+def _bucket_label(bucket: int) -> str:
+    low, high = 1 << (bucket - 1), (1 << bucket) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+class _Permit:
+    __slots__ = ("_limiter", "_observed", "_size", "_start")
+
+    def __init__(self, limiter: "AdaptiveConcurrencyLimiter", size: int = 1):
+        self._limiter = limiter
+        self._size = size
+        self._start = time.monotonic()
+        self._observed = False
+
+    def observe(self, response: httpx.Response) -> None:
+        """Alimenta el limiter con la latencia, el status y los headers de uso."""
+        self._observed = True
+        self._limiter._on_response(response, time.monotonic() - self._start, self._size)
+
+    def _finish(self, exc_type) -> None:
+        try:
+            if not self._observed:
+                if exc_type is not None and issubclass(exc_type, httpx.HTTPError):
+                    # Timeout / conexión / 5xx elevado por el transporte
+                    self._limiter._on_error()
+                elif exc_type is None:
+                    self._limiter._on_success(time.monotonic() - self._start, size=self._size)
+        finally:
+            self._limiter._release()
+
+
+class AdaptiveConcurrencyLimiter:
+    """Ventana de concurrencia AIMD guiada por latencia y señales de throttling."""
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_tolerance: float = 2.0,
+        min_latency_excess: float = 0.05,
+        gradient_backoff: float = 0.9,
+        throttle_backoff: float = 0.5,
+        error_backoff: float = 0.8,
+        usage_hold: float = 75.0,
+        usage_throttle: float = 90.0,
+        cooldown: float = 1.0,
+        acquire_timeout: float = 30.0,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.min_latency_excess = min_latency_excess
+        self.gradient_backoff = gradient_backoff
+        self.throttle_backoff = throttle_backoff
+        self.error_backoff = error_backoff
+        self.usage_hold = usage_hold
+        self.usage_throttle = usage_throttle
+        self.cooldown = cooldown
+        self.acquire_timeout = acquire_timeout
+
+        self.inflight = 0
+        self.usage = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Por bucket de tamaño de lote: latencia suavizada y mínimos recientes
+        self._smoothed_latency: Dict[int, float] = {}
+        self._min_latencies: Dict[int, Deque[float]] = {}
+        self._last_decrease = float("-inf")
+        self._throttled_until = 0.0
+        self._paused_until = 0.0
+        self._stats: Dict[str, int] = {
+            "requests": 0, "throttled": 0, "errors": 0, "decreases": 0, "waits": 0,
+        }
+
+    # ── Public API ──────────────────────────────────────────────
+
+    def slot(self, timeout: Optional[float] = None, size: int = 1) -> "_Slot":
+        """`async with limiter.slot(size=n) as permit:` — espera hueco en la ventana."""
+        return _Slot(self, self.acquire_timeout if timeout is None else timeout, size)
+
+    def allow_retry(self) -> bool:
+        """False mientras Meta está limitando: los reintentos empeorarían el throttling."""
+        return time.monotonic() >= self._throttled_until
+
+    def baseline_latency(self, size: int = 1) -> Optional[float]:
+        window = self._min_latencies.get(_size_bucket(size))
+        return min(window) if window else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "waiting": len(self._waiters),
+            "usage_pct": self.usage,
+            "latency_ms": {
+                _bucket_label(b): round(v * 1000, 1) for b, v in sorted(self._smoothed_latency.items())
+            },
+            "baseline_ms": {
+                _bucket_label(b): round(min(w) * 1000, 1)
+                for b, w in sorted(self._min_latencies.items())
+            },
+            "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 1),
+        }
+
+    # ── Acquire / release ───────────────────────────────────────
+
+    async def _acquire(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            # Meta indicó cuándo se recupera el acceso: no tiene sentido insistir antes
+            if pause > timeout:
+                raise LimiterTimeout(f"Graph API paused for {pause:.0f}s")
+            await asyncio.sleep(pause)
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        self._stats["waits"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise LimiterTimeout(f"no Graph API slot within {timeout:.1f}s") from None
+        except BaseException:
+            if future.done() and not future.cancelled():
+                self._release()  # el hueco ya nos fue asignado
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+
+    def _release(self) -> None:
+        self.inflight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.inflight < int(self.limit):
+            future = self._waiters.popleft()
+            if future.done() or future.get_loop().is_closed():
+                continue
+            self.inflight += 1  # el hueco pasa directamente al waiter
+            future.set_result(None)
+
+    # ── Feedback ────────────────────────────────────────────────
+
+    def _on_response(self, response: httpx.Response, latency: float, size: int = 1) -> None:
+        self._stats["requests"] += 1
+        usage, regain = parse_usage(response.headers)
+        if usage:
+            self.usage = usage
+        now = time.monotonic()
+        if regain > 0:
+            self._paused_until = max(self._paused_until, now + regain)
+        if _is_throttle_error(response) or usage >= self.usage_throttle:
+            self._stats["throttled"] += 1
+            self._throttled_until = max(self._throttled_until, now + max(self.cooldown, regain))
+            self._decrease(self.throttle_backoff, "throttled (usage=%.0f%%)" % usage)
+        elif response.status_code >= 500:
+            self._on_error()
+        else:
+            self._on_success(latency, hold=usage >= self.usage_hold, size=size)
+
+    def _on_error(self) -> None:
+        self._stats["errors"] += 1
+        self._decrease(self.error_backoff, "upstream error")
+
+    def _on_success(self, latency: float, hold: bool = False, size: int = 1) -> None:
+        bucket = _size_bucket(size)
+        window = self._min_latencies.setdefault(bucket, deque(maxlen=100))
+        window.append(latency)
+        alpha = 0.2
+        previous = self._smoothed_latency.get(bucket)
+        smoothed = self._smoothed_latency[bucket] = (
+            latency if previous is None else (1 - alpha) * previous + alpha * latency
+        )
+        baseline = min(window)
+        threshold = max(baseline * self.latency_tolerance, baseline + self.min_latency_excess)
+        if smoothed > threshold:
+            # Gradiente: Meta encola nuestras peticiones → reducir antes del 429
+            self._decrease(self.gradient_backoff, "latency gradient")
+        elif not hold and (self.inflight >= int(self.limit) or self._waiters):
+            # Solo crece si la ventana actual está llena (evita inflarla en reposo)
+            self._set_limit(self.limit + 1.0 / self.limit)
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._stats["decreases"] += 1
+        previous = self.limit
+        self._set_limit(self.limit * factor)
+        logger.warning(
+            "🚦 Graph API limit %.1f → %.1f (%s)", previous, self.limit, reason
+        )
+
+    def _set_limit(self, value: float) -> None:
+        self.limit = min(float(self.max_limit), max(float(self.min_limit), value))
+        self._wake()
+
+
+class _Slot:
+    __slots__ = ("_limiter", "_permit", "_size", "_timeout")
+
+    def __init__(self, limiter: AdaptiveConcurrencyLimiter, timeout: float, size: int = 1):
+        self._limiter = limiter
+        self._timeout = timeout
+        self._size = size
+        self._permit: Optional[_Permit] = None
+
+    async def __aenter__(self) -> _Permit:
+        await self._limiter._acquire(self._timeout)
+        self._permit = _Permit(self._limiter, self._size)
+        return self._permit
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._permit._finish(exc_type)
+
+
+# Singleton: todas las llamadas a Graph API del proceso comparten la ventana
+graph_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=settings.meta.graph_initial_concurrency,
+    max_limit=settings.meta.graph_max_concurrency,
+)
+
+metrics.gauge("graph_api_concurrency_limit", "Adaptive Graph API in-flight window").set_function(
+    lambda: graph_limiter.limit
+)
+metrics.gauge("graph_api_inflight", "Graph API requests in flight").set_function(
+    lambda: graph_limiter.inflight
+)
+metrics.counter(
+    "graph_api_throttled_total", "Graph API responses signalling throttling"
+).set_function(lambda: graph_limiter.stats()["throttled"])
@@ -15,9 +15,60 @@ from app.application.interfaces.tracker_port import TrackerPort
 from app.domain.models.events import TrackingEvent
 from app.domain.models.visitor import Visitor
 from app.infrastructure.config import get_settings
+from app.infrastructure.external.http_clients import http_clients
+from app.infrastructure.external.meta_capi.batcher import CAPIBatchDispatcher
+from app.infrastructure.external.meta_capi.limiter import graph_limiter
 
 logger = logging.getLogger(__name__)
 
+# Batcher compartido por todos los trackers del proceso (pool HTTP de Meta)
+_shared_dispatcher: Optional[CAPIBatchDispatcher] = None
+
+
+def _new_dispatcher(sender) -> CAPIBatchDispatcher:
+    meta = get_settings().meta
+    return CAPIBatchDispatcher(
+        sender=sender,
+        max_batch_size=meta.batch_max_size,
+        max_linger_seconds=meta.batch_max_linger_ms / 1000,
+        api_version=meta.api_version,
+    )
+
+
+async def _post_batch(client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> httpx.Response:
+    """Transporte del batcher: un request por lote (circuit breaker + ventana adaptativa)."""
+    from app.infrastructure.external.circuit_breaker import DistributedCircuitBreaker
+
+    breaker = DistributedCircuitBreaker("meta_capi", failure_threshold=3)
+    # Hueco primero: un LimiterTimeout local no cuenta como fallo de Meta.
+    # El tamaño del lote separa la latencia base de lotes pequeños y grandes
+    size = len(payload.get("data") or ())
+    async with graph_limiter.slot(size=size) as permit, breaker.execute():
+        response = await client.post(url, json=payload)
+        permit.observe(response)
+        # 4xx = payload inválido (el batcher lo aísla); solo 5xx abre el circuito
+        if response.status_code >= 500:
+            response.raise_for_status()
+    return response
+
+
+async def _post_pooled(url: str, payload: Dict[str, Any]) -> httpx.Response:
+    return await _post_batch(http_clients.get("meta"), url, payload)
+
+
+def shared_dispatcher() -> CAPIBatchDispatcher:
+    """Batcher único del proceso: los eventos de todos los trackers se agrupan juntos."""
+    global _shared_dispatcher
+    if _shared_dispatcher is None:
+        _shared_dispatcher = _new_dispatcher(_post_pooled)
+    return _shared_dispatcher
+
+
+async def flush_pending() -> None:
+    """Envía los eventos pendientes del batcher compartido (shutdown)."""
+    if _shared_dispatcher is not None:
+        await _shared_dispatcher.flush_all()
+
 
 class MetaTracker(TrackerPort):
     """
@@ -29,6 +80,7 @@ class MetaTracker(TrackerPort):
     def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self._settings = get_settings()
         self._client = http_client
+        self._dispatcher: Optional[CAPIBatchDispatcher] = None
         self._enabled = (
             self._settings.meta.is_configured and not self._settings.meta.sandbox_mode
         )
@@ -39,9 +91,20 @@ class MetaTracker(TrackerPort):
 
     @property
     def _http_client(self) -> httpx.AsyncClient:
+        # Cliente inyectado (tests) o el pool compartido de Meta
+        return self._client or http_clients.get("meta")
+
+    @property
+    def _batcher(self) -> CAPIBatchDispatcher:
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=10.0)
-        return self._client
+            return shared_dispatcher()
+        # Cliente inyectado (tests): batcher propio ligado a ese cliente
+        if self._dispatcher is None:
+            self._dispatcher = _new_dispatcher(self._send_batch)
+        return self._dispatcher
+
+    async def _send_batch(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        return await _post_batch(self._http_client, url, payload)
 
     async def track(self, event: TrackingEvent, visitor: Visitor) -> bool:
         """
@@ -59,35 +122,31 @@ class MetaTracker(TrackerPort):
         try:
             from app.infrastructure.external.circuit_breaker import (
                 CircuitBreakerOpenException,
-                DistributedCircuitBreaker,
             )
 
-            breaker = DistributedCircuitBreaker("meta_capi", failure_threshold=3)
-
             payload = self._build_payload(event, visitor)
 
             try:
-                async with breaker.execute():
-                    response = await self._http_client.post(
-                        self._settings.meta.api_url,
-                        json=payload,
-                        params={"access_token": self._settings.meta.access_token},
-                    )
-                    response.raise_for_status()
+                # Se agrupa con otros eventos del mismo pixel en un solo request
+                sent = await self._batcher.submit(
+                    payload["data"][0],
+                    pixel_id=self._settings.meta.pixel_id,
+                    access_token=self._settings.meta.access_token,
+                    test_event_code=payload.get("test_event_code"),
+                    # Lead/Purchase no esperan el linger del lote
+                    urgent=event.is_conversion_event,
+                )
             except CircuitBreakerOpenException:
                 logger.warning(
                     "🛑 Meta CAPI circuit is OPEN. Failing fast to protect event loop."
                 )
                 return False
 
-            if response.status_code == 200:
+            if sent:
                 logger.info(f"✅ Meta CAPI: {event.event_name.value} sent")
-                return True
             else:
-                logger.warning(
-                    f"⚠️ Meta CAPI failed: {response.status_code} - {response.text}"
-                )
-                return False
+                logger.warning(f"⚠️ Meta CAPI rejected: {event.event_name.value}")
+            return sent
 
         except Exception as e:
             logger.exception(f"❌ Meta CAPI error: {e}")
@@ -120,6 +179,10 @@ class MetaTracker(TrackerPort):
 
         return payload
 
+    async def flush(self) -> None:
+        """Envía los eventos pendientes del batcher (shutdown)."""
+        await (self._dispatcher or shared_dispatcher()).flush_all()
+
     async def health_check(self) -> bool:
         """Verifica conectividad con Meta."""
         if not self._enabled:
@@ -0,0 +1,24 @@
+"""
+🩺 Runtime Monitoring.
+"""
+
+from app.infrastructure.monitoring import server_timing
+from app.infrastructure.monitoring.loop_monitor import LoopLagMonitor, loop_monitor
+from app.infrastructure.monitoring.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    metrics,
+)
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "LoopLagMonitor",
+    "MetricsRegistry",
+    "loop_monitor",
+    "metrics",
+    "server_timing",
+]
@@ -0,0 +1,257 @@
+"""
+🫀 Event-Loop Lag Monitor.
+
+Un heartbeat en el event loop duerme `interval` segundos y mide cuánto tarda
+de más en despertar: ese retraso es el lag del loop (tiempo en que algún
+callback lo tuvo bloqueado). Los valores van a un histograma acumulativo.
+
+Un hilo watchdog vigila el heartbeat: si el despertar se retrasa más de
+`threshold`, toma el stack del hilo del loop en ese instante
+(`sys._current_frames`) y lo atribuye al call site más interno del proyecto
+(ignorando asyncio/site-packages). Al terminar el bloqueo, su duración se
+suma a ese call site → ranking de los peores ofensores (I/O síncrono,
+CPU en el loop, locks).
+
+Usage:
+    loop_monitor.start()          # dentro del event loop (lifespan)
+    loop_monitor.snapshot()       # /admin/loop
+    await loop_monitor.stop()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+# Frames del runtime: un loop en reposo queda en selectors.select(), no es el culpable
+_IGNORED_PATHS = (
+    "site-packages",
+    os.sep + "asyncio" + os.sep,
+    "selectors.py",
+    "threading.py",
+    __file__,
+)
+
+
+@dataclass
+class BlockingSite:
+    """Call site al que se atribuyen bloqueos del loop."""
+
+    site: str
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_stack: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "site": self.site,
+            "count": self.count,
+            "total_ms": round(self.total_seconds * 1000, 1),
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "last_stack": self.last_stack,
+        }
+
+
+class LoopLagMonitor:
+    """Heartbeat de lag + watchdog que captura el stack de los bloqueos."""
+
+    # Límites superiores (ms) del histograma de lag
+    BUCKETS_MS: Tuple[float, ...] = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        max_sites: int = 50,
+        max_samples: int = 20,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_sites = max_sites
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._loop_thread: Optional[int] = None
+        self._deadline: Optional[float] = None  # despertar esperado del heartbeat
+        self._stall_site: Optional[BlockingSite] = None
+
+        self._buckets: List[int] = [0] * (len(self.BUCKETS_MS) + 1)  # +Inf al final
+        self._lag_count = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._sites: Dict[str, BlockingSite] = {}
+        self._samples: Deque[Dict[str, Any]] = deque(maxlen=max_samples)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ── Lifecycle ───────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Arranca heartbeat y watchdog en el loop actual (idempotente)."""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(
+            self._heartbeat(), name="loop-lag-heartbeat"
+        )
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        logger.info(
+            "🫀 Loop monitor started (interval=%.0fms, threshold=%.0fms)",
+            self.interval * 1000,
+            self.threshold * 1000,
+        )
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=self.interval)
+            self._watchdog = None
+        self._deadline = None
+
+    # ── Heartbeat (event loop) ──────────────────────────────────
+
+    async def _heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            self._deadline = start + self.interval
+            await asyncio.sleep(self.interval)
+            self._observe(max(0.0, time.monotonic() - self._deadline))
+
+    def _observe(self, lag: float) -> None:
+        lag_ms = lag * 1000
+        index = len(self.BUCKETS_MS)
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if lag_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self._buckets[index] += 1
+            self._lag_count += 1
+            self._lag_sum += lag
+            self._lag_max = max(self._lag_max, lag)
+            site, self._stall_site = self._stall_site, None
+            if site is not None:
+                # El bloqueo terminó: su duración completa va al call site capturado
+                site.total_seconds += lag
+                site.max_seconds = max(site.max_seconds, lag)
+                self._samples.append(
+                    {"site": site.site, "lag_ms": round(lag_ms, 1), "at": time.time()}
+                )
+
+    # ── Watchdog (hilo aparte) ──────────────────────────────────
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval / 2):
+            deadline = self._deadline
+            if deadline is None or self._stall_site is not None:
+                continue
+            if time.monotonic() - deadline > self.threshold:
+                self._capture(deadline)
+
+    def _capture(self, deadline: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)  # type: ignore[arg-type]
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        key, lines = self._blame(stack)
+        with self._lock:
+            if self._deadline != deadline:
+                return  # El loop ya despertó: el stack no es del bloqueo
+            site = self._sites.get(key)
+            if site is None:
+                if len(self._sites) >= self.max_sites:
+                    # Descarta el call site menos relevante para acotar memoria
+                    weakest = min(self._sites.values(), key=lambda s: s.total_seconds)
+                    del self._sites[weakest.site]
+                site = self._sites[key] = BlockingSite(site=key)
+            site.count += 1
+            site.last_stack = lines
+            self._stall_site = site
+        logger.warning("🐢 Event loop blocked > %.0fms at %s", self.threshold * 1000, key)
+
+    @staticmethod
+    def _blame(stack: traceback.StackSummary) -> Tuple[str, List[str]]:
+        """Call site más interno del proyecto (o el frame más interno si no hay)."""
+        culprit = stack[-1]
+        for frame in reversed(stack):
+            if frame.filename.startswith(_PROJECT_ROOT) and not any(
+                p in frame.filename for p in _IGNORED_PATHS
+            ):
+                culprit = frame
+                break
+        filename = os.path.relpath(culprit.filename, _PROJECT_ROOT)
+        if filename.startswith(".."):
+            filename = culprit.filename
+        lines = [
+            f"{os.path.relpath(f.filename, _PROJECT_ROOT)}:{f.lineno} in {f.name}"
+            for f in stack[-12:]
+        ]
+        return f"{filename}:{culprit.lineno} in {culprit.name}", lines
+
+    # ── Export ──────────────────────────────────────────────────
+
+    def histogram(self) -> Dict[str, Any]:
+        """Histograma acumulativo (estilo Prometheus: cada bucket incluye los menores)."""
+        with self._lock:
+            cumulative, total = [], 0
+            for bound, count in zip((*self.BUCKETS_MS, "+Inf"), self._buckets, strict=True):
+                total += count
+                cumulative.append((bound, total))
+            return {
+                "buckets_ms": cumulative,
+                "count": self._lag_count,
+                "sum_seconds": round(self._lag_sum, 6),
+                "max_ms": round(self._lag_max * 1000, 1),
+            }
+
+    def snapshot(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            sites = sorted(self._sites.values(), key=lambda s: s.total_seconds, reverse=True)
+            blocking = [s.as_dict() for s in sites[:top]]
+            samples = list(self._samples)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag": self.histogram(),
+            "top_blocking_sites": blocking,
+            "recent_stalls": samples,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets = [0] * (len(self.BUCKETS_MS) + 1)
+            self._lag_count, self._lag_sum, self._lag_max = 0, 0.0, 0.0
+            self._sites.clear()
+            self._samples.clear()
+
+
+# Singleton
+loop_monitor = LoopLagMonitor()
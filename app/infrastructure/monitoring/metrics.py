@@ -0,0 +1,197 @@
+"""
+📈 Metrics Registry (Prometheus text exposition).
+
+Contadores, gauges e histogramas de buckets fijos, sin dependencias. Cada
+métrica guarda sus series en un dict indexado por la tupla de valores de
+labels: registrar una observación es un lookup + una suma (sin locks; en el
+peor caso un incremento concurrente desde un thread se pierde, aceptable
+para métricas).
+
+Counters y gauges pueden ser "pull": `set_function(fn)` se evalúa solo al
+exponer `/metrics` (profundidad de colas, contadores que un componente ya
+lleva en su `stats()`) sin coste extra en el hot path.
+
+Usage:
+    from app.infrastructure.monitoring import metrics
+
+    REQUESTS = metrics.counter("http_requests_total", "HTTP requests", ("method", "status"))
+    REQUESTS.inc("GET", "200")
+    LATENCY = metrics.histogram("db_acquire_seconds", "Pool acquire time", ("backend",))
+    LATENCY.observe(0.003, "postgres")
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+GaugeValue = Union[float, Dict[LabelValues, float]]
+
+# Latencias de red/BD: de 1ms a 10s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(self.labelnames, values, strict=False)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+
+class _ValueMetric(_Metric):
+    """Una serie escalar por combinación de labels (counter / gauge)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], GaugeValue]] = None
+
+    def set_function(self, fn: Callable[[], GaugeValue]):
+        """Valor calculado al exponer: float, o {label_values: float} si hay labels."""
+        self._function = fn
+        return self
+
+    def value(self, *labels: str) -> float:
+        return self._collect().get(labels, 0.0)
+
+    def _collect(self) -> Dict[LabelValues, float]:
+        if self._function is None:
+            return dict(self._values)
+        try:
+            result = self._function()
+        except Exception as e:
+            logger.debug("Metric %s collection failed: %s", self.name, e)
+            return {}
+        return result if isinstance(result, dict) else {(): float(result)}
+
+    def _samples(self) -> Iterable[str]:
+        for labels, value in self._collect().items():
+            yield f"{self.name}{self._labels(labels)} {_fmt(value)}"
+
+
+class Counter(_ValueMetric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_ValueMetric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [conteos por bucket (+Inf al final)..., sum, count]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 3)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(series[-1]) if series else 0
+
+    def _samples(self) -> Iterable[str]:
+        for labels, series in list(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), series, strict=False):
+                cumulative += count
+                le = f'le="{_fmt(bound)}"'
+                yield f"{self.name}_bucket{self._labels(labels, le)} {_fmt(cumulative)}"
+            yield f"{self.name}_sum{self._labels(labels)} {_fmt(series[-2])}"
+            yield f"{self.name}_count{self._labels(labels)} {_fmt(series[-1])}"
+
+
+class MetricsRegistry:
+    """Registro de métricas del proceso; `render()` produce el formato de texto 0.0.4."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kw):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, labelnames, **kw)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric '{name}' already registered with a different shape")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton
+metrics = MetricsRegistry()
@@ -0,0 +1,113 @@
+"""
+⏱️ Server-Timing (per-request phase breakdown).
+
+Un `ServerTimer` vive en un ContextVar durante el request (solo si el
+middleware lo activó: muestreo u opt-in por header). Cualquier capa acumula
+tiempo en una fase sin recibir el timer como argumento:
+
+    with server_timing.phase("content"):
+        services = await ContentManager.get_many(...)
+
+    server_timing.record("db", elapsed)   # tiempos ya medidos (pool, Redis)
+
+Sin timer activo, `phase()` devuelve un context manager no-op compartido y
+`record()` es un ContextVar.get(): coste despreciable en el tráfico no
+muestreado. El header resultante:
+
+    Server-Timing: content;dur=12.3, redis;dur=10.9;desc="2 calls", app;dur=25.0
+"""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional
+
+
+class ServerTimer:
+    """Duraciones acumuladas por fase para un request."""
+
+    __slots__ = ("_phases",)
+
+    def __init__(self) -> None:
+        # fase -> [segundos acumulados, nº de llamadas] (orden de primera aparición)
+        self._phases: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self._phases.get(name)
+        if entry is None:
+            self._phases[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def phases(self) -> Dict[str, float]:
+        return {name: entry[0] for name, entry in self._phases.items()}
+
+    def header_value(self, total: Optional[float] = None) -> str:
+        parts = []
+        for name, (seconds, calls) in self._phases.items():
+            metric = f"{name};dur={seconds * 1000:.1f}"
+            if calls > 1:
+                metric += f';desc="{int(calls)} calls"'
+            parts.append(metric)
+        if total is not None:
+            parts.append(f"app;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_timer: ContextVar[Optional[ServerTimer]] = ContextVar("server_timer", default=None)
+
+
+class _Phase:
+    __slots__ = ("_name", "_start", "_timer")
+
+    def __init__(self, timer: ServerTimer, name: str):
+        self._timer = timer
+        self._name = name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self._timer.add(self._name, time.perf_counter() - self._start)
+
+
+class _NoopPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NOOP = _NoopPhase()
+
+
+def phase(name: str):
+    """Context manager que suma su duración a la fase `name` del request actual."""
+    timer = _current_timer.get()
+    return _NOOP if timer is None else _Phase(timer, name)
+
+
+def record(name: str, seconds: float) -> None:
+    """Suma una duración ya medida a la fase `name` (no-op sin timer activo)."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+def current() -> Optional[ServerTimer]:
+    return _current_timer.get()
+
+
+def activate() -> Token:
+    """Activa un timer para el contexto actual; devolver el token a `deactivate`."""
+    return _current_timer.set(ServerTimer())
+
+
+def deactivate(token: Token) -> None:
+    _current_timer.reset(token)
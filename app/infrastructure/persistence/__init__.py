@@ -7,9 +7,11 @@ Implementaciones de los repositorios del dominio.
 from app.infrastructure.persistence.repositories.event_repository import PostgreSQLEventRepository
 from app.infrastructure.persistence.repositories.visitor_repository import VisitorRepository as PostgreSQLVisitorRepository
 from app.infrastructure.persistence.repositories.lead_repository import LeadRepository as PostgreSQLLeadRepository
+from app.infrastructure.persistence.unit_of_work import DatabaseUnitOfWork
 
 __all__ = [
     "PostgreSQLEventRepository",
     "PostgreSQLVisitorRepository",
     "PostgreSQLLeadRepository",
+    "DatabaseUnitOfWork",
 ]
@@ -2,31 +2,125 @@
 🗄️ Database Connection Management.
 
 Serverless-optimized connection handling.
+
+PostgreSQL usa un pool async nativo (psycopg3 + psycopg_pool) para no
+bloquear el event loop. SQLite (desarrollo) se expone con la misma API async.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import sqlite3
+import time
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Optional
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Iterable, Optional
 
 from app.infrastructure.config import get_settings
+from app.infrastructure.monitoring import server_timing
+from app.infrastructure.monitoring.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+DB_ACQUIRE = metrics.histogram(
+    "db_connection_acquire_seconds", "Time to obtain a DB connection", ("backend",)
+)
+DB_HOLD = metrics.histogram(
+    "db_connection_hold_seconds", "Time a DB connection is held (queries + commit)", ("backend",)
+)
+
+# Canal NOTIFY emitido por el trigger de outbox_events
+OUTBOX_CHANNEL = "outbox_events"
+
+
+@dataclass
+class _TransactionScope:
+    """Conexión compartida por las operaciones dentro de db.transaction()."""
+
+    conn: Any
+    active: bool = True
+
+
+# Transacción ambiente del contexto actual (request / comando)
+_current_tx: ContextVar[Optional[_TransactionScope]] = ContextVar(
+    "db_current_tx", default=None
+)
+
+
+class AsyncSQLiteCursor:
+    """Cursor SQLite con la misma interfaz awaitable que psycopg AsyncCursor."""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    async def execute(self, query: str, params: Iterable[Any] = ()) -> "AsyncSQLiteCursor":
+        self._cursor.execute(query, tuple(params))
+        return self
+
+    async def executemany(self, query: str, seq_of_params: Iterable[Iterable[Any]]) -> None:
+        self._cursor.executemany(query, [tuple(p) for p in seq_of_params])
+
+    async def fetchone(self) -> Optional[tuple]:
+        return self._cursor.fetchone()
+
+    async def fetchall(self) -> list:
+        return self._cursor.fetchall()
+
+    async def close(self) -> None:
+        self._cursor.close()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> Optional[int]:
+        return self._cursor.lastrowid
+
+
+class AsyncSQLiteConnection:
+    """Adapter de sqlite3.Connection con cursores async (solo desarrollo/tests)."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def cursor(self) -> AsyncSQLiteCursor:
+        return AsyncSQLiteCursor(self._conn.cursor())
+
+    async def execute(self, query: str, params: Iterable[Any] = ()) -> AsyncSQLiteCursor:
+        cur = self.cursor()
+        await cur.execute(query, params)
+        return cur
+
+    async def commit(self) -> None:
+        self._conn.commit()
+
+    async def rollback(self) -> None:
+        self._conn.rollback()
+
 
 class Database:
     """
     Gestor de conexiones a base de datos.
 
     Soporta PostgreSQL (producción) y SQLite (desarrollo).
-    Optimizado para serverless (sin connection pooling global).
+    PostgreSQL: pool async acotado, abierto de forma lazy en la primera
+    conexión y compatible con el transaction pooler de PgBouncer (6543).
     """
 
     def __init__(self, settings: Optional[Any] = None):
         self._settings = settings or get_settings()
         self._backend = self._detect_backend()
+        self._pool: Optional[Any] = None
+        self._pool_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool_lock: Optional[asyncio.Lock] = None
 
     def _detect_backend(self) -> str:
         """Detecta qué backend usar."""
@@ -53,49 +147,164 @@ class Database:
         """
         Context manager para conexiones.
 
+        Commit al salir sin errores, rollback si hay excepción.
+
         Yields:
-            Connection object (psycopg2 o sqlite3)
+            Connection object (psycopg AsyncConnection o AsyncSQLiteConnection)
+            cuyos cursores se usan con `await cur.execute(...)`.
         """
-        if self._backend == "postgres":
-            async with self._postgres_connection() as conn:
-                yield conn
-        else:
-            async with self._sqlite_connection() as conn:
+        scope = _current_tx.get()
+        if scope is not None and scope.active:
+            # Dentro de db.transaction(): reutiliza la conexión; el scope
+            # externo decide commit/rollback.
+            yield scope.conn
+            return
+
+        start = time.perf_counter()
+        connection = (
+            self._postgres_connection() if self._backend == "postgres" else self._sqlite_connection()
+        )
+        async with connection as conn:
+            acquired = time.perf_counter()
+            DB_ACQUIRE.observe(acquired - start, self._backend)
+            try:
                 yield conn
+            finally:
+                # Tiempo con la conexión en uso (queries + commit)
+                finished = time.perf_counter()
+                DB_HOLD.observe(finished - acquired, self._backend)
+                server_timing.record("db", finished - start)
 
     @asynccontextmanager
-    async def _postgres_connection(self) -> AsyncGenerator:
-        """Conexión PostgreSQL."""
-        import psycopg2
-        import psycopg2.extras
+    async def transaction(self) -> AsyncGenerator:
+        """
+        Scope transaccional (Unit of Work).
+
+        Toda llamada a `db.connection()` dentro del bloque (en la misma tarea)
+        usa la misma conexión y transacción. Commit al salir, rollback si hay
+        excepción. Reentrante: un `transaction()` anidado se une al externo.
+
+        En PostgreSQL corre en pipeline mode: las escrituras consecutivas se
+        envían juntas y se sincronizan en el commit (un solo round-trip).
+        """
+        scope = _current_tx.get()
+        if scope is not None and scope.active:
+            yield scope.conn
+            return
+
+        async with self.connection() as conn:
+            scope = _TransactionScope(conn)
+            token = _current_tx.set(scope)
+            try:
+                if self._backend == "postgres":
+                    async with conn.pipeline():
+                        yield conn
+                else:
+                    yield conn
+            finally:
+                # Tareas creadas dentro del bloque heredan el contexto:
+                # desactivar evita que reutilicen la conexión ya devuelta.
+                scope.active = False
+                _current_tx.reset(token)
+
+    @property
+    def in_transaction(self) -> bool:
+        """True si hay un db.transaction() activo en el contexto actual."""
+        scope = _current_tx.get()
+        return scope is not None and scope.active
+
+    def _postgres_dsn(self, url: Optional[str] = None) -> str:
+        # Clean URL (strip query params like ?pgbouncer=true, unknown to libpq)
+        url = url or self._settings.db.url or ""
+        if "?" in url:
+            url = url.split("?")[0]
+        return url
+
+    @asynccontextmanager
+    async def listener(self, channel: str = OUTBOX_CHANNEL) -> AsyncGenerator:
+        """
+        Conexión dedicada suscrita a LISTEN (fuera del pool, autocommit).
 
-        conn = None
+        LISTEN necesita una sesión persistente: el transaction pooler de
+        PgBouncer no la soporta, por eso se usa DATABASE_DIRECT_URL si existe.
+        """
+        import psycopg
+
+        conn = await psycopg.AsyncConnection.connect(
+            self._postgres_dsn(self._settings.db.direct_url),
+            autocommit=True,
+            sslmode="require",
+            connect_timeout=5,
+            prepare_threshold=None,
+        )
         try:
-            # Clean URL (strip all query params for psycopg2 compatibility)
-            url = self._settings.db.url
-            if url and "?" in url:
-                url = url.split("?")[0]
-
-            conn = psycopg2.connect(
-                url,
-                connect_timeout=5,
-                sslmode="require",
-            )
+            await conn.execute(f"LISTEN {channel}")
             yield conn
-            conn.commit()
-        except Exception:
-            if conn:
-                conn.rollback()
-            raise
         finally:
-            if conn:
-                conn.close()
+            await conn.close()
+
+    async def _get_pool(self):
+        """Crea (lazy) el pool async ligado al event loop actual."""
+        loop = asyncio.get_running_loop()
+        if self._pool is not None and self._pool_loop is loop:
+            return self._pool
+
+        if self._pool_lock is None or self._pool_loop is not loop:
+            self._pool_lock = asyncio.Lock()
+            self._pool = None
+            self._pool_loop = loop
+
+        async with self._pool_lock:
+            if self._pool is None:
+                from psycopg_pool import AsyncConnectionPool
+
+                cfg = self._settings.db
+                pool = AsyncConnectionPool(
+                    self._postgres_dsn(),
+                    min_size=cfg.pool_min_size,
+                    max_size=cfg.pool_size,
+                    timeout=cfg.pool_timeout,
+                    max_idle=cfg.pool_max_idle,
+                    kwargs={
+                        "sslmode": "require",
+                        "connect_timeout": 5,
+                        # PgBouncer (transaction mode) no comparte prepared
+                        # statements entre backends: desactivarlos.
+                        "prepare_threshold": None,
+                    },
+                    open=False,
+                    name="app-db",
+                )
+                # wait=False: el warm-up de min_size corre en background
+                await pool.open(wait=False)
+                self._pool = pool
+                logger.info(
+                    "🏊 Postgres pool opened (min=%d, max=%d)",
+                    cfg.pool_min_size,
+                    cfg.pool_size,
+                )
+        return self._pool
 
     @asynccontextmanager
-    async def _sqlite_connection(self) -> AsyncGenerator:
-        """Conexión SQLite (fallback)."""
-        import sqlite3
+    async def _postgres_connection(self) -> AsyncGenerator:
+        """Conexión PostgreSQL desde el pool (commit/rollback automático)."""
+        pool = await self._get_pool()
+        async with pool.connection() as conn:
+            yield conn
+
+    async def close(self) -> None:
+        """Cierra el pool (shutdown)."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+            logger.info("🏊 Postgres pool closed")
+
+    def pool_stats(self) -> dict:
+        """Estadísticas del pool (vacío si no está abierto o en SQLite)."""
+        return self._pool.get_stats() if self._pool is not None else {}
 
+    @staticmethod
+    def _sqlite_path() -> str:
         db_path = os.path.join(
             os.path.dirname(
                 os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -105,11 +314,15 @@ class Database:
         )
         if not os.path.exists(os.path.dirname(db_path)):
             os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        return db_path
 
-        conn = sqlite3.connect(db_path)
+    @asynccontextmanager
+    async def _sqlite_connection(self) -> AsyncGenerator:
+        """Conexión SQLite (fallback)."""
+        conn = sqlite3.connect(self._sqlite_path())
         conn.execute("PRAGMA foreign_keys = ON")
         try:
-            yield conn
+            yield AsyncSQLiteConnection(conn)
             conn.commit()
         except Exception:
             conn.rollback()
@@ -222,9 +435,35 @@ class Database:
                 status TEXT DEFAULT 'pending',
                 error_msg TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                processed_at TIMESTAMP
+                processed_at TIMESTAMP,
+                claim_token TEXT,
+                locked_until TIMESTAMP
             )
             """,
+            "CREATE INDEX IF NOT EXISTS idx_outbox_status_created ON outbox_events (status, created_at)",
+        ]
+
+        # 🔒 Migraciones de columnas (tablas creadas antes del relay por claims)
+        migrations = [
+            "ALTER TABLE outbox_events ADD COLUMN IF NOT EXISTS claim_token TEXT",
+            "ALTER TABLE outbox_events ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP",
+        ]
+
+        # 📣 NOTIFY en cada insert del outbox (despierta al OutboxDispatcher)
+        postgres_only = [
+            f"""
+            CREATE OR REPLACE FUNCTION notify_outbox_event() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{OUTBOX_CHANNEL}', NEW.id);
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE TRIGGER outbox_events_notify
+            AFTER INSERT ON outbox_events
+            FOR EACH ROW EXECUTE FUNCTION notify_outbox_event()
+            """,
         ]
 
         if self._backend == "sqlite":
@@ -238,45 +477,40 @@ class Database:
                 .replace("ON CONFLICT", "-- ON CONFLICT")  # Simple fix for init
                 for q in queries
             ]
+            # SQLite no soporta IF NOT EXISTS en ADD COLUMN: se toleran duplicados
+            migrations = [
+                m.replace("ADD COLUMN IF NOT EXISTS", "ADD COLUMN") for m in migrations
+            ]
 
         try:
             if self._backend == "postgres":
-                import psycopg2
-
-                url = self._settings.db.url
-                if url and "?" in url:
-                    url = url.split("?")[0]
-
-                conn = psycopg2.connect(url, sslmode="require")
-                cur = conn.cursor()
-                try:
-                    cur.execute("SELECT 1")
-                    result = cur.fetchone()
-                    if not result or result[0] != 1:
-                        raise ValueError(
-                            "❌ Database SELECT 1 returned unexpected result"
-                        )
-                    for q in queries:
-                        cur.execute(q)
-                    conn.commit()
-                finally:
-                    cur.close()
-                    conn.close()
+                import psycopg
+
+                with psycopg.connect(
+                    self._postgres_dsn(),
+                    sslmode="require",
+                    prepare_threshold=None,
+                ) as conn:
+                    with conn.cursor() as cur:
+                        cur.execute("SELECT 1")
+                        result = cur.fetchone()
+                        if not result or result[0] != 1:
+                            raise ValueError(
+                                "❌ Database SELECT 1 returned unexpected result"
+                            )
+                        for q in queries:
+                            cur.execute(q)
+                        for m in migrations + postgres_only:
+                            cur.execute(m)
             else:
-                import sqlite3
-
-                db_path = os.path.join(
-                    os.path.dirname(
-                        os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-                    ),
-                    "database",
-                    "local.db",
-                )
-                if not os.path.exists(os.path.dirname(db_path)):
-                    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-                conn = sqlite3.connect(db_path)
+                conn = sqlite3.connect(self._sqlite_path())
                 for q in queries:
                     conn.execute(q)
+                for m in migrations:
+                    try:
+                        conn.execute(m)
+                    except sqlite3.OperationalError:
+                        pass  # duplicate column name
                 conn.commit()
                 conn.close()
             logger.info("✅ Database tables initialized successfully")
@@ -10,6 +10,7 @@ import logging
 import time
 from typing import Any, Dict, Optional
 
+from app.infrastructure.cache.local_dedup import local_dedup
 from app.infrastructure.cache.redis_provider import redis_provider
 from app.infrastructure.config.settings import settings
 
@@ -21,7 +22,7 @@ class DeduplicationService:
     Redis-backed deduplication and visitor caching.
     
     Key prefixes:
-    - evt:{event_id}  — Event dedup (SETNX with TTL)
+    - evt:{event_id}  — Event dedup (SETNX with TTL, local tier first)
     - vis:{external_id} — Visitor cache
     """
 
@@ -33,14 +34,20 @@ class DeduplicationService:
         if not event_id:
             return True
 
+        key = f"evt:{event_id}"
+        if local_dedup.seen(key):
+            logger.info(f"🛑 Duplicate detected (local): {key}")
+            return False
+
         redis = redis_provider.sync_client
         if not redis:
-            return True  # No Redis → process everything
+            local_dedup.remember(key, ttl)
+            return True  # No Redis → local tier only
 
-        key = f"evt:{event_id}"
         try:
             val = str(int(time.time()))
             result = redis.set(key, val, ex=ttl, nx=True)
+            local_dedup.remember(key, ttl)
             if result:
                 return True
             else:
@@ -48,6 +55,7 @@ class DeduplicationService:
                 return False
         except Exception as e:
             logger.warning(f"⚠️ Redis dedup error: {e}")
+            local_dedup.remember(key, ttl)
             return True  # Fail-open
 
     async def try_consume_event_async(self, event_id: str, event_name: str = "event", ttl: int = 86400) -> bool:
@@ -58,14 +66,20 @@ class DeduplicationService:
         if not event_id:
             return True
 
+        key = f"evt:{event_id}"
+        if local_dedup.seen(key):
+            logger.info(f"🛑 Duplicate detected (local): {key}")
+            return False
+
         redis = redis_provider.async_client
         if not redis:
+            local_dedup.remember(key, ttl)
             return True
 
-        key = f"evt:{event_id}"
         try:
             val = str(int(time.time()))
             result = await redis.set(key, val, ex=ttl, nx=True)
+            local_dedup.remember(key, ttl)
             if result:
                 return True
             else:
@@ -73,8 +87,13 @@ class DeduplicationService:
                 return False
         except Exception as e:
             logger.warning(f"⚠️ Redis async dedup error: {e}")
+            local_dedup.remember(key, ttl)
             return True
 
+    def dedup_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the local tier (Redis is only hit on misses)."""
+        return local_dedup.stats()
+
     def cache_visitor(self, external_id: str, data: dict, ttl: int = 86400):
         """Cache resolved visitor data for subsequent requests."""
         redis = redis_provider.sync_client
@@ -12,9 +12,10 @@ Penalizaciones de Meta por comportamiento sospechoso:
 
 import logging
 import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -78,13 +79,62 @@ class EventRateLimiter:
         ),
     }
 
-    def __init__(self, redis_client=None):
+    # Evalúa duplicado → contador → cooldown y registra el evento de forma
+    # atómica en un solo round trip (EVAL). Mismas claves y TTLs que antes.
+    # KEYS: rate_key, last_event_key, dedup_key ("" si no aplica)
+    # ARGV: now, max_events, window, cooldown, require_unique, dedup_ttl
+    # Devuelve {code, count, cooldown_remaining_ms}
+    #   code: 0=OK, 1=duplicado, 2=límite excedido, 3=cooldown
+    RATE_LIMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local max_events = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cooldown = tonumber(ARGV[4])
+local require_unique = ARGV[5] == '1'
+local dedup_ttl = tonumber(ARGV[6])
+
+if require_unique and KEYS[3] ~= '' and redis.call('EXISTS', KEYS[3]) == 1 then
+  return {1, 0, 0}
+end
+
+local count = tonumber(redis.call('GET', KEYS[1]) or '0')
+if count >= max_events then
+  return {2, count, 0}
+end
+
+if cooldown > 0 then
+  local last = tonumber(redis.call('GET', KEYS[2]) or '0')
+  if last > 0 and (now - last) < cooldown then
+    return {3, count, math.floor((cooldown - (now - last)) * 1000)}
+  end
+end
+
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], window)
+redis.call('SETEX', KEYS[2], 3600, tostring(now))
+if require_unique and KEYS[3] ~= '' then
+  redis.call('SETEX', KEYS[3], dedup_ttl, '1')
+end
+return {0, count + 1, 0}
+"""
+
+    DEDUP_TTL_SECONDS = 86400
+
+    def __init__(self, redis_client=None, async_redis_client=None):
         from app.infrastructure.cache.redis_provider import redis_provider
 
+        self._provider = redis_provider
         self.redis = redis_client or redis_provider.sync_client
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}  # Fallback si no hay Redis
+        self._async_redis = async_redis_client
+        # Fallback local (sin Redis): ventana deslizante por clave
+        self.windows: Dict[str, Deque[float]] = {}
+        self.dedup_ids: Dict[str, float] = {}  # dedup_key -> expires_at
         self.blocked_ips: Dict[str, float] = {}  # IPs temporalmente bloqueadas
 
+    @property
+    def async_redis(self):
+        return self._async_redis or self._provider.async_client
+
     def is_allowed(
         self,
         user_id: str,
@@ -93,145 +143,141 @@ class EventRateLimiter:
         client_ip: Optional[str] = None,
     ) -> Tuple[bool, str]:
         """
-        Verifica si se permite enviar un evento.
+        Verifica si se permite enviar un evento (sync, un solo round trip).
 
         Returns:
             (allowed: bool, reason: str)
         """
-        # Verificar IP bloqueada
         if client_ip and self._is_ip_blocked(client_ip):
             return False, f"IP {client_ip} temporarily blocked for suspicious activity"
 
-        # Obtener configuración
-        config = self.DEFAULT_LIMITS.get(event_type, self.DEFAULT_LIMITS["default"])
+        config, keys, args = self._prepare(user_id, event_type, event_id)
+        result = None
+        if self.redis:
+            try:
+                result = self.redis.eval(self.RATE_LIMIT_SCRIPT, keys, args)
+            except Exception as e:
+                logger.warning(f"⚠️ Rate limiter Redis error, using local window: {e}")
+        if result is None:
+            result = self._evaluate_local(config, keys)
+        return self._decide(result, config, event_type, event_id, client_ip)
+
+    async def is_allowed_async(
+        self,
+        user_id: str,
+        event_type: str,
+        event_id: Optional[str] = None,
+        client_ip: Optional[str] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Verifica si se permite enviar un evento (async, un solo round trip).
 
-        # Key única por usuario y tipo de evento
-        rate_key = f"rate_limit:{user_id}:{event_type}"
+        Returns:
+            (allowed: bool, reason: str)
+        """
+        if client_ip and self._is_ip_blocked(client_ip):
+            return False, f"IP {client_ip} temporarily blocked for suspicious activity"
 
-        # Verificar duplicado si es requerido
-        if config.require_unique and event_id:
-            if self._is_duplicate(user_id, event_type, event_id):
-                return False, f"Duplicate event_id: {event_id}"
+        config, keys, args = self._prepare(user_id, event_type, event_id)
+        result = None
+        redis = self.async_redis
+        if redis:
+            try:
+                result = await redis.eval(self.RATE_LIMIT_SCRIPT, keys, args)
+            except Exception as e:
+                logger.warning(f"⚠️ Rate limiter Redis error, using local window: {e}")
+        if result is None:
+            result = self._evaluate_local(config, keys)
+        return self._decide(result, config, event_type, event_id, client_ip)
+
+    def _prepare(
+        self, user_id: str, event_type: str, event_id: Optional[str]
+    ) -> Tuple[RateLimitConfig, List[str], List[str]]:
+        """Resuelve configuración, claves y argumentos del script."""
+        config = self.DEFAULT_LIMITS.get(event_type, self.DEFAULT_LIMITS["default"])
+        unique = bool(config.require_unique and event_id)
+        keys = [
+            f"rate_limit:{user_id}:{event_type}",
+            f"last_event:{user_id}:{event_type}",
+            f"event_dedup:{user_id}:{event_type}:{event_id}" if unique else "",
+        ]
+        args = [
+            str(time.time()),
+            str(config.max_events),
+            str(config.window_seconds),
+            str(config.cooldown_seconds),
+            "1" if unique else "0",
+            str(self.DEDUP_TTL_SECONDS),
+        ]
+        return config, keys, args
 
-        # Verificar rate limit
-        current_count = self._get_count(rate_key, config.window_seconds)
+    def _decide(
+        self,
+        result: List[Any],
+        config: RateLimitConfig,
+        event_type: str,
+        event_id: Optional[str],
+        client_ip: Optional[str],
+    ) -> Tuple[bool, str]:
+        """Traduce el resultado del script a (allowed, reason)."""
+        code, count, cooldown_ms = (int(x) for x in result)
 
-        if current_count >= config.max_events:
+        if code == 1:
+            return False, f"Duplicate event_id: {event_id}"
+
+        if code == 2:
             # Bloquear IP si excede mucho (posible bot)
-            if current_count >= config.max_events * 2 and client_ip:
+            if count >= config.max_events * 2 and client_ip:
                 self._block_ip(client_ip)
                 logger.warning(
                     f"🚫 IP {client_ip} blocked for event flooding ({event_type})"
                 )
-
             return (
                 False,
                 f"Rate limit exceeded: {config.max_events} {event_type} per {config.window_seconds}s",
             )
 
-        # Verificar cooldown
-        last_event_key = f"last_event:{user_id}:{event_type}"
-        last_time = self._get_timestamp(last_event_key)
+        if code == 3:
+            return (
+                False,
+                f"Cooldown active: wait {cooldown_ms / 1000:.0f}s before next {event_type}",
+            )
 
-        if last_time and config.cooldown_seconds > 0:
-            elapsed = time.time() - last_time
-            if elapsed < config.cooldown_seconds:
-                remaining = config.cooldown_seconds - elapsed
-                return (
-                    False,
-                    f"Cooldown active: wait {remaining:.0f}s before next {event_type}",
-                )
+        return True, "OK"
 
-        # Incrementar contador y actualizar timestamp
-        self._increment_count(rate_key, config.window_seconds)
-        self._set_timestamp(last_event_key)
+    def _evaluate_local(self, config: RateLimitConfig, keys: List[str]) -> List[int]:
+        """Mismo contrato que RATE_LIMIT_SCRIPT sobre una ventana deslizante en memoria."""
+        rate_key, _last_key, dedup_key = keys
+        now = time.time()
 
-        # Registrar event ID si es necesario
-        if config.require_unique and event_id:
-            self._register_event_id(user_id, event_type, event_id)
+        if dedup_key:
+            expires_at = self.dedup_ids.get(dedup_key)
+            if expires_at and expires_at > now:
+                return [1, 0, 0]
 
-        return True, "OK"
+        window = self.windows.setdefault(rate_key, deque())
+        while window and window[0] <= now - config.window_seconds:
+            window.popleft()
 
-    def _is_duplicate(self, user_id: str, event_type: str, event_id: str) -> bool:
-        """Verifica si un event_id ya fue usado"""
-        dedup_key = f"event_dedup:{user_id}:{event_type}:{event_id}"
+        count = len(window)
+        if count >= config.max_events:
+            return [2, count, 0]
 
-        if self.redis:
-            return self.redis.exists(dedup_key)
-        else:
-            # Memoria local con expiración
-            now = time.time()
-            # Limpiar entradas viejas
-            expired_keys = [
-                key
-                for key in self.memory_cache
-                if self.memory_cache[key].get("expires", 0) < now
-            ]
-            for key in expired_keys:
-                self.memory_cache.pop(key, None)
-
-            return dedup_key in self.memory_cache
-
-    def _register_event_id(self, user_id: str, event_type: str, event_id: str):
-        """Registra un event_id para deduplicación"""
-        dedup_key = f"event_dedup:{user_id}:{event_type}:{event_id}"
-        ttl = 86400  # 24 horas
+        if config.cooldown_seconds > 0 and window:
+            elapsed = now - window[-1]
+            if elapsed < config.cooldown_seconds:
+                return [3, count, int((config.cooldown_seconds - elapsed) * 1000)]
 
-        if self.redis:
-            self.redis.setex(dedup_key, ttl, "1")
-        else:
-            self.memory_cache[dedup_key] = {"value": "1", "expires": time.time() + ttl}
+        window.append(now)
+        if dedup_key:
+            self._prune_dedup(now)
+            self.dedup_ids[dedup_key] = now + self.DEDUP_TTL_SECONDS
+        return [0, count + 1, 0]
 
-    def _get_count(self, key: str, window: int) -> int:
-        """Obtiene contador actual"""
-        if self.redis:
-            count = self.redis.get(key)
-            return int(count) if count else 0
-        else:
-            entry = self.memory_cache.get(key)
-            if not entry:
-                return 0
-            if entry.get("expires", 0) < time.time():
-                self.memory_cache.pop(key, None)
-                return 0
-            return entry.get("count", 0)
-
-    def _increment_count(self, key: str, window: int):
-        """Incrementa contador — Upstash REST compatible (no pipeline)."""
-        if self.redis:
-            # Individual calls instead of pipeline() for Upstash REST compatibility
-            self.redis.incr(key)
-            self.redis.expire(key, window)
-        else:
-            entry = self.memory_cache.get(key)
-            if not entry or entry.get("expires", 0) < time.time():
-                self.memory_cache[key] = {
-                    "count": 1,
-                    "expires": time.time() + window,
-                }
-            else:
-                if entry is not None:
-                    current_count: int = int(entry.get("count", 0))
-                    entry["count"] = current_count + 1
-
-    def _get_timestamp(self, key: str) -> Optional[float]:
-        """Obtiene timestamp del último evento"""
-        if self.redis:
-            ts = self.redis.get(key)
-            return float(ts) if ts else None
-        else:
-            entry = self.memory_cache.get(key)
-            return entry.get("timestamp") if entry else None
-
-    def _set_timestamp(self, key: str):
-        """Actualiza timestamp"""
-        if self.redis:
-            self.redis.setex(key, 3600, str(time.time()))  # TTL 1 hora
-        else:
-            self.memory_cache[key] = {
-                "timestamp": time.time(),
-                "expires": time.time() + 3600,
-            }
+    def _prune_dedup(self, now: float) -> None:
+        expired = [k for k, exp in self.dedup_ids.items() if exp <= now]
+        for key in expired:
+            self.dedup_ids.pop(key, None)
 
     def _is_ip_blocked(self, ip: str) -> bool:
         """Verifica si IP está bloqueada"""
@@ -254,14 +300,14 @@ class EventRateLimiter:
         """Obtiene estadísticas de rate limiting"""
         stats = {
             "blocked_ips": len(self.blocked_ips),
-            "memory_entries": len(self.memory_cache),
+            "memory_entries": len(self.windows) + len(self.dedup_ids),
             "timestamp": datetime.utcnow().isoformat(),
         }
 
         if user_id:
             user_events = {
                 k: v
-                for k, v in self.memory_cache.items()
+                for k, v in self.windows.items()
                 if k.startswith(f"rate_limit:{user_id}:")
             }
             stats["user_events"] = len(user_events)
@@ -271,14 +317,11 @@ class EventRateLimiter:
     def reset_for_user(self, user_id: str):
         """Resetea rate limits para un usuario (útil para testing)"""
         keys_to_remove = [
-            k
-            for k in self.memory_cache.keys()
-            if k.startswith(f"rate_limit:{user_id}:")
-            or k.startswith(f"last_event:{user_id}:")
+            k for k in self.windows.keys() if k.startswith(f"rate_limit:{user_id}:")
         ]
 
         for key in keys_to_remove:
-            self.memory_cache.pop(key, None)
+            self.windows.pop(key, None)
 
         logger.info(f"Rate limits reset for user {user_id}")
 
@@ -7,7 +7,7 @@ Implementación de persistencia para eventos de tracking y métricas EMQ.
 import json
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 from app.domain.models.events import EventName, TrackingEvent
 from app.domain.models.values import EventId, ExternalId
@@ -20,8 +20,8 @@ logger = logging.getLogger(__name__)
 class PostgreSQLEventRepository(EventRepository):
     """Implementación de EventRepository para PostgreSQL y SQLite."""
 
-    async def save(self, event: TrackingEvent) -> None:
-        """Guarda evento de tracking."""
+    async def save(self, event: TrackingEvent, outbox: bool = True) -> None:
+        """Guarda evento de tracking (+ fila de outbox si `outbox`)."""
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
@@ -33,11 +33,13 @@ class PostgreSQLEventRepository(EventRepository):
                     ON CONFLICT (event_id) DO NOTHING
                 """
                 if db.backend == "sqlite":
-                    query = query.replace("%s", "?").replace(
-                        "ON CONFLICT (event_id) DO NOTHING", "OR IGNORE"
+                    query = (
+                        query.replace("%s", "?")
+                        .replace("INSERT INTO", "INSERT OR IGNORE INTO")
+                        .replace("ON CONFLICT (event_id) DO NOTHING", "")
                     )
 
-                cur.execute(
+                await cur.execute(
                     query,
                     (
                         str(event.event_id),
@@ -45,10 +47,13 @@ class PostgreSQLEventRepository(EventRepository):
                         str(event.external_id),
                         event.source_url,
                         json.dumps(event.custom_data),
-                        event.created_at,
+                        event.timestamp,
                     ),
                 )
 
+                if not outbox:
+                    return
+
                 # 📨 Outbox Pattern: Ensure event delivery via unified transaction
                 import uuid
 
@@ -60,9 +65,9 @@ class PostgreSQLEventRepository(EventRepository):
                         "external_id": str(event.external_id),
                         "source_url": event.source_url,
                         "custom_data": event.custom_data,
-                        "created_at": event.created_at.isoformat()
-                        if hasattr(event.created_at, "isoformat")
-                        else str(event.created_at),
+                        "created_at": event.timestamp.isoformat()
+                        if hasattr(event.timestamp, "isoformat")
+                        else str(event.timestamp),
                     }
                 )
 
@@ -79,7 +84,7 @@ class PostgreSQLEventRepository(EventRepository):
                         ) VALUES (?, ?, ?, ?, ?)
                     """
 
-                cur.execute(
+                await cur.execute(
                     outbox_query,
                     (
                         outbox_id,
@@ -91,6 +96,9 @@ class PostgreSQLEventRepository(EventRepository):
                 )
         except Exception:
             logger.exception("❌ Error saving event to database")
+            if db.in_transaction and db.backend == "postgres":
+                # La transacción del UoW quedó abortada: propagar para rollback
+                raise
 
     async def get_by_id(self, event_id: EventId) -> Optional[TrackingEvent]:
         """Busca evento por ID."""
@@ -101,8 +109,8 @@ class PostgreSQLEventRepository(EventRepository):
                 if db.backend == "sqlite":
                     query = query.replace("%s", "?")
 
-                cur.execute(query, (str(event_id),))
-                row = cur.fetchone()
+                await cur.execute(query, (str(event_id),))
+                row = await cur.fetchone()
                 if row:
                     return self._map_row_to_event(row, cur)
             return None
@@ -119,8 +127,8 @@ class PostgreSQLEventRepository(EventRepository):
                 if db.backend == "sqlite":
                     query = query.replace("%s", "?")
 
-                cur.execute(query, (str(event_id),))
-                return cur.fetchone() is not None
+                await cur.execute(query, (str(event_id),))
+                return await cur.fetchone() is not None
         except Exception:
             return False
 
@@ -137,12 +145,14 @@ class PostgreSQLEventRepository(EventRepository):
             custom_data=json.loads(data["custom_data"])
             if isinstance(data["custom_data"], str)
             else data["custom_data"],
-            created_at=data["created_at"]
+            timestamp=data["created_at"]
             if isinstance(data["created_at"], datetime)
             else datetime.fromisoformat(data["created_at"]),
         )
 
     # Simplified EMQ methods for analytics
+    EMQ_INSERT_CHUNK = 500
+
     async def save_emq_score(
         self,
         client_id: Optional[str],
@@ -153,21 +163,29 @@ class PostgreSQLEventRepository(EventRepository):
     ) -> None:
         """Guarda score EMQ para monitoreo."""
         try:
-            async with db.connection() as conn:
-                cur = conn.cursor()
-                query = """
-                    INSERT INTO emq_scores (client_id, event_name, score, payload_size, has_pii)
-                    VALUES (%s, %s, %s, %s, %s)
-                """
-                if db.backend == "sqlite":
-                    query = query.replace("%s", "?")
-
-                cur.execute(
-                    query, (client_id, event_name, score, payload_size, has_pii)
-                )
+            await self.save_emq_scores([(client_id, event_name, score, payload_size, has_pii)])
         except Exception as e:
             logger.warning(f"⚠️ Error saving EMQ score: {e}")
 
+    async def save_emq_scores(self, rows: Sequence[tuple]) -> None:
+        """
+        Inserta scores EMQ en bloque: un INSERT multi-fila por cada
+        EMQ_INSERT_CHUNK filas, en una sola conexión. Propaga errores para que
+        el write-behind buffer pueda reintentar.
+        """
+        if not rows:
+            return
+        placeholder = "(?, ?, ?, ?, ?)" if db.backend == "sqlite" else "(%s, %s, %s, %s, %s)"
+        async with db.connection() as conn:
+            cur = conn.cursor()
+            for start in range(0, len(rows), self.EMQ_INSERT_CHUNK):
+                chunk = rows[start : start + self.EMQ_INSERT_CHUNK]
+                query = (
+                    "INSERT INTO emq_scores (client_id, event_name, score, payload_size, has_pii) "
+                    "VALUES " + ", ".join([placeholder] * len(chunk))
+                )
+                await cur.execute(query, [value for row in chunk for value in row])
+
     async def get_emq_stats(self, limit: int = 20) -> List[dict]:
         """Obtiene estadísticas EMQ recientes."""
         try:
@@ -183,8 +201,8 @@ class PostgreSQLEventRepository(EventRepository):
                 if db.backend == "sqlite":
                     query = query.replace("%s", "?")
 
-                cur.execute(query, (limit,))
-                rows = cur.fetchall()
+                await cur.execute(query, (limit,))
+                rows = await cur.fetchall()
 
                 results = []
                 for row in rows:
@@ -31,8 +31,8 @@ class LeadRepository(ILeadRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, (lead_id,))
-                row = cur.fetchone()
+                await cur.execute(query, (lead_id,))
+                row = await cur.fetchone()
                 return self._map_row_to_lead(row, cur) if row else None
         except Exception as e:
             logger.error(f"❌ Error in get_by_id: {e}")
@@ -47,8 +47,8 @@ class LeadRepository(ILeadRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, (str(phone),))
-                row = cur.fetchone()
+                await cur.execute(query, (str(phone),))
+                row = await cur.fetchone()
                 return self._map_row_to_lead(row, cur) if row else None
         except Exception as e:
             logger.error(f"❌ Error in get_by_phone: {e}")
@@ -63,8 +63,8 @@ class LeadRepository(ILeadRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, (external_id.value,))
-                row = cur.fetchone()
+                await cur.execute(query, (external_id.value,))
+                row = await cur.fetchone()
                 return self._map_row_to_lead(row, cur) if row else None
         except Exception:
             return None
@@ -156,8 +156,8 @@ class LeadRepository(ILeadRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, params)
-                cur.execute(outbox_query, outbox_params)
+                await cur.execute(query, params)
+                await cur.execute(outbox_query, outbox_params)
         except Exception as e:
             logger.error(f"❌ Error saving lead (Transaction Rolled Back): {e}")
 
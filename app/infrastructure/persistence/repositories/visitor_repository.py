@@ -31,8 +31,8 @@ class VisitorRepository(IVisitorRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, (external_id.value,))
-                row = cur.fetchone()
+                await cur.execute(query, (external_id.value,))
+                row = await cur.fetchone()
                 if not row:
                     return None
                 
@@ -71,8 +71,8 @@ class VisitorRepository(IVisitorRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, (fbclid,))
-                row = cur.fetchone()
+                await cur.execute(query, (fbclid,))
+                row = await cur.fetchone()
                 if row:
                     return await self.get_by_external_id(ExternalId(row[0]))
                 return None
@@ -123,9 +123,12 @@ class VisitorRepository(IVisitorRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, params)
+                await cur.execute(query, params)
         except Exception as e:
             logger.error(f"❌ Error saving visitor: {e}")
+            if db.in_transaction and db.backend == "postgres":
+                # La transacción del UoW quedó abortada: propagar para rollback
+                raise
 
     async def create(self, visitor: Visitor) -> None:
         await self.save(visitor)
@@ -141,8 +144,8 @@ class VisitorRepository(IVisitorRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query)
-                return cur.fetchone()[0]
+                await cur.execute(query)
+                return (await cur.fetchone())[0]
         except Exception:
             return 0
 
@@ -155,8 +158,8 @@ class VisitorRepository(IVisitorRepository):
         try:
             async with db.connection() as conn:
                 cur = conn.cursor()
-                cur.execute(query, (limit,))
-                rows = cur.fetchall()
+                await cur.execute(query, (limit,))
+                rows = await cur.fetchall()
                 return [self._map_row_to_visitor(row, cur) for row in rows]
         except Exception as e:
             logger.error(f"❌ Error in get_all_visitors: {e}")
@@ -0,0 +1,22 @@
+"""
+🔁 Database Unit of Work.
+
+Implementación de UnitOfWorkPort sobre `db.transaction()`.
+"""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from app.application.interfaces.unit_of_work import UnitOfWorkPort
+from app.infrastructure.persistence.database import db
+
+
+class DatabaseUnitOfWork(UnitOfWorkPort):
+    """Los repositorios usados dentro de `begin()` comparten conexión y transacción."""
+
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[None]:
+        async with db.transaction():
+            yield
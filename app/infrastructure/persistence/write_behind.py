@@ -0,0 +1,124 @@
+"""
+📥 Write-Behind Buffer.
+
+Acumula filas en memoria y las persiste en bloque (un INSERT multi-fila)
+en lugar de abrir una conexión por fila. Se vacía cuando:
+- el buffer alcanza `max_rows` filas, o
+- la fila más antigua lleva `max_linger_seconds` esperando, o
+- el proceso se apaga (`flush_all` desde el lifespan).
+
+`add()` es síncrono y O(1): el llamador nunca espera a la base de datos.
+Si un flush falla, las filas vuelven al buffer mientras quepan en
+`max_pending`; por encima de ese límite se descartan (telemetría, no datos
+de negocio) y se contabilizan en `dropped`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+RowWriter = Callable[[Sequence[tuple]], Awaitable[None]]
+
+
+class WriteBehindBuffer:
+    """Buffer de filas con flush en bloque por tamaño o por tiempo."""
+
+    def __init__(
+        self,
+        name: str,
+        writer: RowWriter,
+        max_rows: int = 500,
+        max_linger_seconds: float = 2.0,
+        max_pending: int = 10_000,
+    ):
+        self.name = name
+        self._writer = writer
+        self.max_rows = max(1, max_rows)
+        self.max_linger_seconds = max(0.0, max_linger_seconds)
+        self.max_pending = max(self.max_rows, max_pending)
+
+        self._rows: List[tuple] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._stats: Dict[str, int] = {"rows": 0, "flushes": 0, "failed_flushes": 0, "dropped": 0}
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def add(self, row: tuple) -> None:
+        """Encola una fila; programa el flush si es la primera del lote."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Timer de un loop cerrado (tests, reinicio del worker): se reprograma
+            self._cancel_timer()
+            self._loop = loop
+
+        if len(self._rows) >= self.max_pending:
+            self._stats["dropped"] += 1
+            return
+
+        self._rows.append(row)
+        self._stats["rows"] += 1
+
+        if len(self._rows) >= self.max_rows or self.max_linger_seconds <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_linger_seconds, self._flush)
+
+    async def flush_all(self) -> None:
+        """Persiste todo lo pendiente y espera a los flushes en vuelo (shutdown)."""
+        self._flush()
+        loop = asyncio.get_running_loop()
+        inflight = [t for t in self._inflight if t.get_loop() is loop]
+        if inflight:
+            await asyncio.gather(*inflight, return_exceptions=True)
+
+    @property
+    def pending_rows(self) -> int:
+        return len(self._rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "pending_rows": self.pending_rows}
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush(self) -> None:
+        self._cancel_timer()
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+
+        # Siempre en el loop actual (timer o flush_all): nunca en uno ya cerrado
+        task = asyncio.get_running_loop().create_task(self._write(rows))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _write(self, rows: List[tuple]) -> None:
+        try:
+            await self._writer(rows)
+            self._stats["flushes"] += 1
+        except Exception as e:
+            self._stats["failed_flushes"] += 1
+            room = self.max_pending - len(self._rows)
+            if room > 0:
+                # Reintento en el siguiente flush (las filas más antiguas primero)
+                self._rows[:0] = rows[:room]
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(
+                        max(self.max_linger_seconds, 1.0), self._flush
+                    )
+            self._stats["dropped"] += max(0, len(rows) - max(room, 0))
+            logger.warning("⚠️ [%s] bulk write of %d rows failed: %s", self.name, len(rows), e)
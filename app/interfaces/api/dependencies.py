@@ -22,6 +22,7 @@ from app.application.commands.create_visitor import CreateVisitorHandler
 from app.application.commands.track_event import TrackEventHandler
 from app.application.interfaces.cache_port import DeduplicationPort
 from app.application.interfaces.tracker_port import TrackerPort
+from app.application.interfaces.unit_of_work import UnitOfWorkPort
 from app.domain.repositories.event_repo import EventRepository
 from app.domain.repositories.lead_repo import LeadRepository
 from app.domain.repositories.visitor_repo import VisitorRepository
@@ -78,6 +79,14 @@ def get_lead_repository() -> LeadRepository:
     return NativeLeadRepo()
 
 
+@lru_cache()
+def get_unit_of_work() -> UnitOfWorkPort:
+    """Provee unit of work (una conexión/transacción por comando)."""
+    from app.infrastructure.persistence.unit_of_work import DatabaseUnitOfWork
+
+    return DatabaseUnitOfWork()
+
+
 # ===== Trackers =====
 
 _tracker_cache: Optional[List[TrackerPort]] = None
@@ -113,6 +122,7 @@ def get_track_event_handler(
         visitor_repo=get_visitor_repository(),
         event_repo=get_event_repository(),
         trackers=get_trackers(),
+        uow=get_unit_of_work(),
     )
     handler.tenant_id = resolved  # type: ignore[attr-defined]
     return handler
@@ -0,0 +1,143 @@
+"""
+🧊 Rendered-HTML Page Cache.
+
+Las páginas públicas solo varían por request en unos pocos valores de
+identidad (external_id, pageview_event_id, fbclid). El resto del HTML es
+idéntico para cada combinación de:
+
+    (template, host, variante A/B, variante de hero, versión de contenido)
+
+Ese "shell" se renderiza UNA vez con marcadores en lugar de los valores de
+identidad y se guarda pre-partido; un hit de origen (miss de Cloudflare) pasa
+de evaluar Jinja2 completo a un join de strings con los valores escapados.
+
+La versión de contenido es el hash de los objetos de contenido (servicios,
+contacto). ContentManager devuelve el mismo objeto mientras no cambia, así que
+el hash se memoriza por identidad: O(1) por request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from markupsafe import escape
+from starlette.requests import Request
+from starlette.responses import HTMLResponse
+
+from app.infrastructure.monitoring import server_timing
+
+logger = logging.getLogger(__name__)
+
+LATE_BOUND_FIELDS = ("external_id", "pageview_event_id", "fbclid")
+
+
+class PageRenderCache:
+    """LRU de shells HTML pre-renderizados con placeholders de identidad."""
+
+    def __init__(
+        self,
+        templates: Any,
+        max_entries: int = 128,
+        late_bound: Sequence[str] = LATE_BOUND_FIELDS,
+    ):
+        self._templates = templates
+        self.max_entries = max(1, max_entries)
+        token = secrets.token_hex(6)
+        # Marcador único por proceso: no puede colisionar con contenido real
+        self._placeholders: Dict[str, str] = {
+            name: f"__pc_{name}_{token}__" for name in late_bound
+        }
+        self._by_marker: Dict[str, str] = {m: n for n, m in self._placeholders.items()}
+        self._pattern = re.compile("(" + "|".join(map(re.escape, self._by_marker)) + ")")
+        self._shells: "OrderedDict[Hashable, List[str]]" = OrderedDict()
+        self._versions: Dict[int, Tuple[Any, str]] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    # ── Content version ─────────────────────────────────────────
+
+    def _hash_of(self, obj: Any) -> str:
+        memo = self._versions.get(id(obj))
+        if memo is not None and memo[0] is obj:
+            return memo[1]
+        digest = hashlib.sha256(
+            json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str).encode()
+        ).hexdigest()[:12]
+        if len(self._versions) > 32:
+            self._versions.clear()
+        # Se guarda la referencia para que el id() no se reutilice
+        self._versions[id(obj)] = (obj, digest)
+        return digest
+
+    def content_version(self, content: Sequence[Any]) -> str:
+        return ".".join(self._hash_of(obj) for obj in content)
+
+    # ── Rendering ───────────────────────────────────────────────
+
+    def _render_shell(self, request: Request, name: str, context: Dict[str, Any]) -> List[str]:
+        shell_context = {**context, **self._placeholders, "request": request}
+        html = self._templates.get_template(name).render(shell_context)
+        # Segmentos alternos: texto, marcador, texto, ...
+        return self._pattern.split(html)
+
+    def render(
+        self,
+        request: Request,
+        name: str,
+        context: Dict[str, Any],
+        late_bound: Dict[str, Any],
+        variant: Tuple[Hashable, ...] = (),
+        content: Sequence[Any] = (),
+        headers: Optional[Dict[str, str]] = None,
+    ) -> HTMLResponse:
+        """
+        Respuesta HTML para `name`: shell cacheado + valores de identidad.
+
+        `context` no debe contener valores por request (van en `late_bound`);
+        todo lo que haga variar el HTML debe estar en `variant` o `content`.
+        """
+        key = (name, str(request.base_url), variant, self.content_version(content))
+
+        with self._lock:
+            parts = self._shells.get(key)
+            if parts is not None:
+                self._shells.move_to_end(key)
+                self._stats["hits"] += 1
+
+        if parts is None:
+            with server_timing.phase("render"):
+                parts = self._render_shell(request, name, context)
+            with self._lock:
+                self._stats["misses"] += 1
+                self._shells[key] = parts
+                if len(self._shells) > self.max_entries:
+                    evicted, _ = self._shells.popitem(last=False)
+                    self._stats["evictions"] += 1
+                    logger.debug("🧊 Page cache evicted %s", evicted[:3])
+
+        values = {
+            marker: str(escape(late_bound.get(field) or ""))
+            for marker, field in self._by_marker.items()
+        }
+        with server_timing.phase("splice"):
+            html = "".join(values.get(part, part) for part in parts)
+        return HTMLResponse(html, headers=headers)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._shells.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._shells),
+            "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
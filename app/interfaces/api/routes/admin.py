@@ -18,6 +18,7 @@ from app.application.commands.admin.confirm_sale_command import ConfirmSaleComma
 from app.application.queries.admin.get_all_visitors_query import GetAllVisitorsQuery
 from app.application.queries.admin.get_signal_audit_query import GetSignalAuditQuery
 from app.infrastructure.config.settings import settings
+from app.interfaces.api.dependencies import get_event_repository, get_visitor_repository
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 templates = Jinja2Templates(directory=settings.TEMPLATES_DIRS)
@@ -78,7 +79,54 @@ async def admin_stats(_=Depends(validate_admin_access)):
     visitor_repo = get_visitor_repository()
     get_visitors_query = GetAllVisitorsQuery(list_visitors=visitor_repo.get_all_visitors)
     visitors = await get_visitors_query.execute(limit=1000)
-    return {"total_visitors": len(visitors), "status": "active", "database": "connected"}
+    from app.domain.services.client_service import ClientService
+    from app.infrastructure.cache.local_dedup import local_dedup
+    from app.infrastructure.external.meta_capi.limiter import graph_limiter
+    from app.interfaces.api.routes.pages import page_cache
+    from app.retry_queue import dlq
+    from app.services.work_queue import work_queue
+    from app.tracking import emq_buffer
+
+    return {
+        "total_visitors": len(visitors),
+        "status": "active",
+        "database": "connected",
+        "dedup": local_dedup.stats(),
+        "dlq": await dlq.stats(),
+        "page_cache": page_cache.stats(),
+        "api_keys": ClientService.cache_stats(),
+        "emq_buffer": emq_buffer.stats(),
+        "work_queue": work_queue.stats(),
+        "graph_limiter": graph_limiter.stats(),
+    }
+
+
+@router.post("/api-keys/revoke")
+async def revoke_api_key(request: Request, _=Depends(validate_admin_access)):
+    """Revoca una API key (`api_key` en claro o `key_hash`) y la invalida en caché"""
+    from app.domain.services.client_service import ClientService
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not (data.get("api_key") or data.get("key_hash")):
+        raise HTTPException(status_code=400, detail="api_key or key_hash required")
+
+    revoked = await ClientService.revoke_api_key(
+        api_key=data.get("api_key"), key_hash=data.get("key_hash")
+    )
+    if not revoked:
+        raise HTTPException(status_code=404, detail="API key not found")
+    return {"status": "revoked"}
+
+
+@router.get("/loop")
+async def loop_lag(top: int = 10, _=Depends(validate_admin_access)):
+    """Lag del event loop (histograma) y call sites que más lo bloquean"""
+    from app.infrastructure.monitoring import loop_monitor
+
+    return loop_monitor.snapshot(top=top)
 
 
 @router.post("/confirm/{visitor_id}")
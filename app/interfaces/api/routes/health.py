@@ -6,11 +6,13 @@ import os
 from datetime import datetime
 from pathlib import Path
 
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 
 from app.infrastructure.config.settings import settings
+from app.infrastructure.monitoring import metrics
 from app.interfaces.api.dependencies import get_legacy_facade
+from app.interfaces.api.routes.admin import validate_admin_access
 
 router = APIRouter(tags=["Health"])
 legacy = get_legacy_facade()
@@ -118,6 +120,12 @@ async def health_assets():
     )
 
 
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(_=Depends(validate_admin_access)):
+    """Métricas en formato de texto Prometheus (scrape con basic auth / x-admin-key)"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @router.get("/ping", response_class=PlainTextResponse)
 async def ping():
     """Ping simple para monitoreo básico"""
@@ -8,14 +8,17 @@ import random
 import time
 from typing import Any, Dict, List, Optional, cast
 
-from fastapi import APIRouter, BackgroundTasks, Cookie, Request, Response
+from fastapi import APIRouter, Cookie, Request, Response
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
 from app.infrastructure.config.settings import settings
+from app.infrastructure.monitoring import server_timing
 from app.interfaces.api.dependencies import get_legacy_facade
-from app.services import get_contact_config, get_services_config
-from app.services.seo_engine import SEOEngine
+from app.interfaces.api.page_cache import PageRenderCache
+from app.services import get_contact_config, get_site_config
+from app.services.seo_engine import seo_bundles
+from app.services.work_queue import work_queue
 
 logger = logging.getLogger("BackgroundWorker")
 
@@ -34,6 +37,9 @@ templates_env = templates_obj.env
 templates_env.globals["system_version"] = SYSTEM_VERSION
 logger.info("💎 SYSTEM CORE: Version %s initialized.", SYSTEM_VERSION)
 
+# 🧊 Rendered shells for the public pages (identity values spliced per request)
+page_cache = PageRenderCache(templates)
+
 
 # =================================================================
 # MINI-WORKERS (Execute after HTTP response)
@@ -126,7 +132,6 @@ async def head_root() -> Response:
 @router.get("/", response_class=HTMLResponse)
 async def read_root(
     request: Request,
-    background_tasks: BackgroundTasks,
     fbp_cookie: Optional[str] = Cookie(default=None, alias="_fbp"),
     fbc_cookie: Optional[str] = Cookie(default=None, alias="_fbc"),
 ) -> Response:
@@ -134,47 +139,31 @@ async def read_root(
     # 1. Identity & Config
     ident: Dict[str, Any] = _extract_identity_info(request)
     ab_variant: str = _handle_ab_test(request)
-    services_config: List[Dict[str, Any]] = await get_services_config()
-    contact_config: Dict[str, Any] = await get_contact_config()
+    services_config, contact_config = await get_site_config()
     hero_content: Dict[str, Any] = _get_hero_content(request.query_params)
 
     # 2. Tracking Identity
     event_id = str(int(time.time() * 1000))
     # external_id is generated by legacy facade
     external_id: str = legacy.generate_external_id(ident["ip"], ident["ua"])
-    fbclid = await _resolve_fbclid_full(request, fbc_cookie, external_id)
+    with server_timing.phase("identity"):
+        fbclid = await _resolve_fbclid_full(request, fbc_cookie, external_id)
 
     # 4. SEO Engine (Silicon Valley Research Standard)
-    # Page metadata
-    seo_meta: Dict[str, Any] = SEOEngine.get_page_metadata(
-        "/",
-        {
-            "title": ("Jorge Aguirre Flores | Experto en Microblading y Estética Avanzada"),
-            "description": (
-                "Transforma tu mirada con el mejor especialista en "
-                "Microblading de Santa Cruz. 30 años de trayectoria "
-                "garantizan resultados naturales y artísticos."
-            ),
-        },
-    )
-    # Schemas
-    schemas = [
-        SEOEngine.get_global_schema(),
-        SEOEngine.get_breadcrumb_schema([{"name": "Inicio", "path": "/"}]),
-    ]
+    # Precomputed bundle: metadata + JSON-LD (rebuilt only when content changes)
+    with server_timing.phase("seo"):
+        seo: Dict[str, Any] = seo_bundles.get("/", services_config)
 
     # 5. Background Tasks & Cookies
-    _schedule_tracking(background_tasks, request, ident, external_id, fbclid, fbp_cookie, event_id)
+    _schedule_tracking(request, ident, external_id, fbclid, fbp_cookie, event_id)
 
     # 6. Build Response with optimized caching headers
-    response: Response = templates.TemplateResponse(
-        request=request,
-        name="pages/site/home.html",
+    # Cached shell per (A/B, hero, content version) + identity splice
+    response: Response = page_cache.render(
+        request,
+        "pages/site/home.html",
         context={
             "pixel_id": settings.META_PIXEL_ID,
-            "pageview_event_id": event_id,
-            "external_id": external_id,
-            "fbclid": fbclid or "",
             "services": services_config,
             "contact": contact_config,
             "google_client_id": settings.GOOGLE_CLIENT_ID,
@@ -183,8 +172,15 @@ async def read_root(
             "flags": _get_feature_flags(),
             "hero_content": hero_content,
             "ab_variant": ab_variant,
-            "seo": {**seo_meta, "json_ld": SEOEngine.generate_all_json_ld(schemas)},
+            "seo": seo,
+        },
+        late_bound={
+            "pageview_event_id": event_id,
+            "external_id": external_id,
+            "fbclid": fbclid,
         },
+        variant=(ab_variant, hero_content["variant"]),
+        content=(services_config, contact_config),
         headers={
             "Cache-Control": ("public, max-age=3600, stale-while-revalidate=86400"),
             "CDN-Cache-Control": "public, max-age=3600",
@@ -198,59 +194,43 @@ async def read_root(
 @router.get("/tracking-motor", response_class=HTMLResponse)
 async def read_tracking_motor(
     request: Request,
-    background_tasks: BackgroundTasks,
     fbp_cookie: Optional[str] = Cookie(default=None, alias="_fbp"),
     fbc_cookie: Optional[str] = Cookie(default=None, alias="_fbc"),
 ) -> Response:
     """LANDING PAGE VENTA TRACKING ENGINE - Optimized for B2B Conversion."""
     # 1. Identity & Config
     ident: Dict[str, Any] = _extract_identity_info(request)
-    services_config: List[Dict[str, Any]] = await get_services_config()
-    contact_config: Dict[str, Any] = await get_contact_config()
+    services_config, contact_config = await get_site_config()
 
     # 2. Tracking Identity
     event_id = str(int(time.time() * 1000))
     external_id: str = legacy.generate_external_id(ident["ip"], ident["ua"])
-    fbclid = await _resolve_fbclid_full(request, fbc_cookie, external_id)
+    with server_timing.phase("identity"):
+        fbclid = await _resolve_fbclid_full(request, fbc_cookie, external_id)
 
-    # 4. SEO Engine
-    seo_meta: Dict[str, Any] = SEOEngine.get_page_metadata(
-        "/tracking-motor",
-        {
-            "title": "Anti-Gravity Tracking Core | Meta CAPI Atomic Motor",
-            "description": (
-                "Recupera el 40% de tu data perdida. El motor de tracking más "
-                "avanzado con deduplicación atómica y EMQ Optimization."
-            ),
-        },
-    )
-
-    schemas = [
-        SEOEngine.get_global_schema(),
-        SEOEngine.get_breadcrumb_schema(
-            [
-                {"name": "Inicio", "path": "/"},
-                {"name": "Tracking Motor", "path": "/tracking-motor"},
-            ]
-        ),
-    ]
+    # 4. SEO Engine (precomputed bundle)
+    with server_timing.phase("seo"):
+        seo: Dict[str, Any] = seo_bundles.get("/tracking-motor", services_config)
 
     # 5. Background Tasks
-    _schedule_tracking(background_tasks, request, ident, external_id, fbclid, fbp_cookie, event_id)
+    _schedule_tracking(request, ident, external_id, fbclid, fbp_cookie, event_id)
 
     # 6. Build Response with optimized caching
-    response: Response = templates.TemplateResponse(
-        request=request,
-        name="pages/site/tracking_motor.html",
+    response: Response = page_cache.render(
+        request,
+        "pages/site/tracking_motor.html",
         context={
             "pixel_id": settings.META_PIXEL_ID,
-            "pageview_event_id": event_id,
-            "external_id": external_id,
-            "fbclid": fbclid or "",
             "services": services_config,
             "contact": contact_config,
-            "seo": {**seo_meta, "json_ld": SEOEngine.generate_all_json_ld(schemas)},
+            "seo": seo,
+        },
+        late_bound={
+            "pageview_event_id": event_id,
+            "external_id": external_id,
+            "fbclid": fbclid,
         },
+        content=(services_config, contact_config),
         headers={
             "Cache-Control": ("public, max-age=3600, stale-while-revalidate=86400"),
             "CDN-Cache-Control": "public, max-age=3600",
@@ -264,60 +244,52 @@ async def read_tracking_motor(
 @router.get("/microblading", response_class=HTMLResponse)
 async def read_microblading(
     request: Request,
-    background_tasks: BackgroundTasks,
     fbp_cookie: Optional[str] = Cookie(default=None, alias="_fbp"),
     fbc_cookie: Optional[str] = Cookie(default=None, alias="_fbc"),
 ) -> Response:
     """PÁGINA: Microblading HD - Ingeniería de la Mirada."""
-    return await _render_service_page(
-        request, background_tasks, "microblading", fbp_cookie, fbc_cookie
-    )
+    return await _render_service_page(request, "microblading", fbp_cookie, fbc_cookie)
 
 
 @router.get("/cejas", response_class=HTMLResponse)
 async def read_brows(
     request: Request,
-    background_tasks: BackgroundTasks,
     fbp_cookie: Optional[str] = Cookie(default=None, alias="_fbp"),
     fbc_cookie: Optional[str] = Cookie(default=None, alias="_fbc"),
 ) -> Response:
     """PÁGINA: Sombreado Dual (Powder Brows)."""
-    return await _render_service_page(request, background_tasks, "brows", fbp_cookie, fbc_cookie)
+    return await _render_service_page(request, "brows", fbp_cookie, fbc_cookie)
 
 
 @router.get("/ojos", response_class=HTMLResponse)
 async def read_eyes(
     request: Request,
-    background_tasks: BackgroundTasks,
     fbp_cookie: Optional[str] = Cookie(default=None, alias="_fbp"),
     fbc_cookie: Optional[str] = Cookie(default=None, alias="_fbc"),
 ) -> Response:
     """PÁGINA: Ocular Precision (Eyeliner)."""
-    return await _render_service_page(request, background_tasks, "eyeliner", fbp_cookie, fbc_cookie)
+    return await _render_service_page(request, "eyeliner", fbp_cookie, fbc_cookie)
 
 
 @router.get("/labios", response_class=HTMLResponse)
 async def read_lips(
     request: Request,
-    background_tasks: BackgroundTasks,
     fbp_cookie: Optional[str] = Cookie(default=None, alias="_fbp"),
     fbc_cookie: Optional[str] = Cookie(default=None, alias="_fbc"),
 ) -> Response:
     """PÁGINA: Full Lip Velvet (Acuarela de Labios)."""
-    return await _render_service_page(request, background_tasks, "lips", fbp_cookie, fbc_cookie)
+    return await _render_service_page(request, "lips", fbp_cookie, fbc_cookie)
 
 
 async def _render_service_page(
     request: Request,
-    background_tasks: BackgroundTasks,
     service_id: str,
     fbp_cookie: Optional[str],
     fbc_cookie: Optional[str],
 ) -> Response:
     """Helper to render service pages with specialized elite logic."""
     ident = _extract_identity_info(request)
-    services_config = await get_services_config()
-    contact_config = await get_contact_config()
+    services_config, contact_config = await get_site_config()
 
     # Find specific service
     service = next((s for s in services_config if s["id"] == service_id), None)
@@ -327,43 +299,32 @@ async def _render_service_page(
 
     event_id = str(int(time.time() * 1000))
     external_id = legacy.generate_external_id(ident["ip"], ident["ua"])
-    fbclid = await _resolve_fbclid_full(request, fbc_cookie, external_id)
-
-    # SEO Specialized for the service
-    seo_meta = SEOEngine.get_page_metadata(
-        f"/{service_id}",
-        {
-            "title": f"{service['title']} | Jorge Aguirre Flores Elite",
-            "description": service["description"],
-        },
-    )
+    with server_timing.phase("identity"):
+        fbclid = await _resolve_fbclid_full(request, fbc_cookie, external_id)
 
-    schemas = [
-        SEOEngine.get_global_schema(),
-        SEOEngine.get_service_schema(service),
-        SEOEngine.get_breadcrumb_schema(
-            [
-                {"name": "Inicio", "path": "/"},
-                {"name": service["title"], "path": f"/{service_id}"},
-            ]
-        ),
-    ]
+    # SEO Specialized for the service (precomputed bundle)
+    with server_timing.phase("seo"):
+        seo = seo_bundles.get_service(service_id, service, services_config)
 
-    _schedule_tracking(background_tasks, request, ident, external_id, fbclid, fbp_cookie, event_id)
+    _schedule_tracking(request, ident, external_id, fbclid, fbp_cookie, event_id)
 
-    response = templates.TemplateResponse(
-        request=request,
-        name=f"pages/site/{service_id}.html",
+    response = page_cache.render(
+        request,
+        f"pages/site/{service_id}.html",
         context={
             "pixel_id": settings.META_PIXEL_ID,
-            "pageview_event_id": event_id,
-            "external_id": external_id,
-            "fbclid": fbclid or "",
             "service": service,
             "all_services": services_config,
             "contact": contact_config,
-            "seo": {**seo_meta, "json_ld": SEOEngine.generate_all_json_ld(schemas)},
+            "flags": _get_feature_flags(),
+            "seo": seo,
+        },
+        late_bound={
+            "pageview_event_id": event_id,
+            "external_id": external_id,
+            "fbclid": fbclid,
         },
+        content=(services_config, contact_config),
     )
     _set_identity_cookies(response, "variant_a", ident, fbclid, fbp_cookie)
     return response
@@ -372,16 +333,8 @@ async def _render_service_page(
 @router.get("/onboarding", response_class=HTMLResponse)
 async def read_onboarding(request: Request) -> Response:
     """CLIENT ONBOARDING PAGE - Self-service credential generation."""
-    seo_meta: Dict[str, Any] = SEOEngine.get_page_metadata(
-        "/onboarding",
-        {
-            "title": "Onboarding | Atomic Tracking Motor",
-            "description": ("Configura tu motor de tracking y genera tu API Key en 5 minutos."),
-        },
-    )
-
-    services_config: List[Dict[str, Any]] = await get_services_config()
-    contact_config: Dict[str, Any] = await get_contact_config()
+    services_config, contact_config = await get_site_config()
+    seo_meta: Dict[str, Any] = seo_bundles.get("/onboarding", services_config)
 
     return templates.TemplateResponse(
         request=request,
@@ -482,6 +435,7 @@ def _get_hero_content(params: Any) -> Dict[str, Any]:
         "subtitle": "Especialista en Microblading",
         "bg_class": "bg-luxury-black",
         "is_dynamic": False,
+        "variant": "default",
     }
     if "labios" in utm or "lips" in utm:
         content.update(
@@ -492,6 +446,7 @@ def _get_hero_content(params: Any) -> Dict[str, Any]:
                 ),
                 "subtitle": "Micropigmentación Full Color",
                 "is_dynamic": True,
+                "variant": "lips",
             }
         )
     elif "ojos" in utm or "delineado" in utm or "eyes" in utm:
@@ -503,6 +458,7 @@ def _get_hero_content(params: Any) -> Dict[str, Any]:
                 ),
                 "subtitle": "Delineado Permanente de Ojos",
                 "is_dynamic": True,
+                "variant": "eyes",
             }
         )
     elif "cejas" in utm or "brows" in utm:
@@ -514,6 +470,7 @@ def _get_hero_content(params: Any) -> Dict[str, Any]:
                 ),
                 "subtitle": "Microblading 3D Hiper-Realista",
                 "is_dynamic": True,
+                "variant": "brows",
             }
         )
     return content
@@ -554,7 +511,6 @@ async def _resolve_fbclid_full(
 
 
 def _schedule_tracking(
-    bt: BackgroundTasks,
     request: Request,
     ident: Dict[str, Any],
     ext_id: str,
@@ -565,7 +521,8 @@ def _schedule_tracking(
     if not getattr(request.state, "is_human", True):
         return
 
-    bt.add_task(
+    work_queue.submit(
+        "visitors",
         bg_save_visitor,
         ext_id,
         fbclid or "",
@@ -581,9 +538,10 @@ def _schedule_tracking(
         phone=None,
     )
     if fbclid:
-        bt.add_task(legacy.cache_visitor_data, ext_id, {"fbclid": fbclid})
+        work_queue.submit("visitors", legacy.cache_visitor_data, ext_id, {"fbclid": fbclid})
 
-    bt.add_task(
+    work_queue.submit(
+        "engagement",
         bg_send_pageview,
         str(request.url),
         ident["ip"],
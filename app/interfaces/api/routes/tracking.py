@@ -6,16 +6,17 @@
 # ARCHITECTURE: "Third Way" Solution
 # - No Celery workers required (works on Render free tier)
 # - No synchronous blocking (page loads instantly)
-# - Uses FastAPI's native BackgroundTasks to process after response
+# - Side effects go to the bounded in-process work queue (app.services.work_queue)
 # =================================================================
 
+import json
 import logging
 import time
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, BackgroundTasks, Cookie, HTTPException, Request
+from fastapi import APIRouter, Cookie, HTTPException, Request
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 from app.application.dto.tracking_dto import TrackEventRequest as TrackingEvent
 from app.infrastructure.config.settings import settings
@@ -32,6 +33,7 @@ from app.interfaces.api.schemas import (
 )
 from app.limiter import limiter
 from app.services import normalize_pii, publish_to_qstash, validate_turnstile
+from app.services.work_queue import lane_for_event, work_queue
 
 # Logger
 logger = logging.getLogger("BackgroundWorker")
@@ -45,6 +47,10 @@ PIXEL_ID = settings.META_PIXEL_ID
 ACCESS_TOKEN = settings.META_ACCESS_TOKEN
 TEST_EVENT_CODE = settings.TEST_EVENT_CODE
 
+# Bulk ingestion limits (/api/v1/telemetry/batch)
+BATCH_MAX_EVENTS = 100
+BATCH_MAX_BYTES = 512 * 1024
+
 
 # =================================================================
 # 1. MINI-WORKERS (Execute after HTTP response is sent)
@@ -171,7 +177,6 @@ from fastapi import Depends
 async def track_event(
     event: TrackingEvent,
     request: Request,
-    background_tasks: BackgroundTasks,
     handler: Any = Depends(get_track_event_handler),
     fbp: Optional[str] = Cookie(default=None, alias="_fbp"),
     fbc: Optional[str] = Cookie(default=None, alias="_fbc"),
@@ -201,15 +206,18 @@ async def track_event(
 
     # 2. Execute via Command Handler (Background)
     # Note: For strict DDD, we should await or use a specialized background handler
-    # Since we want instant response, we use background_tasks
+    # Since we want instant response, the command goes to the work queue
+    # (conversions and engagement use separate priority lanes)
     cmd = TrackEventCommand(request=event, context=context)
-    background_tasks.add_task(handler.handle, cmd)
+    if not work_queue.submit(lane_for_event(event.event_name), handler.handle, cmd):
+        # Cola llena: el cliente debe reintentar (sin efectos secundarios duplicados)
+        return _rejected_response([event.event_id])
 
     # 3. Handle specific side effects (External Hubs)
     if event.event_name == "Lead" and ctx_data["phone"]:
-        _queue_lead_sync(background_tasks, event, ctx_data)
+        _queue_lead_sync(event, ctx_data)
 
-    _queue_external_hubs(background_tasks, event, ctx_data)
+    _queue_external_hubs(event, ctx_data)
 
     return JSONResponse(
         content={"status": "queued", "event_id": event.event_id},
@@ -217,6 +225,160 @@ async def track_event(
     )
 
 
+@router.post("/api/v1/telemetry/batch")
+@limiter.limit("30/minute")
+async def track_event_batch(
+    request: Request,
+    handler: Any = Depends(get_track_event_handler),
+    fbp: Optional[str] = Cookie(default=None, alias="_fbp"),
+    fbc: Optional[str] = Cookie(default=None, alias="_fbc"),
+):
+    """
+    Bulk ingestion: JSON array (or {"events": [...]}) or NDJSON body.
+
+    Events are validated one by one as they are read; invalid ones are
+    reported by index without rejecting the rest. One Turnstile check
+    covers the whole batch.
+    """
+    from app.application.commands.track_event import TrackEventCommand
+    from app.application.dto.tracking_dto import TrackingContext
+
+    events, rejected = await _read_batch(request)
+    if not events:
+        return JSONResponse(
+            status_code=400 if rejected else 200,
+            content={"status": "empty", "accepted": 0, "rejected": rejected},
+        )
+
+    # 🛡️ Zero Tolerance Policy: one Turnstile check per batch
+    token = request.headers.get("x-turnstile-token") or next(
+        (
+            e.custom_data.get("turnstile_token")
+            for e in events
+            if (e.custom_data or {}).get("turnstile_token")
+        ),
+        None,
+    )
+    if not await _validate_token(token, f"batch of {len(events)}"):
+        return JSONResponse(
+            status_code=200,
+            content={
+                "status": "filtered",
+                "message": "Signal filtered by Zero-Tolerance Policy",
+            },
+        )
+
+    cmds_by_lane: Dict[str, List[Any]] = {}
+    contexts = []
+    for event in events:
+        ctx_data = _get_tracking_context(request, event, fbp, fbc)
+        context = TrackingContext(ip_address=ctx_data["ip"], user_agent=ctx_data["ua"])
+        cmds_by_lane.setdefault(lane_for_event(event.event_name), []).append(
+            TrackEventCommand(request=event, context=context)
+        )
+        contexts.append((event, ctx_data))
+
+    # One background task per lane: conversions in the batch skip the engagement queue
+    full_lanes = {
+        lane
+        for lane, cmds in cmds_by_lane.items()
+        if not work_queue.submit(lane, handler.handle_batch, cmds)
+    }
+    dropped = [e.event_id for e in events if lane_for_event(e.event_name) in full_lanes]
+    if len(dropped) == len(events):
+        return _rejected_response(dropped)
+
+    for event, ctx_data in contexts:
+        if lane_for_event(event.event_name) in full_lanes:
+            continue
+        if event.event_name == "Lead" and ctx_data["phone"]:
+            _queue_lead_sync(event, ctx_data)
+        _queue_external_hubs(event, ctx_data)
+
+    return JSONResponse(
+        content={
+            "status": "queued",
+            "accepted": len(events) - len(dropped),
+            "event_ids": [e.event_id for e in events if e.event_id not in dropped],
+            "rejected": rejected
+            + [{"event_id": event_id, "error": "queue full, retry"} for event_id in dropped],
+        },
+        headers={"Cache-Control": "no-store, no-cache, must-revalidate, max-age=0"},
+    )
+
+
+def _rejected_response(event_ids: List[str]) -> JSONResponse:
+    """503 + Retry-After: el work queue descartó los eventos, el cliente reintenta."""
+    return JSONResponse(
+        status_code=503,
+        content={"status": "rejected", "event_ids": event_ids, "message": "Queue full, retry"},
+        headers={"Retry-After": "1", "Cache-Control": "no-store"},
+    )
+
+
+async def _read_batch(request: Request) -> Tuple[List[TrackingEvent], List[Dict[str, Any]]]:
+    """Parses and validates a batch body incrementally. Returns (events, rejected)."""
+    events: List[TrackingEvent] = []
+    rejected: List[Dict[str, Any]] = []
+
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = _iter_ndjson(request)
+    else:
+        items = _iter_json_array(request)
+
+    index = 0
+    try:
+        async for item in items:
+            if len(events) + len(rejected) >= BATCH_MAX_EVENTS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Batch exceeds {BATCH_MAX_EVENTS} events",
+                )
+            try:
+                events.append(TrackingEvent.model_validate(item))
+            except ValidationError as e:
+                rejected.append({"index": index, "error": e.errors()[0].get("msg")})
+            index += 1
+    except ValueError as e:
+        rejected.append({"index": index, "error": f"Malformed body: {e}"})
+
+    return events, rejected
+
+
+async def _iter_ndjson(request: Request) -> AsyncIterator[Any]:
+    """Yields one decoded object per line while the body is still streaming."""
+    buffer = b""
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Batch body too large")
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+async def _iter_json_array(request: Request) -> AsyncIterator[Any]:
+    """Yields the elements of a JSON array body (or of its "events" key)."""
+    body = b""
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Batch body too large")
+    data = json.loads(body or b"[]")
+    if isinstance(data, dict):
+        data = data.get("events", [])
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array of events")
+    for item in data:
+        yield item
+
+
 def _get_tracking_context(request, event, fbp, fbc):
     forwarded = request.headers.get("x-forwarded-for")
     cf_ip = request.headers.get("cf-connecting-ip")
@@ -254,13 +416,17 @@ def _get_tracking_context(request, event, fbp, fbc):
 
 async def _validate_human(event, ctx):
     token = (event.custom_data or {}).get("turnstile_token")
+    return await _validate_token(token, event.event_name)
+
+
+async def _validate_token(token, label):
     if not await validate_turnstile(str(token or "")):
-        logger.warning(f"🛡️ Filtered: {event.event_name}")
+        logger.warning(f"🛡️ Filtered: {label}")
         return False
     return True
 
 
-def _queue_lead_sync(bt, event, ctx):
+def _queue_lead_sync(event, ctx):
     payload = {
         "phone": ctx["phone"],
         "fbclid": ctx["fb_id"],
@@ -271,10 +437,10 @@ def _queue_lead_sync(bt, event, ctx):
         or ctx["utm"].get("utm_campaign"),
         **ctx["utm"],
     }
-    bt.add_task(bg_upsert_contact, payload)
+    work_queue.submit("crm", bg_upsert_contact, payload)
 
 
-async def _dispatch_to_capi(bt, event, ctx, client=None):
+async def _dispatch_to_capi(event, ctx, client=None):
     access_token = client.get("meta_access_token") if client else None
     pixel_id = client.get("meta_pixel_id") if client else None
 
@@ -302,10 +468,10 @@ async def _dispatch_to_capi(bt, event, ctx, client=None):
         "pixel_id": pixel_id,
     }
     if not await publish_to_qstash(payload):
-        bt.add_task(bg_send_meta_event, **payload)
+        work_queue.submit(lane_for_event(event.event_name), bg_send_meta_event, **payload)
 
 
-def _queue_external_hubs(bt, event, ctx):
+def _queue_external_hubs(event, ctx):
     # Webhook
     if event.event_name in [
         "Lead",
@@ -316,7 +482,7 @@ def _queue_external_hubs(bt, event, ctx):
     ]:
         payload = event.model_dump()
         payload["utm_data"] = ctx["utm"]
-        bt.add_task(bg_send_webhook, payload)
+        work_queue.submit("webhooks", bg_send_webhook, payload)
 
 
 # =================================================================
@@ -471,9 +637,7 @@ async def tracking_health():
 
 
 @router.post("/onboarding")
-async def client_onboarding(
-    data: Dict[str, Any], request: Request, background_tasks: BackgroundTasks
-):
+async def client_onboarding(data: Dict[str, Any], request: Request):
     """Registers a new client and generates an API key."""
     from app.domain.services.client_service import ClientService
 
@@ -515,7 +679,9 @@ async def client_onboarding(
     # Construct pii for Lead event
     event_id = f"lead_{result['client_id']}_{int(time.time())}"
 
-    background_tasks.add_task(
+    # Backpressure: el Lead del alta espera hueco antes de descartarse
+    await work_queue.submit_wait(
+        "conversions",
         bg_send_meta_event,
         event_name="Lead",
         event_id=event_id,
@@ -50,7 +50,7 @@ async def clean_garbage_data(_authorized: bool = Depends(verify_cron_secret)):
                     AND external_id NOT IN (SELECT external_id FROM leads WHERE external_id IS NOT NULL)
                 """
 
-            cur.execute(query)
+            await cur.execute(query)
             deleted_count = cur.rowcount
 
         logger.info(f"🧹 Garbage Collector Run: Defeated {deleted_count} stale rows.")
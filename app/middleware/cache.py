@@ -1,29 +1,37 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
-class CacheControlMiddleware(BaseHTTPMiddleware):
+class CacheControlMiddleware:
     """
     ⚡ PERFORMANCE OPTIMIZATION (CPM REDUCTION)
     -------------------------------------------
     Sets Cache-Control headers for dynamic HTML pages only.
     Static assets are handled by vercel.json (max-age=31536000, immutable).
     DO NOT set Cache-Control for /static/* here — it would downgrade vercel.json's headers.
+
+    Pure ASGI: edita las cabeceras en `http.response.start`, sin re-envolver la respuesta.
     """
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
+    CACHE_CONTROL = "public, max-age=3600, stale-while-revalidate=86400"
+    CDN_CACHE_CONTROL = "public, max-age=3600"
 
-        path = request.url.path
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # Only set cache headers for dynamic HTML pages (not static assets)
-        if not path.startswith("/static") and response.status_code == 200:
-            if "text/html" in response.headers.get("content-type", ""):
-                # Only set default headers if Cache-Control is not already set by route
-                if "Cache-Control" not in response.headers:
-                    response.headers["Cache-Control"] = (
-                        "public, max-age=3600, stale-while-revalidate=86400"
-                    )
-                    response.headers["CDN-Cache-Control"] = "public, max-age=3600"
-
-        return response
+        if scope["type"] != "http" or scope["path"].startswith("/static"):
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                if "text/html" in headers.get("content-type", ""):
+                    # Only set default headers if Cache-Control is not already set by route
+                    if "Cache-Control" not in headers:
+                        headers["Cache-Control"] = self.CACHE_CONTROL
+                        headers["CDN-Cache-Control"] = self.CDN_CACHE_CONTROL
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,16 +1,29 @@
+import http.cookies
 import logging
 import random
 import time
-from typing import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.datastructures import QueryParams
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
 
-class ServerSideIdentityMiddleware(BaseHTTPMiddleware):
+_COOKIE = http.cookies.SimpleCookie()
+# Atributos fijos (HttpOnly, Secure, SameSite=lax, Path=/): se serializan una sola vez
+_COOKIE_ATTRS = "; HttpOnly; Max-Age={max_age}; Path=/; SameSite=lax; Secure"
+_FBP_ATTRS = _COOKIE_ATTRS.format(max_age=63072000)  # 2 years
+_FBC_ATTRS = _COOKIE_ATTRS.format(max_age=7776000)  # 90 days
+
+
+def _cookie_header(key: str, value: str, attrs: str) -> tuple:
+    """Raw `set-cookie` idéntico al de Response.set_cookie(httponly, secure, samesite=lax)."""
+    _, coded = _COOKIE.value_encode(value)
+    return (b"set-cookie", f"{key}={coded}{attrs}".encode("latin-1"))
+
+
+class ServerSideIdentityMiddleware:
     """
     Middleware to ensure Meta Tracking Cookies (_fbp, _fbc)
     are present and set as HttpOnly to bypass AdBlockers.
@@ -21,57 +34,62 @@ class ServerSideIdentityMiddleware(BaseHTTPMiddleware):
     """
 
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
+        self.app = app
 
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # Skip for static files and API calls that are not page loads
         # (Though having them on API calls is fine, usually we want them on page loads)
-        if request.url.path.startswith("/static") or request.url.path.startswith("/_vercel"):
-            return response
-
-        try:
-            # 1. Handle Browser ID (_fbp)
-            fbp = request.cookies.get("_fbp")
-            if not fbp:
-                # Generate new _fbp
-                timestamp = int(time.time() * 1000)
-                random_val = random.randint(1000000000, 9999999999)
-                fbp = f"fb.1.{timestamp}.{random_val}"
-
-                # Set HttpOnly cookie (2 years expiry)
-                response.set_cookie(
-                    key="_fbp",
-                    value=fbp,
-                    max_age=63072000,  # 2 years
-                    httponly=True,
-                    samesite="lax",
-                    secure=True,
-                )
-                # logger.debug(f"🍪 [Identity] Generated _fbp: {fbp}")
-
-            # 2. Handle Click ID (_fbc) from fbclid query param
-            fbclid = request.query_params.get("fbclid")
-            if fbclid:
-                # Always refresh _fbc if fbclid is present in URL
-                # Format: fb.subdomain_index.creation_time.fbclid
-                # subdomain_index is usually 1 for www or root
-                creation_time = int(time.time() * 1000)
-                fbc = f"fb.1.{creation_time}.{fbclid}"
-
-                # Set HttpOnly cookie (90 days expiry)
-                response.set_cookie(
-                    key="_fbc",
-                    value=fbc,
-                    max_age=7776000,  # 90 days
-                    httponly=True,
-                    samesite="lax",
-                    secure=True,
-                )
-                logger.info(f"🍪 [Identity] Captured fbclid -> _fbc: {fbc}")
-
-        except Exception as e:
-            logger.exception(f"❌ [Identity] Middleware Error: {e}")
-
-        return response
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith("/static")
+            or scope["path"].startswith("/_vercel")
+        ):
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                try:
+                    cookies = self._identity_cookies(scope)
+                    if cookies:
+                        message["headers"] = [*message.get("headers", []), *cookies]
+                except Exception as e:
+                    logger.exception(f"❌ [Identity] Middleware Error: {e}")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _identity_cookies(scope: Scope) -> list:
+        cookies = []
+        request_cookies = ""
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                request_cookies = value.decode("latin-1")
+                break
+
+        # 1. Handle Browser ID (_fbp)
+        if not cookie_parser(request_cookies).get("_fbp"):
+            # Generate new _fbp
+            timestamp = int(time.time() * 1000)
+            random_val = random.randint(1000000000, 9999999999)
+            fbp = f"fb.1.{timestamp}.{random_val}"
+
+            # Set HttpOnly cookie (2 years expiry)
+            cookies.append(_cookie_header("_fbp", fbp, _FBP_ATTRS))
+            # logger.debug(f"🍪 [Identity] Generated _fbp: {fbp}")
+
+        # 2. Handle Click ID (_fbc) from fbclid query param
+        query_string = scope.get("query_string", b"")
+        fbclid = QueryParams(query_string).get("fbclid") if b"fbclid" in query_string else None
+        if fbclid:
+            # Always refresh _fbc if fbclid is present in URL
+            # Format: fb.subdomain_index.creation_time.fbclid
+            # subdomain_index is usually 1 for www or root
+            creation_time = int(time.time() * 1000)
+            fbc = f"fb.1.{creation_time}.{fbclid}"
+
+            # Set HttpOnly cookie (90 days expiry)
+            cookies.append(_cookie_header("_fbc", fbc, _FBC_ATTRS))
+            logger.info(f"🍪 [Identity] Captured fbclid -> _fbc: {fbc}")
+
+        return cookies
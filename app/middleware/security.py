@@ -1,11 +1,71 @@
 import logging
 import re
-
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+from typing import Dict, List, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# 10. Content Security Policy (CSP) - SILICON VALLEY GOD MODE
+# Total compatibility with Google Identity, Meta, Cloudflare and Unpkg
+CSP_POLICY = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://challenges.cloudflare.com https://*.googleapis.com https://*.gstatic.com https://cdnjs.cloudflare.com https://unpkg.com https://accounts.google.com https://connect.facebook.net https://static.cloudflareinsights.com; "
+    "script-src-elem 'self' 'unsafe-inline' https://challenges.cloudflare.com https://*.googleapis.com https://*.gstatic.com https://cdnjs.cloudflare.com https://unpkg.com https://accounts.google.com https://connect.facebook.net https://static.cloudflareinsights.com; "
+    "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdnjs.cloudflare.com https://accounts.google.com; "
+    "style-src-elem 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdnjs.cloudflare.com https://accounts.google.com https://*.google.com; "
+    "img-src 'self' data: blob: https:; "
+    "font-src 'self' data: https://fonts.gstatic.com https://cdnjs.cloudflare.com; "
+    "connect-src 'self' https://*.upstash.io https://*.facebook.com https://*.googleapis.com https://accounts.google.com https://*.cloudflareinsights.com https://unpkg.com https://*.google.com; "
+    "frame-src 'self' https://challenges.cloudflare.com https://accounts.google.com https://*.facebook.com; "
+    "object-src 'none'; "
+    "base-uri 'self'; "
+    "form-action 'self'; "
+    "frame-ancestors 'none'; "
+    "upgrade-insecure-requests;"
+)
+
+SECURITY_HEADERS: Dict[str, str] = {
+    # 1. Force HTTPS (HSTS) - 1 Year Cache with preload
+    # Tells browser: "Never load this site over HTTP again"
+    # includeSubDomains: Apply to all subdomains
+    # preload: Allow browser vendors to hardcode this site as HTTPS-only
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains; preload",
+    # 2. Prevent Clickjacking
+    # Tells browser: "Do not allow this site to be embedded in an iframe"
+    "X-Frame-Options": "DENY",
+    # 3. Prevent MIME Sniffing
+    # Tells browser: "Trust the Content-Type header given by server"
+    "X-Content-Type-Options": "nosniff",
+    # 4. Privacy: Referrer Policy
+    # Only send origin (domain) when going to other HTTPS sites, full path internally
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    # 5. XSS Protection (Legacy but good defense in depth)
+    "X-XSS-Protection": "1; mode=block",
+    # 6. Isolate the page from other origins (COOP)
+    # Prevents window.opener attacks
+    "Cross-Origin-Opener-Policy": "same-origin",
+    # 7. Cross-Origin Resource Policy (CORP)
+    # Protects against cross-origin information leaks
+    "Cross-Origin-Resource-Policy": "same-origin",
+    # 8. Cross-Origin Embedder Policy (COEP)
+    # Relaxed to credentialless to allow cross-origin resources (scripts/images) without CORP headers
+    "Cross-Origin-Embedder-Policy": "credentialless",
+    # 9. Permissions Policy - Restrict browser features
+    # Only allow necessary features
+    "Permissions-Policy": (
+        "camera=(), "
+        "microphone=(), "
+        "geolocation=(), "
+        "payment=(), "
+        "usb=(), "
+        "magnetometer=(), "
+        "gyroscope=(), "
+        "accelerometer=()"
+    ),
+    "Content-Security-Policy": CSP_POLICY,
+}
+
+
+class SecurityHeadersMiddleware:
     """
     🛡️ SILICON VALLEY SECURITY SHIELD
     ---------------------------------
@@ -18,90 +78,42 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     6. Referrer Policy - Privacy protection
     7. X-XSS-Protection - Legacy XSS protection
     8. Permissions Policy - Feature restrictions
+
+    Las cabeceras se codifican una sola vez y se añaden en `http.response.start`.
     """
 
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.logger = logging.getLogger("uvicorn.error")
         # List of common bots/crawlers/scrapers
         self.bot_pattern = re.compile(
             r"(googlebot|bingbot|yandexbot|duckduckbot|slurp|baiduspider|facebookexternalhit|twitterbot|rogerbot|linkedinbot|embedly|quora link preview|showyoubot|outbrain|pinterest\/0\.|slackbot|vkShare|W3C_Validator|uptime|monitor|crawl|spider|scraper|bot)",
             re.IGNORECASE,
         )
+        self.raw_headers: List[Tuple[bytes, bytes]] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in SECURITY_HEADERS.items()
+        ]
+        self._names = {name for name, _ in self.raw_headers}
 
-    async def dispatch(self, request: Request, call_next):
-        # 🕵️ BOT DEFENSE: Mark request as human or bot
-        user_agent = request.headers.get("user-agent", "")
-        request.state.is_human = not bool(self.bot_pattern.search(user_agent))
-
-        response = await call_next(request)
-
-        # 1. Force HTTPS (HSTS) - 1 Year Cache with preload
-        # Tells browser: "Never load this site over HTTP again"
-        # includeSubDomains: Apply to all subdomains
-        # preload: Allow browser vendors to hardcode this site as HTTPS-only
-        response.headers["Strict-Transport-Security"] = (
-            "max-age=31536000; includeSubDomains; preload"
-        )
-
-        # 2. Prevent Clickjacking
-        # Tells browser: "Do not allow this site to be embedded in an iframe"
-        response.headers["X-Frame-Options"] = "DENY"
-
-        # 3. Prevent MIME Sniffing
-        # Tells browser: "Trust the Content-Type header given by server"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-
-        # 4. Privacy: Referrer Policy
-        # Only send origin (domain) when going to other HTTPS sites, full path internally
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
-        # 5. XSS Protection (Legacy but good defense in depth)
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-
-        # 6. Isolate the page from other origins (COOP)
-        # Prevents window.opener attacks
-        response.headers["Cross-Origin-Opener-Policy"] = "same-origin"
-
-        # 7. Cross-Origin Resource Policy (CORP)
-        # Protects against cross-origin information leaks
-        response.headers["Cross-Origin-Resource-Policy"] = "same-origin"
-
-        # 8. Cross-Origin Embedder Policy (COEP)
-        # Relaxed to credentialless to allow cross-origin resources (scripts/images) without CORP headers
-        response.headers["Cross-Origin-Embedder-Policy"] = "credentialless"
-
-        # 9. Permissions Policy - Restrict browser features
-        # Only allow necessary features
-        response.headers["Permissions-Policy"] = (
-            "camera=(), "
-            "microphone=(), "
-            "geolocation=(), "
-            "payment=(), "
-            "usb=(), "
-            "magnetometer=(), "
-            "gyroscope=(), "
-            "accelerometer=()"
-        )
-
-        # 10. Content Security Policy (CSP) - SILICON VALLEY GOD MODE
-        # Total compatibility with Google Identity, Meta, Cloudflare and Unpkg
-        csp_policy = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://challenges.cloudflare.com https://*.googleapis.com https://*.gstatic.com https://cdnjs.cloudflare.com https://unpkg.com https://accounts.google.com https://connect.facebook.net https://static.cloudflareinsights.com; "
-            "script-src-elem 'self' 'unsafe-inline' https://challenges.cloudflare.com https://*.googleapis.com https://*.gstatic.com https://cdnjs.cloudflare.com https://unpkg.com https://accounts.google.com https://connect.facebook.net https://static.cloudflareinsights.com; "
-            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdnjs.cloudflare.com https://accounts.google.com; "
-            "style-src-elem 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdnjs.cloudflare.com https://accounts.google.com https://*.google.com; "
-            "img-src 'self' data: blob: https:; "
-            "font-src 'self' data: https://fonts.gstatic.com https://cdnjs.cloudflare.com; "
-            "connect-src 'self' https://*.upstash.io https://*.facebook.com https://*.googleapis.com https://accounts.google.com https://*.cloudflareinsights.com https://unpkg.com https://*.google.com; "
-            "frame-src 'self' https://challenges.cloudflare.com https://accounts.google.com https://*.facebook.com; "
-            "object-src 'none'; "
-            "base-uri 'self'; "
-            "form-action 'self'; "
-            "frame-ancestors 'none'; "
-            "upgrade-insecure-requests;"
-        )
-        response.headers["Content-Security-Policy"] = csp_policy
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        return response
+        # 🕵️ BOT DEFENSE: Mark request as human or bot
+        user_agent = ""
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+                break
+        scope.setdefault("state", {})["is_human"] = not bool(self.bot_pattern.search(user_agent))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Override: las cabeceras de seguridad siempre ganan a las de la ruta
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() not in self._names]
+                headers.extend(self.raw_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
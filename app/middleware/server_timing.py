@@ -0,0 +1,80 @@
+import random
+import secrets
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.monitoring import server_timing
+
+
+class ServerTimingMiddleware:
+    """
+    ⏱️ Header `Server-Timing` con el desglose por fase del request.
+
+    Opt-in: `X-Server-Timing: 1` junto con `X-Admin-Key` (monitores sintéticos,
+    devtools); sin la clave admin el header se ignora. Además, una fracción
+    `FLAG_SERVER_TIMING_SAMPLE_RATE` del tráfico se muestrea. El resto de
+    requests no crea timer (las fases son no-op).
+
+    Los tiempos nunca llegan a una caché compartida: la respuesta opt-in pasa a
+    `Cache-Control: private, no-store`; la muestreada omite el header si la
+    respuesta es cacheable por el CDN.
+    """
+
+    OPT_IN_HEADER = b"x-server-timing"
+    ADMIN_KEY_HEADER = b"x-admin-key"
+    CDN_HEADERS = ("CDN-Cache-Control", "Cloudflare-CDN-Cache-Control")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _opted_in(self, scope: Scope) -> bool:
+        opt_in, admin_key = None, None
+        for name, value in scope["headers"]:
+            if name == self.OPT_IN_HEADER:
+                opt_in = value
+            elif name == self.ADMIN_KEY_HEADER:
+                admin_key = value
+        if opt_in in (None, b"0", b"false") or not admin_key or not settings.ADMIN_KEY:
+            return False
+        return secrets.compare_digest(admin_key, settings.ADMIN_KEY.encode("latin-1"))
+
+    @classmethod
+    def _shared_cacheable(cls, headers: MutableHeaders) -> bool:
+        directives = headers.get("cache-control", "").lower()
+        if "private" in directives or "no-store" in directives:
+            return False
+        return "public" in directives or "s-maxage" in directives or any(
+            name in headers for name in cls.CDN_HEADERS
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        opted_in = self._opted_in(scope)
+        rate = settings.features.server_timing_sample_rate
+        if not opted_in and not (rate > 0 and random.random() < rate):
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        token = server_timing.activate()
+        timer = server_timing.current()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and timer is not None:
+                headers = MutableHeaders(scope=message)
+                if opted_in:
+                    for name in self.CDN_HEADERS:
+                        del headers[name]
+                    headers["Cache-Control"] = "private, no-store"
+                if opted_in or not self._shared_cacheable(headers):
+                    value = timer.header_value(total=time.perf_counter() - start)
+                    headers.append("Server-Timing", value)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            server_timing.deactivate(token)
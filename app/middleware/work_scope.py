@@ -0,0 +1,31 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.work_queue import work_queue
+
+
+class WorkQueueScopeMiddleware:
+    """
+    🧵 Serverless: las tareas del work queue corren dentro de la llamada ASGI.
+
+    En Vercel la instancia puede congelarse al devolver la respuesta, así que
+    las tareas encoladas durante el request se ejecutan después de enviarla
+    pero antes de que la llamada termine (semántica de `BackgroundTasks`).
+    Al final se vacía el write-behind EMQ: su timer no corre en una instancia
+    congelada. Fuera de serverless no hace nada: el work queue desacoplado y
+    el lifespan se encargan.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not work_queue.request_scoped:
+            return await self.app(scope, receive, send)
+        from app.tracking import emq_buffer
+
+        try:
+            async with work_queue.request_scope():
+                await self.app(scope, receive, send)
+        finally:
+            # Después de las tareas del request (son las que registran filas EMQ)
+            await emq_buffer.flush_all()
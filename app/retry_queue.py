@@ -2,10 +2,12 @@
 # RETRY_QUEUE.PY - Meta CAPI Resilience Logic (Redis DLQ)
 # Jorge Aguirre Flores Web
 # =================================================================
+import asyncio
 import json
 import logging
 import time
-from typing import Any, Dict, Optional
+import uuid
+from typing import Any, Dict, List, Optional
 
 from app.infrastructure.cache.redis_provider import redis_provider
 from app.infrastructure.config.settings import settings
@@ -13,58 +15,143 @@ from app.infrastructure.config.settings import settings
 logger = logging.getLogger("DistQueue")
 
 # 🔒 CONSTANTS
-DLQ_KEY = "meta_capi:dlq"
+DLQ_KEY = "meta_capi:dlq:schedule"  # ZSET: member=item JSON, score=next_retry
+LEGACY_DLQ_KEY = "meta_capi:dlq"  # LIST (formato anterior, se migra al vuelo)
 MAX_RETRIES = 5
 RETRY_BACKOFF_BASE = 300  # 5 minutes
+RETRY_CONCURRENCY = 5
+
+# Atomic "range + remove" of due items (one round trip, safe across workers).
+# Also drains the legacy LIST into the ZSET the first time it is seen.
+POP_DUE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    for _, raw in ipairs(redis.call('LRANGE', KEYS[2], 0, -1)) do
+        local ok, item = pcall(cjson.decode, raw)
+        local score = (ok and tonumber(item['next_retry'])) or 0
+        redis.call('ZADD', KEYS[1], score, raw)
+    end
+    redis.call('DEL', KEYS[2])
+end
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+# depth, due count and score of the earliest item in one round trip
+STATS_SCRIPT = """
+local first = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {
+    redis.call('ZCARD', KEYS[1]),
+    redis.call('ZCOUNT', KEYS[1], '-inf', ARGV[1]),
+    first[2] or false,
+}
+"""
 
 
 class RedisDLQ:
-    """Dead Letter Queue backed by the shared RedisProvider."""
+    """
+    Dead Letter Queue backed by the shared RedisProvider.
+
+    Items live in a sorted set scored by `next_retry`, so a poll only touches
+    due work: cost scales with due items, not with queue length.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {"recovered": 0, "requeued": 0, "dropped": 0}
 
     @property
     def _redis(self):
         return redis_provider.sync_client
 
+    @property
+    def _async_redis(self):
+        return redis_provider.async_client
+
+    @staticmethod
+    def _build_item(event_name: str, payload: Dict[str, Any], attempt: int) -> Dict[str, Any]:
+        now = int(time.time())
+        return {
+            # id: dos fallos idénticos en el mismo segundo no colisionan en el ZSET
+            "id": uuid.uuid4().hex,
+            "event_name": event_name,
+            "payload": payload,
+            "failed_at": now,
+            "attempt": attempt,
+            "next_retry": now + (RETRY_BACKOFF_BASE * (2 ** (attempt - 1))),
+        }
+
     def push(self, event_name: str, payload: Dict[str, Any], attempt: int = 1):
         """Push a failed event to the Redis DLQ"""
         if not self._redis:
             logger.warning(f"⚠️ [DLQ] Redis unavailable. Event '{event_name}' lost.")
             return
 
-        item = {
-            "event_name": event_name,
-            "payload": payload,
-            "failed_at": int(time.time()),
-            "attempt": attempt,
-            "next_retry": int(time.time()) + (RETRY_BACKOFF_BASE * (2 ** (attempt - 1))),
-        }
+        item = self._build_item(event_name, payload, attempt)
 
         try:
-            self._redis.rpush(DLQ_KEY, json.dumps(item))
+            self._redis.zadd(DLQ_KEY, {json.dumps(item): item["next_retry"]})
             logger.info(
                 f"📥 [DLQ] Saved '{event_name}' for retry #{attempt} (Next: +{item['next_retry'] - int(time.time())}s)"
             )
         except Exception as e:
             logger.exception(f"❌ [DLQ] Failed to save event: {e}")
 
-    def pop_batch(self, batch_size: int = 10) -> list:
-        """Atomic fetch of pending items (simulated with LPOP)"""
-        if not self._redis:
+    async def requeue(self, items: List[Dict[str, Any]]) -> None:
+        """Re-schedules failed retries with a single ZADD."""
+        if not items or not self._async_redis:
+            return
+        try:
+            await self._async_redis.zadd(
+                DLQ_KEY,
+                {json.dumps(item): item["next_retry"] for item in items},
+            )
+        except Exception as e:
+            logger.exception(f"❌ [DLQ] Failed to requeue {len(items)} events: {e}")
+
+    async def pop_due(self, batch_size: int = 10, now: Optional[int] = None) -> list:
+        """Atomically removes and returns up to `batch_size` items whose retry is due."""
+        if not self._async_redis:
             return []
 
-        items = []
+        now = int(time.time()) if now is None else now
         try:
-            for _ in range(batch_size):
-                raw = self._redis.lpop(DLQ_KEY)
-                if not raw:
-                    break
-                content = raw[0] if isinstance(raw, list) else raw
-                items.append(json.loads(content))
+            raw_items = await self._async_redis.eval(
+                POP_DUE_SCRIPT, [DLQ_KEY, LEGACY_DLQ_KEY], [str(now), str(batch_size)]
+            )
         except Exception as e:
             logger.exception(f"❌ [DLQ] Fetch error: {e}")
+            return []
 
+        items = []
+        for raw in raw_items or []:
+            try:
+                items.append(json.loads(raw))
+            except (TypeError, ValueError):
+                logger.warning(f"🗑️ [DLQ] Dropping unreadable item: {raw!r:.80}")
         return items
 
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth, due backlog and lag of the most overdue item."""
+        stats: Dict[str, Any] = {**self.counters, "depth": None, "due": None, "max_lag_seconds": None}
+        if not self._async_redis:
+            return stats
+
+        now = int(time.time())
+        try:
+            depth, due, first_score = await self._async_redis.eval(
+                STATS_SCRIPT, [DLQ_KEY], [str(now)]
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [DLQ] Stats unavailable: {e}")
+            return stats
+
+        stats["depth"] = int(depth)
+        stats["due"] = int(due)
+        stats["max_lag_seconds"] = max(0, now - int(float(first_score))) if first_score else 0
+        return stats
+
 
 # Singleton
 dlq = RedisDLQ()
@@ -76,76 +163,87 @@ def add_to_retry_queue(event_name: str, payload: Dict[str, Any]):
     dlq.push(event_name, payload)
 
 
-async def process_retry_queue(batch_size: int = 20):
+async def _retry_item(item: Dict[str, Any]) -> bool:
+    """Re-sends one DLQ item to Meta CAPI. True if Meta accepted it."""
+    # We need to import here to avoid circular dependencies
+    from app.tracking import EnhancedCustomData, EnhancedUserData, elite_capi
+
+    event_name = item["event_name"]
+    payload = item["payload"]
+
+    logger.info(f"✨ [DLQ] Retrying '{event_name}' (Attempt {item['attempt']}/{MAX_RETRIES})...")
+
+    try:
+        user_data_raw = payload.get("user_data", {})
+        custom_data_raw = payload.get("custom_data", {})
+
+        user_data = EnhancedUserData(**user_data_raw)
+        custom_data = EnhancedCustomData(**custom_data_raw) if custom_data_raw else None
+
+        result = await elite_capi.send_event(
+            event_name=event_name,
+            event_id=payload.get("event_id"),
+            event_source_url=payload.get("event_source_url") or payload.get("url"),
+            user_data=user_data,
+            custom_data=custom_data,
+            client_ip=payload.get("client_ip"),
+            user_agent=payload.get("user_agent"),
+        )
+
+        status = result.get("status")
+        if status in ["success", "duplicate", "sandbox"]:
+            logger.info(f"✅ [DLQ] Success: '{event_name}' recovered.")
+            return True
+        raise Exception(f"API Returned {status}")
+
+    except Exception as e:
+        logger.warning(f"⚠️ [DLQ] Validation/Send Error: {e}")
+        return False
+
+
+async def process_retry_queue(batch_size: int = 20, concurrency: int = RETRY_CONCURRENCY):
     """
     Background Task: Process pending retries
-    Resolves items that are due for retry. Re-queues those that aren't ready.
+    Fetches only items that are due and retries them concurrently.
     """
-    if not dlq._redis:
+    if not dlq._async_redis:
         return
 
-    items = dlq.pop_batch(batch_size)
+    items = await dlq.pop_due(batch_size)
     if not items:
         return
 
     logger.info(f"🔄 [DLQ] Processing {len(items)} events from Redis...")
 
-    # We need to import here to avoid circular dependencies
-    from app.tracking import EnhancedCustomData, EnhancedUserData, elite_capi
-
-    requeued_count: int = 0
-    success_count: int = 0
-    drop_count: int = 0
-
-    now: int = int(time.time())
+    semaphore = asyncio.Semaphore(max(1, concurrency))
 
-    for item in items:
-        if item["next_retry"] > now:
-            dlq.push(item["event_name"], item["payload"], item["attempt"])
-            requeued_count += 1
-            continue
+    async def _bounded(item: Dict[str, Any]) -> bool:
+        async with semaphore:
+            return await _retry_item(item)
 
-        event_name = item["event_name"]
-        payload = item["payload"]
-        attempt = item["attempt"]
+    results = await asyncio.gather(*(_bounded(item) for item in items))
 
-        logger.info(f"✨ [DLQ] Retrying '{event_name}' (Attempt {attempt}/{MAX_RETRIES})...")
+    to_requeue: List[Dict[str, Any]] = []
+    success_count: int = 0
+    drop_count: int = 0
 
-        try:
-            user_data_raw = payload.get("user_data", {})
-            custom_data_raw = payload.get("custom_data", {})
-
-            user_data = EnhancedUserData(**user_data_raw)
-            custom_data = EnhancedCustomData(**custom_data_raw) if custom_data_raw else None
-
-            result = await elite_capi.send_event(
-                event_name=event_name,
-                event_id=payload.get("event_id"),
-                event_source_url=payload.get("event_source_url") or payload.get("url"),
-                user_data=user_data,
-                custom_data=custom_data,
-                client_ip=payload.get("client_ip"),
-                user_agent=payload.get("user_agent"),
+    for item, ok in zip(items, results, strict=True):
+        if ok:
+            success_count += 1
+        elif item["attempt"] < MAX_RETRIES:
+            to_requeue.append(
+                RedisDLQ._build_item(item["event_name"], item["payload"], item["attempt"] + 1)
             )
+        else:
+            logger.error(f"🗑️ [DLQ] Dropping '{item['event_name']}' after {MAX_RETRIES} attempts.")
+            drop_count += 1
 
-            status = result.get("status")
-            if status in ["success", "duplicate", "sandbox"]:
-                logger.info(f"✅ [DLQ] Success: '{event_name}' recovered.")
-                success_count += 1
-            else:
-                raise Exception(f"API Returned {status}")
+    await dlq.requeue(to_requeue)
 
-        except Exception as e:
-            logger.warning(f"⚠️ [DLQ] Validation/Send Error: {e}")
-
-            if attempt < MAX_RETRIES:
-                dlq.push(event_name, payload, attempt + 1)
-                requeued_count += 1
-            else:
-                logger.exception(f"🗑️ [DLQ] Dropping '{event_name}' after {MAX_RETRIES} attempts.")
-                drop_count += 1
-
-    if success_count > 0:
-        logger.info(
-            f"🏁 [DLQ] Batch Complete. Recovered: {success_count}, Re-queued: {requeued_count}, Dropped: {drop_count}"
-        )
+    dlq.counters["recovered"] += success_count
+    dlq.counters["requeued"] += len(to_requeue)
+    dlq.counters["dropped"] += drop_count
+
+    logger.info(
+        f"🏁 [DLQ] Batch Complete. Recovered: {success_count}, Re-queued: {len(to_requeue)}, Dropped: {drop_count}"
+    )
@@ -1,10 +1,9 @@
 # import hashlib
-import asyncio
 import json
 import logging
 import os
 import time
-from typing import Any, Coroutine, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 # from functools import lru_cache
 import httpx
@@ -17,8 +16,12 @@ from tenacity import (
 )
 
 from app.cache import redis_cache
+from app.infrastructure.cache.single_flight import SingleFlight
 from app.infrastructure.config.settings import settings
+from app.infrastructure.external.http_clients import http_clients
+from app.infrastructure.monitoring import server_timing
 from app.infrastructure.persistence.database import db
+from app.services.seo_engine import seo_bundles
 
 # Configure Logging
 logger = logging.getLogger("uvicorn.error")
@@ -65,6 +68,10 @@ class ContentManager:
     _cache_times: Dict[str, float] = {}
     CACHE_TTL = 3600  # 1 hour
     STALE_THRESHOLD = 300  # 5 minutes
+    REFRESH_JITTER = 2.0  # seconds: spreads stale refreshes across instances
+
+    # 🛫 At most one refresh in flight per key (no stampede at STALE_THRESHOLD)
+    _refresh_flight = SingleFlight("cms_refresh", jitter=REFRESH_JITTER)
 
     # 🛡️ DEFENSIVE FALLBACKS (In case DB is empty/broken)
     _FALLBACKS: Dict[str, Any] = {
@@ -174,43 +181,56 @@ class ContentManager:
     @classmethod
     async def get_content(cls, key: str) -> Any:
         """Entry point for all dynamic content - SWR Optimized (TTFB 0ms)"""
+        return (await cls.get_many([key]))[key]
+
+    @classmethod
+    async def get_many(cls, keys: List[str]) -> Dict[str, Any]:
+        """Batch entry point: every RAM miss is resolved in ONE Redis round trip."""
         current_time = time.time()
         audit_mode = os.getenv("AUDIT_MODE", "").strip() == "1"
+        result: Dict[str, Any] = {}
+        missing: List[str] = []
 
         # 1. ⚡ RAM FIRST (0ms)
-        if key in cls._ram_cache:
+        for key in keys:
+            if key not in cls._ram_cache:
+                missing.append(key)
+                continue
             # Check if stale
             last_fetch = cls._cache_times.get(key, 0)
             if current_time - last_fetch > cls.STALE_THRESHOLD:
                 logger.info("🔄 [SWR] RAM stale for '%s'. Triggering refresh...", key)
                 if not audit_mode:
-                    coro = cast(
-                        Coroutine[Any, Any, Any], cls._refresh_in_background(key)
-                    )
-                    asyncio.create_task(coro)
-            return cls._ram_cache[key]
+                    cls._schedule_refresh(key)
+            result[key] = cls._ram_cache[key]
 
-        # 2. 🌀 REDIS SECOND (<15ms)
-        try:
-            cached = await redis_cache.get_json(f"content:{key}")
-            if cached:
-                cls._ram_cache[key] = cached
+        if not missing:
+            return result
+
+        # 2. 🌀 REDIS SECOND (<15ms, single MGET, non-blocking)
+        cached = await redis_cache.get_many([f"content:{key}" for key in missing])
+
+        for key in missing:
+            value = cached.get(f"content:{key}")
+            if value:
+                cls._ram_cache[key] = value
                 cls._cache_times[key] = current_time
-                if not audit_mode:
-                    coro = cast(
-                        Coroutine[Any, Any, Any], cls._refresh_in_background(key)
-                    )
-                    asyncio.create_task(coro)
-                return cached
-        except (ConnectionError, RuntimeError) as e:
-            logger.debug("Redis skip: %s", e)
+                result[key] = value
+            else:
+                # 3. 🧬 DATABASE / FALLBACK (Zero-Latency Guarantee)
+                result[key] = cls._FALLBACKS.get(key)
+            if not audit_mode:
+                # Sin jitter: se está sirviendo Redis/fallback, refrescar ya
+                cls._schedule_refresh(key, jitter=0)
 
-        # 3. 🧬 DATABASE / FALLBACK (Zero-Latency Guarantee)
-        if not audit_mode:
-            coro = cast(Coroutine[Any, Any, Any], cls._refresh_in_background(key))
-            asyncio.create_task(coro)
+        return result
 
-        return cls._FALLBACKS.get(key)
+    @classmethod
+    def _schedule_refresh(cls, key: str, jitter: Optional[float] = None) -> None:
+        """Coalesced SWR refresh: no-op if one is already in flight for `key`."""
+        cls._refresh_flight.schedule(
+            key, lambda: cls._refresh_in_background(key), jitter=jitter
+        )
 
     @classmethod
     async def _refresh_in_background(cls, key: str) -> Optional[Any]:
@@ -223,6 +243,9 @@ class ContentManager:
                 if content:
                     cls._ram_cache[key] = content
                     cls._cache_times[key] = time.time()
+                    if key == "services_config":
+                        # Rebuild fuera del request path (no-op si el hash no cambió)
+                        seo_bundles.build(content)
                     try:
                         await redis_cache.set_json(
                             f"content:{key}", content, expire=cls.CACHE_TTL
@@ -332,19 +355,15 @@ class ContentManager:
     async def warm_cache(cls) -> None:
         """Pre-loads all content into RAM. Called on FastAPI Startup."""
         logger.info("🔥 Warming up Zero-Latency CMS cache (Parallel execution)...")
-        tasks = [cls.get_content(key) for key in cls._FALLBACKS.keys()]
-        await asyncio.gather(*tasks)
+        content = await cls.get_many(list(cls._FALLBACKS.keys()))
+        seo_bundles.build(content["services_config"] or [])
         logger.info("👑 CMS Cache Ready (0ms latency enabled)")
 
     @classmethod
     async def refresh_all(cls) -> None:
         """Clears L1/L2 cache. Forces L3 reload."""
         cls._ram_cache.clear()
-        for key in cls._FALLBACKS.keys():
-            try:
-                await redis_cache.delete(f"content:{key}")
-            except (ConnectionError, RuntimeError):
-                logger.debug("Error deleting Redis cache for %s (Transient)", key)
+        await redis_cache.delete(*[f"content:{key}" for key in cls._FALLBACKS.keys()])
         await cls.warm_cache()
 
 
@@ -365,6 +384,16 @@ async def get_contact_config() -> Dict[str, Any]:
     return cast(Dict[str, Any], content or {})
 
 
+async def get_site_config() -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Services + contact config in one batched lookup (page renders)"""
+    with server_timing.phase("content"):
+        content = await ContentManager.get_many(["services_config", "contact_config"])
+    return (
+        cast(List[Dict[str, Any]], content["services_config"] or []),
+        cast(Dict[str, Any], content["contact_config"] or {}),
+    )
+
+
 # =================================================================
 # CORE UTILITIES
 # =================================================================
@@ -401,15 +430,13 @@ async def publish_to_qstash(event_data: Dict[str, Any]) -> bool:
 
         try:
             async with breaker.execute():
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{qstash_base}/v2/publish/{url}",
-                        headers=headers,
-                        json=event_data,
-                        timeout=5.0,
-                    )
-                    response.raise_for_status()
-                    return True
+                response = await http_clients.get("qstash").post(
+                    f"{qstash_base}/v2/publish/{url}",
+                    headers=headers,
+                    json=event_data,
+                )
+                response.raise_for_status()
+                return True
         except CircuitBreakerOpenException:
             logger.warning(
                 "🛑 QStash circuit is OPEN. Failing fast to protect event loop."
@@ -436,13 +463,12 @@ async def validate_turnstile(token: str) -> bool:
     if not token:
         return False
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        with server_timing.phase("turnstile"):
+            response = await http_clients.get("turnstile").post(
                 "https://challenges.cloudflare.com/turnstile/v0/siteverify",
                 data={"secret": settings.TURNSTILE_SECRET_KEY, "response": token},
-                timeout=5.0,
             )
-            return bool(response.json().get("success", False))
+        return bool(response.json().get("success", False))
     except httpx.RequestError:
         logger.exception("Turnstile validation request error")
         return True  # Fail safe
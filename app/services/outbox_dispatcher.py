@@ -0,0 +1,130 @@
+"""
+📣 Outbox Dispatcher (in-process, push-driven)
+
+For long-running deployments (uvicorn/Render), drains the outbox as soon as
+rows are written instead of waiting for the QStash cron on /hooks/relay-outbox:
+- PostgreSQL: a dedicated LISTEN connection wakes the loop on each NOTIFY
+  emitted by the `outbox_events_notify` trigger.
+- SQLite (or while LISTEN is unavailable): periodic polling fallback.
+
+Delivery itself goes through `OutboxRelay`, so claims stay atomic and the
+cron relay can keep running side by side without double delivery.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from app.infrastructure.persistence.database import OUTBOX_CHANNEL, db
+from app.services.outbox_relay import OutboxRelay
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        batch_size: int = 25,
+        poll_interval: float = 30.0,
+        fallback_poll_interval: float = 2.0,
+        reconnect_delay: float = 5.0,
+    ):
+        self.batch_size = batch_size
+        # Con LISTEN activo el polling es solo red de seguridad (NOTIFY perdido)
+        self.poll_interval = poll_interval
+        self.fallback_poll_interval = fallback_poll_interval
+        self.reconnect_delay = reconnect_delay
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._listening = False
+        self.delivered = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Arranca el loop (y el listener en Postgres) en el event loop actual."""
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="outbox-dispatcher")
+        if db.backend == "postgres":
+            self._listener_task = asyncio.create_task(
+                self._listen(), name="outbox-listener"
+            )
+        logger.info("📣 Outbox dispatcher started (backend=%s)", db.backend)
+
+    def notify(self) -> None:
+        """Despierta el loop (equivalente in-process de NOTIFY)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drain final de lo pendiente y parada ordenada."""
+        if self._task is None:
+            return
+        self._stopping = True
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            await asyncio.gather(self._listener_task, return_exceptions=True)
+            self._listener_task = None
+        self.notify()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Outbox drain timed out after %.1fs", timeout)
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        logger.info("📣 Outbox dispatcher stopped (delivered=%d)", self.delivered)
+
+    @property
+    def _interval(self) -> float:
+        return self.poll_interval if self._listening else self.fallback_poll_interval
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._drain()
+            if self._stopping:
+                return
+
+    async def _drain(self) -> None:
+        """Procesa lotes hasta vaciar el outbox (o hasta que nada avance)."""
+        while True:
+            processed = await OutboxRelay.process_pending_events(
+                batch_size=self.batch_size
+            )
+            self.delivered += processed
+            if processed == 0:
+                return
+
+    async def _listen(self) -> None:
+        """LISTEN con reconexión; si falla, el loop sigue por polling."""
+        while not self._stopping:
+            try:
+                async with db.listener(OUTBOX_CHANNEL) as conn:
+                    logger.info("📣 Listening on '%s'", OUTBOX_CHANNEL)
+                    self._listening = True
+                    self.notify()  # recuperar lo insertado mientras no escuchábamos
+                    async for _ in conn.notifies():
+                        self.notify()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Outbox LISTEN failed, falling back to polling: {e}")
+            finally:
+                self._listening = False
+            await asyncio.sleep(self.reconnect_delay)
+
+
+# Singleton (arrancado desde lifespan si FLAG_OUTBOX_DISPATCHER=true)
+outbox_dispatcher = OutboxDispatcher()
@@ -1,119 +1,258 @@
 """
 📨 Outbox Relay Worker Service
-Processes pending state changes exactly once synchronously via CRON.
+Processes pending state changes exactly once via CRON.
+
+Rows are *claimed* atomically before dispatch, so concurrent relay
+invocations never deliver the same event twice:
+- PostgreSQL: `FOR UPDATE SKIP LOCKED` inside a single UPDATE ... RETURNING.
+- SQLite: lease columns (`claim_token` + `locked_until`) set in one UPDATE.
+
+A claim is a lease: if the worker dies mid-batch, rows whose `locked_until`
+expired are picked up again by the next invocation. The claimed batch is
+dispatched concurrently (bounded by a semaphore) and the outcome is written
+back with one bulk UPDATE per status.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, Dict
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from app.infrastructure.persistence.database import db
 
 logger = logging.getLogger(__name__)
 
+OUTBOX_COLUMNS = ("id", "aggregate_type", "aggregate_id", "event_type", "payload")
+
 
 class OutboxRelay:
+    # Segundos que un claim bloquea la fila antes de poder re-tomarse
+    LEASE_SECONDS = 120
+    # Máximo de envíos simultáneos a Meta por invocación
+    DEFAULT_CONCURRENCY = 5
+    # Un solo tracker para todo el batch (comparte el batcher CAPI del proceso)
+    _tracker = None
+
     @staticmethod
-    async def process_pending_events(batch_size: int = 10) -> int:
-        """Processes up to `batch_size` pending events cleanly."""
+    async def process_pending_events(
+        batch_size: int = 10, concurrency: int = DEFAULT_CONCURRENCY
+    ) -> int:
+        """Claims up to `batch_size` pending events and dispatches them concurrently."""
         try:
-            async with db.connection() as conn:
-                cur = conn.cursor()
-                rows = OutboxRelay._fetch_pending(cur, batch_size)
+            rows = await OutboxRelay._claim_pending(batch_size)
+            if not rows:
+                return 0
+
+            semaphore = asyncio.Semaphore(max(1, concurrency))
 
-                if not rows:
-                    return 0
+            async def _bounded(row: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+                async with semaphore:
+                    return await OutboxRelay._process_single(row)
 
-                processed = 0
-                for row in rows:
-                    success = await OutboxRelay._process_single(cur, row)
-                    if success:
-                        processed += 1
+            results = await asyncio.gather(*(_bounded(row) for row in rows))
 
-                return processed
+            completed = [row["id"] for row, (ok, _) in zip(rows, results, strict=True) if ok]
+            failed = [(row["id"], err or "") for row, (ok, err) in zip(rows, results, strict=True) if not ok]
+            await OutboxRelay._mark_batch(completed, failed)
+            return len(completed)
 
         except Exception as e:
             logger.error(f"❌ Relay Worker Error: {e}")
             return 0
 
     @staticmethod
-    def _fetch_pending(cur, batch_size: int) -> list:
-        """Pulls pending records from the DB."""
-        query = """
-            SELECT id, aggregate_type, aggregate_id, event_type, payload 
-            FROM outbox_events 
-            WHERE status = 'pending' 
-            ORDER BY created_at ASC 
-            LIMIT %s
-        """
-        if db.backend == "sqlite":
-            query = query.replace("%s", "?")
-
-        cur.execute(query, (batch_size,))
-        return cur.fetchall()
+    async def _claim_pending(batch_size: int) -> List[Dict[str, Any]]:
+        """Atomically leases pending (or expired) records for this worker, leads first."""
+        claim_token = uuid.uuid4().hex
+
+        async with db.connection() as conn:
+            cur = conn.cursor()
+            if db.backend == "postgres":
+                await cur.execute(
+                    """
+                    UPDATE outbox_events
+                    SET status = 'processing',
+                        claim_token = %s,
+                        locked_until = NOW() + make_interval(secs => %s)
+                    WHERE id IN (
+                        SELECT id FROM outbox_events
+                        WHERE status = 'pending'
+                           OR (status = 'processing'
+                               AND (locked_until IS NULL OR locked_until < NOW()))
+                        ORDER BY CASE WHEN event_type = 'LEAD_SAVED' THEN 0 ELSE 1 END,
+                                 created_at ASC
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id, aggregate_type, aggregate_id, event_type, payload
+                    """,
+                    (claim_token, OutboxRelay.LEASE_SECONDS, batch_size),
+                )
+            else:
+                # SQLite serializa escritores: el UPDATE es atómico por sí mismo
+                await cur.execute(
+                    """
+                    UPDATE outbox_events
+                    SET status = 'processing',
+                        claim_token = ?,
+                        locked_until = datetime('now', ?)
+                    WHERE id IN (
+                        SELECT id FROM outbox_events
+                        WHERE status = 'pending'
+                           OR (status = 'processing'
+                               AND (locked_until IS NULL OR locked_until < datetime('now')))
+                        ORDER BY CASE WHEN event_type = 'LEAD_SAVED' THEN 0 ELSE 1 END,
+                                 created_at ASC
+                        LIMIT ?
+                    )
+                    """,
+                    (claim_token, f"+{OutboxRelay.LEASE_SECONDS} seconds", batch_size),
+                )
+                await cur.execute(
+                    """
+                    SELECT id, aggregate_type, aggregate_id, event_type, payload
+                    FROM outbox_events
+                    WHERE claim_token = ?
+                    ORDER BY created_at ASC
+                    """,
+                    (claim_token,),
+                )
+            rows = await cur.fetchall()
+
+        return [dict(zip(OUTBOX_COLUMNS, row, strict=True)) for row in rows]
 
     @staticmethod
-    def _mark_status(cur, event_id: str, status: str, error_msg: str = None):
-        """Standardizes status updates for the relay lock."""
-        if status == "processing":
-            query = "UPDATE outbox_events SET status = 'processing' WHERE id = %s"
-            params = (event_id,)
-        elif status == "completed":
-            query = "UPDATE outbox_events SET status = 'completed', processed_at = CURRENT_TIMESTAMP WHERE id = %s"
-            params = (event_id,)
-        else:
-            query = "UPDATE outbox_events SET status = 'failed', error_msg = %s WHERE id = %s"
-            params = (error_msg, event_id)
-
-        if db.backend == "sqlite":
-            query = query.replace("%s", "?")
-
-        cur.execute(query, params)
+    async def _mark_batch(
+        completed_ids: Sequence[str], failed: Sequence[Tuple[str, str]]
+    ) -> None:
+        """Writes back the batch outcome with one UPDATE per status."""
+        if not completed_ids and not failed:
+            return
+
+        async with db.connection() as conn:
+            cur = conn.cursor()
+            if db.backend == "postgres":
+                if completed_ids:
+                    await cur.execute(
+                        """
+                        UPDATE outbox_events
+                        SET status = 'completed', processed_at = CURRENT_TIMESTAMP,
+                            locked_until = NULL
+                        WHERE id = ANY(%s)
+                        """,
+                        (list(completed_ids),),
+                    )
+                if failed:
+                    await cur.execute(
+                        """
+                        UPDATE outbox_events AS o
+                        SET status = 'failed', error_msg = f.error_msg, locked_until = NULL
+                        FROM unnest(%s::text[], %s::text[]) AS f(id, error_msg)
+                        WHERE o.id = f.id
+                        """,
+                        ([i for i, _ in failed], [e for _, e in failed]),
+                    )
+            else:
+                if completed_ids:
+                    placeholders = ", ".join("?" for _ in completed_ids)
+                    await cur.execute(
+                        f"""
+                        UPDATE outbox_events
+                        SET status = 'completed', processed_at = CURRENT_TIMESTAMP,
+                            locked_until = NULL
+                        WHERE id IN ({placeholders})
+                        """,
+                        tuple(completed_ids),
+                    )
+                if failed:
+                    await cur.executemany(
+                        """
+                        UPDATE outbox_events
+                        SET status = 'failed', error_msg = ?, locked_until = NULL
+                        WHERE id = ?
+                        """,
+                        [(err, event_id) for event_id, err in failed],
+                    )
 
     @staticmethod
-    async def _process_single(cur, row: tuple) -> bool:
-        """Processes a single extracted log."""
-        event_id = row[0]
-        agg_type = row[1]
-        event_type = row[3]
-        payload_json = row[4]
+    async def _process_single(row: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        """Dispatches a single claimed record. Returns (ok, error_msg)."""
+        event_id = row["id"]
+        payload_json = row["payload"]
 
         try:
-            OutboxRelay._mark_status(cur, event_id, "processing")
-
             payload = (
                 json.loads(payload_json)
                 if isinstance(payload_json, str)
                 else payload_json
             )
-            await OutboxRelay._handle_event(agg_type, event_type, payload)
-
-            OutboxRelay._mark_status(cur, event_id, "completed")
-            return True
+            delivered = await OutboxRelay._handle_event(
+                row["aggregate_type"], row["event_type"], payload
+            )
+            if not delivered:
+                # track() no lanza: rechazo de Meta, circuito abierto o error de transporte
+                return False, "meta rejected/unavailable"
+            return True, None
         except Exception as e:
             logger.error(f"❌ Relay processing failed for {event_id}: {e}")
-            OutboxRelay._mark_status(cur, event_id, "failed", str(e))
-            return False
+            return False, str(e)
 
     @staticmethod
-    async def _handle_event(agg_type: str, event_type: str, payload: Dict[str, Any]):
-        """Dispatches the event to the correct handler (Meta CAPI Circuit-Breaker wrapped)"""
+    async def _handle_event(agg_type: str, event_type: str, payload: Dict[str, Any]) -> bool:
+        """Dispatches the event to the correct handler. False if Meta did not accept it."""
         if event_type not in ["TRACKING_EVENT_SAVED", "LEAD_SAVED"]:
-            return
-
-        from app.infrastructure.external.meta_capi.tracker import MetaTracker
+            return True
 
-        tracker = MetaTracker()
+        tracker = OutboxRelay._get_tracker()
 
         if agg_type == "TrackingEvent":
-            await OutboxRelay._handle_tracking_event(tracker, payload)
-        elif agg_type == "Lead":
-            await OutboxRelay._handle_lead_event(tracker, payload)
+            return await OutboxRelay._handle_tracking_event(tracker, payload)
+        if agg_type == "Lead":
+            return await OutboxRelay._handle_lead_event(tracker, payload)
+        return True
+
+    @staticmethod
+    def _get_tracker():
+        if OutboxRelay._tracker is None:
+            from app.infrastructure.external.meta_capi.tracker import MetaTracker
+
+            OutboxRelay._tracker = MetaTracker()
+        return OutboxRelay._tracker
 
     @staticmethod
-    async def _handle_tracking_event(tracker, payload: Dict[str, Any]):
-        custom_data = payload.get("custom_data", {})
-        fbp = custom_data.get("fbp")
+    def _event_id(raw: Optional[str]):
+        from app.domain.models.values import EventId
+
+        result = EventId.from_string(raw or "")
+        return result.unwrap() if result.is_ok else EventId.generate()
+
+    @staticmethod
+    def _lead_event_id(lead_id: Any):
+        """EventId derivado del id del lead: cada re-entrega deduplica en Meta."""
+        from app.domain.models.values import EventId
+
+        digest = hashlib.sha256(f"lead:{lead_id}".encode()).hexdigest()
+        return EventId(f"evt_{int(digest[:12], 16)}_{digest[12:24]}")
+
+    @staticmethod
+    def _parse_timestamp(raw: Optional[str]) -> datetime:
+        try:
+            return datetime.fromisoformat(raw) if raw else datetime.now(timezone.utc)
+        except ValueError:
+            return datetime.now(timezone.utc)
+
+    @staticmethod
+    async def _handle_tracking_event(tracker, payload: Dict[str, Any]) -> bool:
+        from app.domain.models.events import EventName, TrackingEvent
+        from app.domain.models.values import ExternalId
+        from app.domain.models.visitor import Visitor
+
+        custom_data = payload.get("custom_data") or {}
+        client_ip = custom_data.get("client_ip", "127.0.0.1")
+        user_agent = custom_data.get("user_agent", "OutboxRelay/1.0")
         fbc = custom_data.get("fbc") or custom_data.get("fbclid")
 
         if fbc and not fbc.startswith("fb."):
@@ -121,30 +260,62 @@ class OutboxRelay:
 
             fbc = f"fb.1.{int(time.time())}.{fbc}"
 
-        await tracker.track(
-            event_name=payload.get("event_name"),
-            event_id=payload.get("event_id"),
-            url=payload.get("source_url", "https://jorgeaguirreflores.com"),
-            client_ip=custom_data.get("client_ip", "127.0.0.1"),
-            user_agent=custom_data.get("user_agent", "OutboxRelay/1.0"),
-            external_id=payload.get("external_id"),
-            fbp=fbp,
-            fbc=fbc,
+        external_id = ExternalId.from_string(payload.get("external_id") or "")
+        external_id = (
+            external_id.unwrap()
+            if external_id.is_ok
+            else ExternalId.from_request(client_ip, user_agent)
+        )
+
+        event = TrackingEvent.reconstruct(
+            event_id=OutboxRelay._event_id(payload.get("event_id")),
+            event_name=EventName(payload.get("event_name")),
+            external_id=external_id,
+            timestamp=OutboxRelay._parse_timestamp(payload.get("created_at")),
+            source_url=payload.get("source_url") or "https://jorgeaguirreflores.com",
             custom_data=custom_data,
         )
+        visitor = Visitor.reconstruct(
+            external_id=external_id,
+            fbclid=fbc,
+            fbp=custom_data.get("fbp"),
+            ip_address=client_ip,
+            user_agent=user_agent,
+        )
+        return bool(await tracker.track(event, visitor))
 
     @staticmethod
-    async def _handle_lead_event(tracker, payload: Dict[str, Any]):
-        await tracker.track(
-            event_name="Lead",
-            event_id=payload.get("id"),
-            url="https://jorgeaguirreflores.com",
-            client_ip="127.0.0.1",
-            user_agent="OutboxRelay/1.0",
-            phone=payload.get("phone"),
-            email=payload.get("email"),
+    async def _handle_lead_event(tracker, payload: Dict[str, Any]) -> bool:
+        from app.domain.models.events import EventName, TrackingEvent
+        from app.domain.models.values import Email, ExternalId, Phone
+        from app.domain.models.visitor import Visitor
+
+        # IDs estables por lead: los reintentos y re-claims deduplican en Meta
+        external_id = ExternalId.from_request(str(payload.get("id")), "OutboxRelay/1.0")
+        phone = Phone.parse(payload.get("phone"))
+        email = Email.parse(payload.get("email"))
+
+        event = TrackingEvent.reconstruct(
+            event_id=(
+                OutboxRelay._event_id(payload["event_id"])
+                if payload.get("event_id")
+                else OutboxRelay._lead_event_id(payload.get("id"))
+            ),
+            event_name=EventName.LEAD,
+            external_id=external_id,
+            timestamp=datetime.now(timezone.utc),
+            source_url="https://jorgeaguirreflores.com",
             custom_data={
+                "lead_id": payload.get("id"),
                 "status": payload.get("status"),
                 "score": payload.get("score"),
             },
         )
+        visitor = Visitor.reconstruct(
+            external_id=external_id,
+            ip_address="127.0.0.1",
+            user_agent="OutboxRelay/1.0",
+            email=email.unwrap() if email.is_ok else None,
+            phone=phone.unwrap() if phone.is_ok else None,
+        )
+        return bool(await tracker.track(event, visitor))
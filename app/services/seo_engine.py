@@ -2,9 +2,13 @@
 # SEO_ENGINE.PY - The Silicon Valley Semantic Hub
 # Jorge Aguirre Flores Web
 # =================================================================
+import hashlib
 import json
+import logging
 from typing import Any, Dict, List, Optional
 
+logger = logging.getLogger(__name__)
+
 
 class SEOEngine:
     """
@@ -138,3 +142,148 @@ class SEOEngine:
             defaults.update(custom_meta)
 
         return defaults
+
+    @staticmethod
+    def build_bundle(
+        path: str,
+        custom_meta: Optional[Dict[str, str]] = None,
+        schemas: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Contexto `seo` final de una página: metadatos + bloque JSON-LD serializado"""
+        bundle: Dict[str, Any] = SEOEngine.get_page_metadata(path, custom_meta)
+        if schemas is not None:
+            bundle["json_ld"] = SEOEngine.generate_all_json_ld(schemas)
+        return bundle
+
+    @staticmethod
+    def build_service_bundle(service_id: str, service: Dict[str, Any]) -> Dict[str, Any]:
+        """Bundle SEO de una página de servicio"""
+        return SEOEngine.build_bundle(
+            f"/{service_id}",
+            {
+                "title": f"{service['title']} | Jorge Aguirre Flores Elite",
+                "description": service["description"],
+            },
+            [
+                SEOEngine.get_global_schema(),
+                SEOEngine.get_service_schema(service),
+                SEOEngine.get_breadcrumb_schema(
+                    [
+                        {"name": "Inicio", "path": "/"},
+                        {"name": service["title"], "path": f"/{service_id}"},
+                    ]
+                ),
+            ],
+        )
+
+
+# =================================================================
+# PRECOMPUTED SEO BUNDLES (per route, versioned by content hash)
+# =================================================================
+
+# Static pages: (custom metadata, breadcrumb trail or None = no JSON-LD)
+STATIC_PAGES: Dict[str, Any] = {
+    "/": (
+        {
+            "title": "Jorge Aguirre Flores | Experto en Microblading y Estética Avanzada",
+            "description": (
+                "Transforma tu mirada con el mejor especialista en "
+                "Microblading de Santa Cruz. 30 años de trayectoria "
+                "garantizan resultados naturales y artísticos."
+            ),
+        },
+        [{"name": "Inicio", "path": "/"}],
+    ),
+    "/tracking-motor": (
+        {
+            "title": "Anti-Gravity Tracking Core | Meta CAPI Atomic Motor",
+            "description": (
+                "Recupera el 40% de tu data perdida. El motor de tracking más "
+                "avanzado con deduplicación atómica y EMQ Optimization."
+            ),
+        },
+        [
+            {"name": "Inicio", "path": "/"},
+            {"name": "Tracking Motor", "path": "/tracking-motor"},
+        ],
+    ),
+    "/onboarding": (
+        {
+            "title": "Onboarding | Atomic Tracking Motor",
+            "description": "Configura tu motor de tracking y genera tu API Key en 5 minutos.",
+        },
+        None,
+    ),
+}
+
+
+class SEOBundleCache:
+    """
+    Bundles SEO terminados por ruta (metadatos + string JSON-LD).
+
+    Se reconstruyen solo cuando cambia el contenido de servicios
+    (`version` = hash del contenido); servir una página es un dict lookup.
+    La lista de servicios del ContentManager es el mismo objeto mientras
+    no cambie, así que la comprobación por request es por identidad (O(1)).
+    """
+
+    def __init__(self) -> None:
+        self._bundles: Dict[str, Dict[str, Any]] = {}
+        self._source: Optional[List[Dict[str, Any]]] = None
+        self.version: Optional[str] = None
+
+    @staticmethod
+    def content_hash(services: List[Dict[str, Any]]) -> str:
+        raw = json.dumps(services, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()[:12]
+
+    def build(self, services: List[Dict[str, Any]]) -> str:
+        """(Re)construye todos los bundles si el contenido cambió. Devuelve la versión."""
+        self._source = services
+        version = self.content_hash(services)
+        if version == self.version:
+            return version
+
+        bundles: Dict[str, Dict[str, Any]] = {}
+        for path, (meta, breadcrumbs) in STATIC_PAGES.items():
+            schemas = None
+            if breadcrumbs is not None:
+                schemas = [
+                    SEOEngine.get_global_schema(),
+                    SEOEngine.get_breadcrumb_schema(breadcrumbs),
+                ]
+            bundles[path] = SEOEngine.build_bundle(path, meta, schemas)
+        for service in services:
+            service_id = str(service.get("id", ""))
+            if service_id and "title" in service and "description" in service:
+                bundles[f"/{service_id}"] = SEOEngine.build_service_bundle(service_id, service)
+
+        # Swap atómico: los requests en curso siguen viendo la versión anterior
+        self._bundles = bundles
+        self.version = version
+        logger.info("🔎 SEO bundles built (version=%s, routes=%d)", version, len(bundles))
+        return version
+
+    def _ensure(self, services: List[Dict[str, Any]]) -> None:
+        if services is not self._source:
+            self.build(services)
+
+    def get(self, path: str, services: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Bundle de una página estática."""
+        self._ensure(services)
+        return self._bundles[path]
+
+    def get_service(
+        self, service_id: str, service: Dict[str, Any], services: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Bundle de una página de servicio (ID ausente del CMS: se calcula una vez)."""
+        self._ensure(services)
+        path = f"/{service_id}"
+        bundle = self._bundles.get(path)
+        if bundle is None:
+            bundle = self._bundles[path] = SEOEngine.build_service_bundle(service_id, service)
+        return bundle
+
+
+# Singleton
+seo_bundles = SEOBundleCache()
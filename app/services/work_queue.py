@@ -0,0 +1,405 @@
+"""
+🧵 Work Queue (in-process, bounded, priority-aware)
+
+Sustituye a `BackgroundTasks` para los efectos secundarios del tracking
+(guardar visitante, CAPI, CRM, webhooks). `BackgroundTasks` ejecuta las
+funciones síncronas en el threadpool compartido de Starlette, sin límite ni
+visibilidad: un pico de tráfico lo agota y frena también cada
+`run_in_threadpool` de las rutas.
+
+Aquí cada tipo de tarea tiene su lane:
+- cola acotada (`max_queue`) y un tope de tareas en curso (`concurrency`);
+- las funciones síncronas corren en un ThreadPoolExecutor dedicado del lane,
+  nunca en el threadpool de Starlette;
+- al llenarse, la política del lane decide: `reject` (se descarta la tarea
+  nueva), `drop_oldest` (se descarta la más antigua) o `sample` (por encima
+  de `shed_above` de ocupación se admite solo una fracción decreciente);
+- `submit_wait()` aplica backpressure: espera hueco hasta `timeout` antes de
+  recurrir a la política.
+
+Prioridades: los lanes de un mismo `group` comparten un pool de workers
+(tantos como la mayor `concurrency` del grupo). Cuando se libera un worker,
+el siguiente job se elige por weighted round-robin (smooth WRR, como nginx)
+entre los lanes con trabajo y por debajo de su tope. Así, con
+`conversions` (peso 4) y `engagement` (peso 1, tope menor que el pool):
+- las conversiones reciben 4 de cada 5 huecos mientras ambos tienen cola;
+- engagement nunca ocupa todos los workers → latencia de conversión estable;
+- ante sobrecarga, engagement se muestrea/descarta antes que nada.
+
+Los workers arrancan en el event loop del primer `submit` y `drain()` (desde
+el lifespan) espera a que las colas se vacíen antes del apagado.
+
+Serverless (Vercel): una instancia puede congelarse en cuanto responde y el
+lifespan no garantiza el `drain()`, así que una cola desacoplada del request
+perdería tareas. Con `request_scoped=True` cada `submit` dentro de
+`request_scope()` (WorkQueueScopeMiddleware) se guarda en el request y se
+ejecuta al terminar la respuesta, dentro de la misma llamada ASGI, como hacía
+`BackgroundTasks` (conversiones primero).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+from app.domain.models.events import CONVERSION_EVENT_NAMES
+from app.infrastructure.config.settings import settings
+from app.infrastructure.monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["reject", "drop_oldest", "sample"]
+
+TASKS = metrics.counter(
+    "background_tasks_total", "Background tasks by lane and outcome", ("lane", "outcome")
+)
+TASK_WAIT = metrics.histogram(
+    "background_task_wait_seconds", "Time tasks spend queued before a worker picks them", ("lane",)
+)
+
+
+# Tareas diferidas del request actual (solo en modo request_scoped)
+_request_jobs: contextvars.ContextVar[Optional[List[Tuple["_Lane", "_Job"]]]] = (
+    contextvars.ContextVar("work_queue_request_jobs", default=None)
+)
+
+
+@dataclass(frozen=True)
+class LaneConfig:
+    name: str
+    concurrency: int = 4
+    max_queue: int = 1000
+    overflow: OverflowPolicy = "reject"
+    # Lanes del mismo grupo comparten workers (por defecto: grupo propio)
+    group: Optional[str] = None
+    weight: int = 1
+    # Política `sample`: ocupación a partir de la cual se empieza a descartar
+    shed_above: float = 0.5
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    enqueued: float
+
+
+class _Lane:
+    def __init__(self, config: LaneConfig):
+        self.config = config
+        self.jobs: Deque[_Job] = deque()
+        self.active = 0
+        self.current_weight = 0  # estado del smooth WRR
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.stats: Dict[str, int] = {
+            "submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "shed": 0,
+        }
+
+    @property
+    def idle(self) -> bool:
+        return not self.jobs and self.active == 0
+
+    @property
+    def runnable(self) -> bool:
+        return bool(self.jobs) and self.active < self.config.concurrency
+
+
+class _Group:
+    def __init__(self, name: str, lanes: List[_Lane]):
+        self.name = name
+        self.lanes = lanes
+        self.size = max(lane.config.concurrency for lane in lanes)
+        self.workers: List[asyncio.Task] = []
+        self.ready: Optional[asyncio.Event] = None
+
+    def next_job(self) -> Optional[Tuple[_Lane, _Job]]:
+        """Smooth weighted round-robin entre los lanes que pueden avanzar."""
+        best: Optional[_Lane] = None
+        total = 0
+        for lane in self.lanes:
+            if not lane.runnable:
+                continue
+            lane.current_weight += lane.config.weight
+            total += lane.config.weight
+            if best is None or lane.current_weight > best.current_weight:
+                best = lane
+        if best is None:
+            return None
+        best.current_weight -= total
+        return best, best.jobs.popleft()
+
+
+class WorkQueue:
+    """Pool de workers por grupo de lanes con colas acotadas y prioridades."""
+
+    def __init__(
+        self, lanes: List[LaneConfig], drain_timeout: float = 10.0, request_scoped: bool = False
+    ):
+        self.request_scoped = request_scoped
+        self._lanes: Dict[str, _Lane] = {c.name: _Lane(c) for c in lanes}
+        members: Dict[str, List[_Lane]] = {}
+        for lane in self._lanes.values():
+            members.setdefault(lane.config.group or lane.config.name, []).append(lane)
+        self._groups: Dict[str, _Group] = {g: _Group(g, ls) for g, ls in members.items()}
+        self._group_of: Dict[str, _Group] = {
+            lane.config.name: group for group in self._groups.values() for lane in group.lanes
+        }
+        self.drain_timeout = drain_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: Optional[asyncio.Event] = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, lane: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> bool:
+        """Encola `fn(*args, **kwargs)` sin esperar; False si la política la descartó."""
+        target = self._lanes[lane]
+        scoped = _request_jobs.get() if self.request_scoped else None
+        if scoped is not None:
+            scoped.append((target, _Job(fn, args, kwargs, time.monotonic())))
+            target.stats["submitted"] += 1
+            return True
+        self._ensure_started()
+        if not self._admit(target):
+            return False
+        target.jobs.append(_Job(fn, args, kwargs, time.monotonic()))
+        target.stats["submitted"] += 1
+        self._idle.clear()
+        self._group_of[lane].ready.set()
+        return True
+
+    async def submit_wait(
+        self, lane: str, fn: Callable[..., Any], *args: Any, timeout: float = 1.0, **kwargs: Any
+    ) -> bool:
+        """Como `submit`, pero espera hasta `timeout` a que haya hueco (backpressure)."""
+        target = self._lanes[lane]
+        deadline = time.monotonic() + timeout
+        while len(target.jobs) >= target.config.max_queue and time.monotonic() < deadline:
+            await asyncio.sleep(min(0.01, max(0.0, deadline - time.monotonic())))
+        return self.submit(lane, fn, *args, **kwargs)
+
+    @contextlib.asynccontextmanager
+    async def request_scope(self) -> AsyncIterator[None]:
+        """Ejecuta las tareas enviadas durante el bloque al salir de él (serverless)."""
+        if not self.request_scoped:
+            yield
+            return
+        jobs: List[Tuple[_Lane, _Job]] = []
+        token = _request_jobs.set(jobs)
+        try:
+            yield
+        finally:
+            _request_jobs.reset(token)
+            # Prioridad por peso del lane (orden de envío dentro del mismo lane)
+            for lane, job in sorted(jobs, key=lambda item: -item[0].config.weight):
+                TASK_WAIT.observe(time.monotonic() - job.enqueued, lane.config.name)
+                try:
+                    await self._run(lane, job)
+                    self._count(lane, "completed")
+                except Exception:
+                    self._count(lane, "failed")
+                    logger.exception(
+                        "❌ [%s] background task %s failed", lane.config.name, _name(job.fn)
+                    )
+
+    async def join(self) -> None:
+        """Espera a que todas las colas estén vacías y sin tareas en curso."""
+        if self._idle is not None and self._loop is asyncio.get_running_loop():
+            await self._idle.wait()
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Vacía las colas (hasta `timeout`) y detiene workers y executors (shutdown)."""
+        timeout = self.drain_timeout if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Work queue drain timed out: %s", self.depths())
+        await self._stop_workers()
+        for lane in self._lanes.values():
+            if lane.executor is not None:
+                lane.executor.shutdown(wait=False)
+                lane.executor = None
+
+    def depths(self) -> Dict[str, int]:
+        return {name: len(lane.jobs) for name, lane in self._lanes.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                **lane.stats,
+                "queued": len(lane.jobs),
+                "active": lane.active,
+                "group": self._group_of[name].name,
+                "weight": lane.config.weight,
+                "concurrency": lane.config.concurrency,
+                "max_queue": lane.config.max_queue,
+                "overflow": lane.config.overflow,
+            }
+            for name, lane in self._lanes.items()
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _count(self, lane: _Lane, outcome: str) -> None:
+        lane.stats[outcome] += 1
+        TASKS.inc(lane.config.name, outcome)
+
+    def _admit(self, lane: _Lane) -> bool:
+        """Aplica la política de overflow del lane; False si la tarea nueva se descarta."""
+        config = lane.config
+        fill = len(lane.jobs) / config.max_queue
+        if config.overflow == "sample" and fill >= config.shed_above:
+            # Admisión lineal: 100% en el umbral → 0% con la cola llena
+            room = (1.0 - fill) / max(1e-9, 1.0 - config.shed_above)
+            if random.random() >= room:
+                self._count(lane, "shed")
+                return False
+            return True
+        if fill < 1.0:
+            return True
+        if config.overflow == "drop_oldest":
+            lane.jobs.popleft()
+            self._count(lane, "shed")
+            return True
+        self._count(lane, "rejected")
+        logger.warning("🧵 [%s] queue full (%d): task rejected", config.name, len(lane.jobs))
+        return False
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and all(group.workers for group in self._groups.values()):
+            return
+        # Primer uso o loop nuevo (tests, reinicio del worker): las tareas de un
+        # loop cerrado ya no corren; los jobs pendientes en las deques se conservan
+        self._loop = loop
+        self._idle = asyncio.Event()
+        for lane in self._lanes.values():
+            lane.active = 0
+        for group in self._groups.values():
+            group.ready = asyncio.Event()
+            # Contexto vacío: los workers no heredan ContextVars del request
+            # que los arrancó (transacción de BD, Server-Timing)
+            group.workers = [
+                contextvars.Context().run(
+                    loop.create_task, self._work(group), name=f"work-{group.name}-{i}"
+                )
+                for i in range(group.size)
+            ]
+        if all(lane.idle for lane in self._lanes.values()):
+            self._idle.set()
+
+    async def _work(self, group: _Group) -> None:
+        while True:
+            picked = group.next_job()
+            if picked is None:
+                group.ready.clear()
+                await group.ready.wait()
+                continue
+            lane, job = picked
+            lane.active += 1
+            TASK_WAIT.observe(time.monotonic() - job.enqueued, lane.config.name)
+            try:
+                await self._run(lane, job)
+                self._count(lane, "completed")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._count(lane, "failed")
+                logger.exception("❌ [%s] background task %s failed", lane.config.name, _name(job.fn))
+            finally:
+                lane.active -= 1
+                # Un lane que estaba en su tope puede volver a avanzar
+                group.ready.set()
+                if all(other.idle for other in self._lanes.values()):
+                    self._idle.set()
+
+    async def _run(self, lane: _Lane, job: _Job) -> None:
+        if asyncio.iscoroutinefunction(job.fn):
+            await job.fn(*job.args, **job.kwargs)
+            return
+        if lane.executor is None:
+            lane.executor = ThreadPoolExecutor(
+                max_workers=lane.config.concurrency, thread_name_prefix=f"work-{lane.config.name}"
+            )
+        call = functools.partial(job.fn, *job.args, **job.kwargs)
+        result = await asyncio.get_running_loop().run_in_executor(lane.executor, call)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def _stop_workers(self) -> None:
+        tasks = [t for group in self._groups.values() for t in group.workers]
+        for group in self._groups.values():
+            group.workers = []
+        loop = asyncio.get_running_loop()
+        current = [t for t in tasks if t.get_loop() is loop]
+        for task in current:
+            task.cancel()
+        await asyncio.gather(*current, return_exceptions=True)
+
+
+def _name(fn: Callable[..., Any]) -> str:
+    return getattr(fn, "__qualname__", None) or repr(fn)
+
+
+# lane -> (grupo, política al llenarse). Conversiones y engagement comparten
+# el grupo "events" (prioridad por peso); telemetría descartable → drop_oldest
+# o sample (lo reciente vale más); eventos de negocio → reject (visible en métricas)
+LANES: Dict[str, Tuple[Optional[str], OverflowPolicy]] = {
+    "conversions": ("events", "reject"),
+    "engagement": ("events", "sample"),
+    "visitors": (None, "drop_oldest"),
+    "crm": (None, "reject"),
+    "webhooks": (None, "drop_oldest"),
+}
+
+
+def _lanes_from_settings() -> List[LaneConfig]:
+    cfg = settings.workers
+    return [
+        LaneConfig(
+            name,
+            concurrency=cfg.concurrency.get(name, 2),
+            max_queue=cfg.max_queue.get(name, 1000),
+            overflow=overflow,
+            group=group,
+            weight=cfg.weights.get(name, 1),
+            shed_above=cfg.shed_above,
+        )
+        for name, (group, overflow) in LANES.items()
+    ]
+
+
+def lane_for_event(event_name: str) -> str:
+    """Lane de entrega de un evento: las conversiones nunca esperan al engagement."""
+    return "conversions" if event_name in CONVERSION_EVENT_NAMES else "engagement"
+
+
+# Singleton (drenado desde lifespan; ligado al request en serverless)
+work_queue = WorkQueue(
+    _lanes_from_settings(),
+    drain_timeout=settings.workers.drain_timeout_seconds,
+    request_scoped=settings.db.is_serverless,
+)
@@ -2,7 +2,6 @@
 # TRACKING.PY - Meta Conversions API (CAPI) - High Performance
 # Jorge Aguirre Flores Web
 # =================================================================
-import asyncio
 import hashlib
 import json
 import logging
@@ -16,6 +15,7 @@ from typing import Any, Dict, Optional
 import httpx
 from tenacity import (
     retry,
+    retry_if_exception,
     retry_if_exception_type,
     stop_after_attempt,
     wait_exponential,
@@ -24,10 +24,16 @@ from tenacity import (
 from app.application.interfaces.tracker_port import TrackerPort
 from app.infrastructure.config.settings import settings
 from app.interfaces.api.dependencies import get_event_repository
-from app.domain.models.events import TrackingEvent
+from app.domain.models.events import CONVERSION_EVENT_NAMES, TrackingEvent
 from app.domain.models.visitor import Visitor
 from app.domain.services.emq_monitor import emq_monitor
 from app.domain.validation.event_validator import event_validator
+from app.infrastructure.external.http_clients import http_clients
+from app.infrastructure.external.meta_capi.limiter import graph_limiter
+from app.infrastructure.external.meta_capi.tracker import shared_dispatcher
+from app.infrastructure.monitoring.metrics import metrics
+from app.infrastructure.persistence.write_behind import WriteBehindBuffer
+from app.services.work_queue import work_queue
 
 # Configure Logging
 logger = logging.getLogger("uvicorn.error")
@@ -103,17 +109,37 @@ except ImportError as e:
 
 
 # =================================================================
-# HTTP CLIENTS (SINGLETONS FOR PERSISTENT POOLING)
+# HTTP CLIENTS (SHARED REGISTRY FOR PERSISTENT POOLING)
 # =================================================================
 # reusing clients enables HTTP/2 and avoids SSL Handshake overhead (save ~200ms)
+# Pools per upstream live in http_clients (opened/closed in lifespan).
 
 
-timeout = httpx.Timeout(10.0, connect=5.0)
-sync_client = httpx.Client(timeout=timeout, http2=True)
+def _retryable_graph_error(exc: BaseException) -> bool:
+    """Transport errors are retried, except while Meta is throttling us."""
+    return isinstance(exc, httpx.RequestError) and graph_limiter.allow_retry()
+
+
+async def _write_emq_rows(rows) -> None:
+    """Writer del buffer EMQ: un INSERT multi-fila por flush."""
+    await get_event_repository().save_emq_scores(rows)
+
+
+# 📥 Write-behind de scores EMQ: miles de INSERTs de una fila → pocos bulk writes
+emq_buffer = WriteBehindBuffer(
+    "emq_scores", writer=_write_emq_rows, max_rows=500, max_linger_seconds=2.0
+)
+
+metrics.gauge(
+    "background_queue_depth", "Items waiting in in-process background queues", ("queue",)
+).set_function(
+    lambda: {
+        ("capi_batch",): shared_dispatcher().pending_events,
+        ("emq_buffer",): emq_buffer.pending_rows,
+        **{(f"work_{lane}",): depth for lane, depth in work_queue.depths().items()},
+    }
+)
 
-# Async client for FastAPI routes (future proofing)
-_AUDIT_MODE = os.getenv("AUDIT_MODE", "").strip() == "1"
-async_client = None if _AUDIT_MODE else httpx.AsyncClient(timeout=timeout, http2=True)
 
 # =================================================================
 # HASHING FUNCTIONS
@@ -201,20 +227,16 @@ def _log_emq_sync(event_name: str, payload: Dict[str, Any], client_id: Optional[
 
 async def _log_emq(event_name: str, payload: Dict[str, Any], client_id: Optional[str] = None):
     """Calculates, logs, and persists Event Match Quality Score (Async Wrapper)."""
-    score, payload_size, has_pii = await asyncio.to_thread(_log_emq_sync, event_name, payload, client_id)
-    
-    # 🚀 Persist for Dashboard asynchronously in the main event loop
+    # Scoring puro y barato: inline, sin saltar a un thread
+    score, payload_size, has_pii = _log_emq_sync(event_name, payload, client_id)
+
+    # 🚀 Persist for Dashboard via write-behind buffer (bulk INSERT, no conexión por evento)
     try:
-        from app.infrastructure.persistence.repositories.event_repository import get_event_repository
-        repo = get_event_repository()
-        asyncio.create_task(
-            repo.save_emq_score(client_id, event_name, score, payload_size, has_pii)
-        )
+        emq_buffer.add((client_id, event_name, score, payload_size, has_pii))
     except Exception as e:
-        logger.warning("⚠️ Failed to schedule EMQ score save: %s", str(e))
-        
-    return score
+        logger.warning("⚠️ Failed to buffer EMQ score: %s", str(e))
 
+    return score
 
 
 def _build_payload(
@@ -381,7 +403,7 @@ def send_event(
         logger.error("❌ [VALIDATION FAILED] Payload rejected for %s", event_name)
 
     try:
-        response = sync_client.post(api_url, json=payload)
+        response = http_clients.get_sync("meta").post(api_url, json=payload)
         if response.status_code == 200:
             logger.info("[META CAPI] ✅ %s sent via HTTP/2", event_name)
             return True
@@ -401,7 +423,7 @@ def send_event(
 @retry(
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, min=1, max=10),
-    retry=retry_if_exception_type(httpx.RequestError),
+    retry=retry_if_exception(_retryable_graph_error),
 )
 async def send_event_async(
     event_name: str,
@@ -458,33 +480,26 @@ async def send_event_async(
         fbc=fbc,
     )
 
-    api_url = settings.meta_api_url
-    if pixel_id:
-        api_url = f"https://graph.facebook.com/v21.0/{pixel_id}/events"
-
     await _log_emq(event_name, payload, client_id=client_id)
 
     if not event_validator.validate_payload(payload):
         logger.error("❌ [VALIDATION FAILED] Payload rejected for %s", event_name)
 
     try:
-        if async_client is None:
-            async with httpx.AsyncClient(timeout=timeout, http2=True) as client:
-                response = await client.post(api_url, json=payload)
-        else:
-            response = await async_client.post(api_url, json=payload)
-
-        if response.status_code == 200:
+        # Joins the process-wide batch for this pixel/token (same batcher as the
+        # outbox relay); resolves with this event's result
+        ok = await shared_dispatcher().submit(
+            payload["data"][0],
+            pixel_id=pixel_id or settings.meta.pixel_id,
+            access_token=payload["access_token"],
+            test_event_code=payload.get("test_event_code"),
+            urgent=event_name in CONVERSION_EVENT_NAMES,
+        )
+        if ok:
             logger.info("[META CAPI ASYNC] ✅ %s sent via HTTP/2", event_name)
-            return True
         else:
-            logger.warning(
-                "[META CAPI ASYNC] ⚠️ %s Failed (%d): %s",
-                event_name,
-                response.status_code,
-                response.text,
-            )
-            return False
+            logger.warning("[META CAPI ASYNC] ⚠️ %s rejected by Meta", event_name)
+        return ok
     except Exception:
         logger.exception("[META CAPI ASYNC] ❌ Error")
         raise
@@ -495,7 +510,7 @@ def send_n8n_webhook(event_data: Dict[str, Any]) -> bool:
     if not settings.N8N_WEBHOOK_URL:
         return False
     try:
-        response = sync_client.post(settings.N8N_WEBHOOK_URL, json=event_data)
+        response = http_clients.get_sync("n8n").post(settings.N8N_WEBHOOK_URL, json=event_data)
         if response.status_code == 200:
             logger.info("✅ n8n Webhook sent via HTTP/2")
             return True
@@ -841,7 +856,7 @@ class MetaTracker(TrackerPort):
             return False
         try:
             # Quick status check using the existing pool
-            engine_client = async_client or httpx.AsyncClient(timeout=5.0)
+            engine_client = self._client or http_clients.get("meta")
             response = await engine_client.get(
                 "https://graph.facebook.com/v21.0/me",
                 params={"access_token": settings.META_ACCESS_TOKEN},
@@ -858,7 +873,7 @@ class TinybirdTracker(TrackerPort):
     """
 
     def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
-        self._client = http_client or async_client
+        self._client = http_client
         self._token = os.getenv("TINYBIRD_ADMIN_TOKEN")
         self._api_url = os.getenv("TINYBIRD_API_URL", "https://api.northamerica-northeast2.gcp.tinybird.co")
         self._enabled = bool(self._token)
@@ -890,7 +905,7 @@ class TinybirdTracker(TrackerPort):
         }
 
         try:
-            client = self._client or httpx.AsyncClient(timeout=10.0)
+            client = self._client or http_clients.get("tinybird")
             response = await client.post(url, json=payload, headers=headers)
             if response.status_code in (200, 202):
                 logger.info("[TINYBIRD] ✅ Event %s streamed successfully", event.event_name.value)
@@ -909,7 +924,7 @@ class TinybirdTracker(TrackerPort):
         try:
             url = f"{self._api_url}/v0/datasources"
             headers = {"Authorization": f"Bearer {self._token}"}
-            client = self._client or httpx.AsyncClient(timeout=5.0)
+            client = self._client or http_clients.get("tinybird")
             response = await client.get(url, headers=headers)
             return response.status_code == 200
         except Exception:
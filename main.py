@@ -49,7 +49,10 @@ from app.middleware.cache import CacheControlMiddleware
 from app.middleware.early_hints import EarlyHintsMiddleware
 from app.middleware.error_handler import setup_error_handlers
 from app.middleware.identity import ServerSideIdentityMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
 from app.middleware.security import SecurityHeadersMiddleware
+from app.middleware.work_scope import WorkQueueScopeMiddleware
 from app.version import VERSION
 
 # Configuración de Logging prioritaria
@@ -107,6 +110,14 @@ async def lifespan(app: FastAPI):
             or "pytest" in sys.modules
         )
 
+        # 1.6. Pools HTTP compartidos (Meta, Turnstile, QStash, Tinybird, n8n)
+        try:
+            from app.infrastructure.external.http_clients import http_clients
+
+            await http_clients.open()
+        except Exception as e:
+            logger.warning(f"⚠️ HTTP clients warmup failed: {e}")
+
         # 2. Startup warmups
         if not is_test_mode:
             # Warm cache (Non-critical)
@@ -117,6 +128,14 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.warning(f"⚠️ warm_cache skipped: {e}")
 
+            # Tabla en memoria de API keys activas (auth multi-tenant sin consulta)
+            try:
+                from app.domain.services.client_service import ClientService
+
+                await asyncio.wait_for(ClientService.preload_active_keys(), timeout=3)
+            except Exception as e:
+                logger.warning(f"⚠️ API key preload skipped: {e}")
+
             # Database initialization (Trigger in background to prevent boot block)
             try:
                 from app.infrastructure.persistence.database import db
@@ -126,6 +145,25 @@ async def lifespan(app: FastAPI):
                 logger.info("⚡ Background DB init triggered")
             except Exception as e:
                 logger.exception(f"❌ DB init trigger failed: {e}")
+
+            # Outbox push-driven (LISTEN/NOTIFY): solo en procesos long-running
+            if settings.features.outbox_dispatcher and not settings.db.is_serverless:
+                try:
+                    from app.services.outbox_dispatcher import outbox_dispatcher
+
+                    outbox_dispatcher.start()
+                except Exception as e:
+                    logger.exception(f"❌ Outbox dispatcher start failed: {e}")
+
+            # Monitor de lag del event loop (detecta I/O síncrono en rutas async).
+            # No en serverless: congelar/descongelar la instancia parece lag de segundos
+            if settings.features.loop_monitor and not settings.db.is_serverless:
+                try:
+                    from app.infrastructure.monitoring import loop_monitor
+
+                    loop_monitor.start()
+                except Exception as e:
+                    logger.warning(f"⚠️ Loop monitor start failed: {e}")
         else:
             logger.info("🧪 Test mode: skipping warmups")
 
@@ -137,6 +175,62 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("🛑 Deteniendo servidor...")
+
+    try:
+        from app.infrastructure.monitoring import loop_monitor
+
+        await loop_monitor.stop()
+    except Exception as e:
+        logger.warning(f"⚠️ Loop monitor stop failed: {e}")
+
+    # Drain del outbox antes del flush CAPI (sus envíos pasan por el batcher)
+    try:
+        from app.services.outbox_dispatcher import outbox_dispatcher
+
+        await outbox_dispatcher.stop(timeout=10)
+    except Exception as e:
+        logger.warning(f"⚠️ Outbox dispatcher stop failed: {e}")
+
+    # Drain del work queue: sus tareas alimentan el batcher CAPI y el buffer EMQ
+    try:
+        from app.services.work_queue import work_queue
+
+        await work_queue.drain()
+    except Exception as e:
+        logger.warning(f"⚠️ Work queue drain failed: {e}")
+
+    # Flush de eventos CAPI pendientes en el batcher (no perder conversiones)
+    try:
+        from app.infrastructure.external.meta_capi.tracker import flush_pending
+
+        await asyncio.wait_for(flush_pending(), timeout=5)
+    except Exception as e:
+        logger.warning(f"⚠️ CAPI batch flush failed: {e}")
+
+    # Flush del write-behind EMQ (antes de cerrar el pool de BD)
+    try:
+        from app.tracking import emq_buffer
+
+        await asyncio.wait_for(emq_buffer.flush_all(), timeout=5)
+    except Exception as e:
+        logger.warning(f"⚠️ EMQ buffer flush failed: {e}")
+
+    # Cierre de los pools HTTP salientes (después del flush CAPI que los usa)
+    try:
+        from app.infrastructure.external.http_clients import http_clients
+
+        await http_clients.aclose()
+    except Exception as e:
+        logger.warning(f"⚠️ HTTP clients close failed: {e}")
+
+    # Cierre ordenado del pool de Postgres
+    try:
+        from app.infrastructure.persistence.database import db
+
+        await db.close()
+    except Exception as e:
+        logger.warning(f"⚠️ DB pool close failed: {e}")
+
     gc.collect()
 
 
@@ -152,6 +246,9 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Middleware: tareas del work queue ligadas al request (solo serverless; la más interna)
+app.add_middleware(WorkQueueScopeMiddleware)
+
 # Middleware GZip para compresión (5x más rápido en móviles)
 app.add_middleware(GZipMiddleware, minimum_size=500)
 
@@ -189,6 +286,14 @@ app.add_middleware(CacheControlMiddleware)
 
 app.add_middleware(APIKeyMiddleware)
 
+# Middleware: Server-Timing por fase (opt-in / muestreado)
+
+app.add_middleware(ServerTimingMiddleware)
+
+# Middleware: Métricas por ruta (más externo: mide toda la pila)
+
+app.add_middleware(MetricsMiddleware)
+
 # =================================================================
 # SECURITY: RATE LIMITING (Redis-Backed)
 # =================================================================
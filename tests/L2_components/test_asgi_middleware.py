@@ -0,0 +1,83 @@
+from unittest.mock import AsyncMock, patch
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware.auth import APIKeyMiddleware
+from app.middleware.cache import CacheControlMiddleware
+from app.middleware.early_hints import EarlyHintsMiddleware
+from app.middleware.identity import ServerSideIdentityMiddleware
+from app.middleware.security import SECURITY_HEADERS, SecurityHeadersMiddleware
+
+
+async def _page(request: Request):
+    return HTMLResponse(f"<p>{request.state.is_human}</p>")
+
+
+async def _cached_page(request: Request):
+    return HTMLResponse("<p>ok</p>", headers={"Cache-Control": "no-store"})
+
+
+async def _track(request: Request):
+    return JSONResponse({"client": request.state.client})
+
+
+def _client() -> TestClient:
+    app = Starlette(
+        routes=[
+            Route("/", _page),
+            Route("/nocache", _cached_page),
+            Route("/track/event", _track, methods=["POST"]),
+        ]
+    )
+    # Mismo orden que main.py
+    app.add_middleware(ServerSideIdentityMiddleware)
+    app.add_middleware(EarlyHintsMiddleware)
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(CacheControlMiddleware)
+    app.add_middleware(APIKeyMiddleware)
+    return TestClient(app, base_url="https://testserver")
+
+
+def test_html_page_gets_full_header_set_and_identity_cookies():
+    response = _client().get("/?fbclid=abc123", headers={"user-agent": "Googlebot/2.1"})
+
+    assert response.text == "<p>False</p>"  # bot detected before the route ran
+    for name, value in SECURITY_HEADERS.items():
+        assert response.headers[name] == value
+    assert "rel=preload" in response.headers["link"]
+    # Early hints sets Cache-Control first, so CDN-Cache-Control is not added
+    assert response.headers["cache-control"] == "public, max-age=3600, stale-while-revalidate=86400"
+    assert "cdn-cache-control" not in response.headers
+    cookies = response.headers.get_list("set-cookie")
+    assert any(c.startswith("_fbp=fb.1.") and "HttpOnly" in c and "Secure" in c for c in cookies)
+    assert any(c.startswith("_fbc=fb.1.") and c.split(";")[0].endswith(".abc123") for c in cookies)
+
+
+def test_route_headers_and_existing_cookies_are_respected():
+    client = _client()
+    client.cookies.set("_fbp", "fb.1.1.1")
+
+    response = client.get("/nocache")
+
+    assert response.headers["cache-control"] == "no-store"
+    assert "set-cookie" not in response.headers
+
+
+def test_track_routes_require_a_valid_api_key():
+    client = _client()
+    with patch(
+        "app.middleware.auth.ClientService.get_client_by_api_key", new_callable=AsyncMock
+    ) as lookup:
+        lookup.side_effect = lambda key: {"name": "Acme", "plan": "pro"} if key == "good" else None
+
+        assert client.post("/track/event").json() == {"client": None}
+        assert client.post("/track/event", headers={"X-API-Key": "bad"}).status_code == 401
+        ok = client.post("/track/event", headers={"X-API-Key": "good"})
+
+    assert ok.json()["client"]["name"] == "Acme"
+    assert "link" not in ok.headers  # JSON: no early hints
+    assert ok.headers["x-frame-options"] == "DENY"
@@ -32,10 +32,10 @@ async def test_send_event_async_non_blocking():
 
         # Mock DB save (via EventRepository)
         mock_repo = MagicMock()
-        mock_repo.save_emq_score = AsyncMock()
+        mock_repo.save_emq_scores = AsyncMock()
         async def blocking_save_async(*args, **kwargs):
             await asyncio.sleep(0.1)
-        mock_repo.save_emq_score.side_effect = blocking_save_async
+        mock_repo.save_emq_scores.side_effect = blocking_save_async
 
         # Mock Async Client
         mock_client = MagicMock()
@@ -48,7 +48,7 @@ async def test_send_event_async_non_blocking():
         # so we mock at the consumer level
         with patch("app.infrastructure.cache.redis_provider.RedisProvider.sync_client", new_callable=lambda: property(lambda self: mock_async_redis)), \
              patch("app.tracking.get_event_repository", return_value=mock_repo), \
-             patch("app.tracking.async_client", mock_client):
+             patch("app.tracking.http_clients.get", return_value=mock_client):
             
             # Measure execution time of the loop while send_event_async runs
             
@@ -94,3 +94,28 @@ async def test_send_event_async_non_blocking():
         settings.meta.pixel_id = original_pixel
         settings.meta.access_token = original_token
         settings.meta.sandbox_mode = original_sandbox
+
+
+@pytest.mark.asyncio
+async def test_send_event_async_joins_the_shared_capi_batcher():
+    """Handler path and outbox path coalesce in the same process-wide batcher."""
+    from app.infrastructure.external.meta_capi.tracker import shared_dispatcher
+
+    original_sandbox = settings.meta.sandbox_mode
+    settings.meta.sandbox_mode = False
+    mock_repo = MagicMock()
+    mock_repo.save_emq_scores = AsyncMock()
+    try:
+        with patch.object(shared_dispatcher(), "submit", AsyncMock(return_value=True)) as submit, \
+             patch("app.tracking.try_consume_event_async", AsyncMock(return_value=True)), \
+             patch("app.tracking.get_event_repository", return_value=mock_repo):
+            assert await send_event_async(
+                event_name="Lead",
+                event_source_url="http://example.com",
+                client_ip="127.0.0.1",
+                user_agent="test-agent",
+                event_id="test-shared-batcher",
+            )
+        assert submit.await_args.kwargs["urgent"] is True
+    finally:
+        settings.meta.sandbox_mode = original_sandbox
@@ -0,0 +1,126 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+from app.infrastructure.external.meta_capi.batcher import CAPIBatchDispatcher
+
+
+def _response(status_code: int, error_code: int = 100) -> MagicMock:
+    response = MagicMock()
+    response.status_code = status_code
+    response.text = ""
+    response.json.return_value = {"error": {"code": error_code}} if status_code >= 400 else {}
+    return response
+
+
+def _event(i: int) -> dict:
+    return {"event_name": "PageView", "event_id": f"evt_{i}"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_events_are_coalesced_into_one_request():
+    sender = AsyncMock(return_value=_response(200))
+    dispatcher = CAPIBatchDispatcher(sender, max_batch_size=50, max_linger_seconds=0.01)
+
+    results = await asyncio.gather(
+        *(dispatcher.submit(_event(i), "pixel-1", "token") for i in range(10))
+    )
+
+    assert results == [True] * 10
+    assert sender.await_count == 1
+    url, payload = sender.await_args.args
+    assert url == "https://graph.facebook.com/v21.0/pixel-1/events"
+    assert [e["event_id"] for e in payload["data"]] == [f"evt_{i}" for i in range(10)]
+    assert payload["access_token"] == "token"
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_per_pixel_and_by_size():
+    sender = AsyncMock(return_value=_response(200))
+    dispatcher = CAPIBatchDispatcher(sender, max_batch_size=3, max_linger_seconds=5)
+
+    # 3 events on pixel-a flush on size alone; pixel-b waits for flush_all
+    tasks = [asyncio.create_task(dispatcher.submit(_event(i), "pixel-a", "t")) for i in range(3)]
+    tasks.append(asyncio.create_task(dispatcher.submit(_event(9), "pixel-b", "t")))
+    await asyncio.gather(*tasks[:3])
+
+    assert sender.await_count == 1
+    assert dispatcher.pending_events == 1
+
+    await dispatcher.flush_all()
+    assert await tasks[3] is True
+    urls = [call.args[0] for call in sender.await_args_list]
+    assert urls[1].endswith("/pixel-b/events")
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_is_isolated_per_event():
+    async def sender(url, payload):
+        if len(payload["data"]) > 1:
+            return _response(400)
+        return _response(400 if payload["data"][0]["event_id"] == "evt_1" else 200)
+
+    dispatcher = CAPIBatchDispatcher(sender, max_batch_size=3, max_linger_seconds=1)
+    results = await asyncio.gather(
+        *(dispatcher.submit(_event(i), "pixel-1", "token") for i in range(3))
+    )
+
+    assert results == [True, False, True]
+    assert dispatcher.stats()["isolated_resends"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error_code", [17, 80004, 190])
+async def test_throttle_and_auth_errors_fail_the_batch_without_fan_out(error_code):
+    sender = AsyncMock(return_value=_response(400, error_code))
+    dispatcher = CAPIBatchDispatcher(sender, max_batch_size=3, max_linger_seconds=1)
+
+    results = await asyncio.gather(
+        *(dispatcher.submit(_event(i), "pixel-1", "token") for i in range(3))
+    )
+
+    assert results == [False] * 3
+    assert sender.await_count == 1
+    assert dispatcher.stats()["isolated_resends"] == 0
+
+
+@pytest.mark.asyncio
+async def test_transport_errors_propagate_to_every_caller():
+    sender = AsyncMock(side_effect=httpx.ConnectError("down"))
+    dispatcher = CAPIBatchDispatcher(sender, max_batch_size=2, max_linger_seconds=1)
+
+    results = await asyncio.gather(
+        *(dispatcher.submit(_event(i), "pixel-1", "token") for i in range(2)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, httpx.ConnectError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_urgent_event_flushes_without_waiting_for_linger():
+    sender = AsyncMock(return_value=_response(200))
+    dispatcher = CAPIBatchDispatcher(sender, max_batch_size=50, max_linger_seconds=5)
+
+    pageview = asyncio.create_task(dispatcher.submit(_event(1), "pixel-1", "token"))
+    await asyncio.sleep(0)
+    lead = {"event_name": "Lead", "event_id": "evt_lead"}
+    ok = await asyncio.wait_for(dispatcher.submit(lead, "pixel-1", "token", urgent=True), 1)
+
+    assert ok and await pageview
+    assert sender.await_count == 1
+    assert [e["event_id"] for e in sender.await_args.args[1]["data"]] == ["evt_1", "evt_lead"]
+    assert dispatcher.stats()["urgent_flushes"] == 1
+
+
+def test_meta_trackers_share_the_process_dispatcher():
+    from app.infrastructure.external.meta_capi.tracker import (
+        MetaTracker,
+        shared_dispatcher,
+    )
+
+    assert MetaTracker()._batcher is MetaTracker()._batcher is shared_dispatcher()
+    # Un cliente inyectado conserva su propio batcher
+    assert MetaTracker(http_client=AsyncMock())._batcher is not shared_dispatcher()
@@ -0,0 +1,77 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.infrastructure.external import circuit_breaker as cb
+from app.infrastructure.external.circuit_breaker import (
+    CircuitBreakerOpenException,
+    DistributedCircuitBreaker,
+)
+
+
+@pytest.fixture
+def redis():
+    cb._local_states.clear()
+    client = AsyncMock()
+    client.get.return_value = None
+    client.incr.side_effect = [1, 2, 3, 4, 5]
+    with patch("app.infrastructure.external.circuit_breaker.redis_provider") as provider:
+        provider.is_available = True
+        provider.async_client = client
+        yield client
+    cb._local_states.clear()
+
+
+async def _call(breaker, fail: bool = False):
+    async with breaker.execute():
+        if fail:
+            raise RuntimeError("upstream down")
+
+
+@pytest.mark.asyncio
+async def test_happy_path_reads_redis_once_and_never_writes(redis):
+    for _ in range(20):
+        await _call(DistributedCircuitBreaker("svc", refresh_interval_sec=60))
+
+    assert redis.get.await_count == 1
+    redis.set.assert_not_awaited()
+    redis.delete.assert_not_awaited()
+    redis.incr.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_threshold_opens_circuit_and_rejects_locally(redis):
+    breaker = DistributedCircuitBreaker("svc", failure_threshold=3, refresh_interval_sec=60)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            await _call(breaker, fail=True)
+
+    redis.set.assert_awaited_once_with("cb:svc:state", "OPEN", ex=30)
+    with pytest.raises(CircuitBreakerOpenException):
+        await _call(breaker)
+    assert redis.get.await_count == 1  # rejection answered from local state
+
+
+@pytest.mark.asyncio
+async def test_state_opened_by_another_instance_converges_on_refresh(redis):
+    breaker = DistributedCircuitBreaker("svc", refresh_interval_sec=0)
+    await _call(breaker)
+
+    redis.get.return_value = "OPEN"
+    with pytest.raises(CircuitBreakerOpenException):
+        await _call(breaker)
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_success_closes_circuit(redis):
+    breaker = DistributedCircuitBreaker(
+        "svc", failure_threshold=1, recovery_timeout_sec=0, refresh_interval_sec=60
+    )
+    with pytest.raises(RuntimeError):
+        await _call(breaker, fail=True)
+    assert cb._local_states["svc"].state == cb.OPEN
+
+    await _call(breaker)  # recovery elapsed → probe
+
+    assert cb._local_states["svc"].state == cb.CLOSED
+    redis.delete.assert_awaited_with("cb:svc:failures", "cb:svc:state", "cb:svc:halfopen")
@@ -0,0 +1,111 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+
+from app.domain.services.client_service import ClientService, hash_api_key
+
+ACME = ("1", "Acme", "px", "tok", "pro")
+COLUMNS = [("id",), ("name",), ("meta_pixel_id",), ("meta_access_token",), ("plan",)]
+
+
+class _FakeDB:
+    backend = "sqlite"
+
+    def __init__(self, keys):
+        self.keys = keys  # key_hash -> row
+        self.queries = 0
+
+    @asynccontextmanager
+    async def connection(self):
+        yield self
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+
+class _FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+        self.description = COLUMNS
+        self.rowcount = 0
+
+    async def execute(self, query, params=()):
+        self.db.queries += 1
+        await asyncio.sleep(0)
+        if query.lstrip().startswith("UPDATE"):
+            self.rowcount = int(self.db.keys.pop(params[0], None) is not None)
+        elif params:
+            row = self.db.keys.get(params[0])
+            self.rows = [row] if row else []
+        else:
+            self.description = [("key_hash",), *COLUMNS]
+            self.rows = [(h, *row) for h, row in self.db.keys.items()]
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self):
+        return self.rows
+
+
+@pytest.fixture
+def fake_db():
+    ClientService._key_cache.clear()
+    db = _FakeDB({hash_api_key("good"): ACME})
+    with patch("app.domain.services.client_service.db", db):
+        yield db
+    ClientService._key_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_valid_and_invalid_keys_hit_the_db_once(fake_db):
+    results = await asyncio.gather(*(ClientService.get_client_by_api_key("good") for _ in range(20)))
+    for _ in range(5):
+        assert await ClientService.get_client_by_api_key("bad") is None
+
+    assert all(r["name"] == "Acme" for r in results)
+    assert fake_db.queries == 2  # one coalesced lookup per key
+
+
+@pytest.mark.asyncio
+async def test_negative_entry_expires_and_is_dropped_on_create(fake_db):
+    assert await ClientService.get_client_by_api_key("later") is None
+
+    fake_db.keys[hash_api_key("later")] = ACME
+    assert await ClientService.get_client_by_api_key("later") is None  # still cached
+    ClientService.invalidate_api_key("later")
+    assert (await ClientService.get_client_by_api_key("later"))["id"] == "1"
+
+    ClientService._key_cache[hash_api_key("gone")] = (0.0, None)  # expired
+    assert await ClientService.get_client_by_api_key("gone") is None
+    assert fake_db.queries == 3
+
+
+@pytest.mark.asyncio
+async def test_preload_and_revoke(fake_db):
+    assert await ClientService.preload_active_keys() == 1
+    queries = fake_db.queries
+
+    assert (await ClientService.get_client_by_api_key("good"))["plan"] == "pro"
+    assert fake_db.queries == queries  # served from the preloaded table
+
+    assert await ClientService.revoke_api_key("good") is True
+    assert await ClientService.get_client_by_api_key("good") is None
+
+
+@pytest.mark.asyncio
+async def test_revoke_during_inflight_load_is_not_recached(fake_db):
+    original = _FakeCursor.fetchone
+
+    async def fetchone_then_revoke(self):
+        row = await original(self)
+        await ClientService.revoke_api_key("good")  # la revocación llega a mitad de la carga
+        return row
+
+    with patch.object(_FakeCursor, "fetchone", fetchone_then_revoke):
+        assert (await ClientService.get_client_by_api_key("good"))["id"] == "1"
+
+    assert await ClientService.get_client_by_api_key("good") is None
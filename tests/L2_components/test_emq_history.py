@@ -0,0 +1,102 @@
+import json
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from app.infrastructure.external.meta_capi.emq_validator import EMQValidator
+
+STRONG = {"em": "a" * 64, "ph": "b" * 64, "external_id": "x", "fbp": "fb.1.1.1"}
+
+
+def test_events_are_appended_and_daily_report_comes_from_aggregates(tmp_path):
+    store = str(tmp_path / "emq")
+    validator = EMQValidator(storage_path=store)
+
+    for i in range(5):
+        validator.validate_event("Lead", f"e{i}", STRONG)
+    validator.validate_event("PageView", "p1", {})
+
+    segment = tmp_path / "emq" / f"{datetime.utcnow():%Y-%m-%d}.jsonl"
+    lines = segment.read_text().splitlines()
+    assert len(lines) == 6 and json.loads(lines[-1])["event_id"] == "p1"
+
+    report = validator.get_daily_report()
+    assert report["total_events"] == 6
+    assert report["events_by_type"] == {"Lead": 5, "PageView": 1}
+    assert report["min_emq"] == 0.0
+    assert sum(report["level_distribution"].values()) == 6
+    validator.close()
+
+    # Restart: ring buffer and aggregates are rebuilt from the segments
+    reloaded = EMQValidator(storage_path=store)
+    assert reloaded.get_daily_report() == report
+    assert len(reloaded.events) == 6
+
+
+def test_ring_buffer_and_segments_are_bounded(tmp_path):
+    store = str(tmp_path / "emq")
+    with patch.object(EMQValidator, "MAX_EVENTS", 3), patch.object(EMQValidator, "MAX_SEGMENTS", 2):
+        validator = EMQValidator(storage_path=store)
+        start = datetime(2026, 1, 1, 12)
+        for day in range(4):
+            with patch(
+                "app.infrastructure.external.meta_capi.emq_validator.datetime"
+            ) as clock:
+                clock.utcnow.return_value = start + timedelta(days=day)
+                validator.validate_event("Lead", f"e{day}", STRONG)
+        validator.close()
+
+    assert len(validator.events) == 3
+    assert sorted(os.listdir(store)) == [
+        "2026-01-03.agg.json",
+        "2026-01-03.jsonl",
+        "2026-01-04.agg.json",
+        "2026-01-04.jsonl",
+    ]
+    assert sorted(validator.daily) == ["2026-01-03", "2026-01-04"]
+
+
+def test_restart_reads_saved_aggregates_lazily(tmp_path):
+    store = tmp_path / "emq"
+    validator = EMQValidator(storage_path=str(store))
+    for i in range(3):
+        validator.validate_event("Lead", f"e{i}", STRONG)
+    validator.close()
+
+    segment = store / f"{datetime.utcnow():%Y-%m-%d}.jsonl"
+    raw = segment.read_bytes()
+    first = raw.index(b"\n")
+    # Lines covered by the aggregate are not re-parsed; later lines are
+    segment.write_bytes(b"x" * first + raw[first:] + raw[first + 1 :].split(b"\n")[0] + b"\n")
+
+    reloaded = EMQValidator(storage_path=str(store))
+    assert reloaded.daily == {}  # nothing is read at construction
+    assert reloaded.get_daily_report()["total_events"] == 4
+    assert len(reloaded.events) == 3
+
+
+def test_legacy_json_history_is_migrated(tmp_path):
+    legacy = tmp_path / "emq.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "events": [
+                    {
+                        "event_name": "Lead",
+                        "event_id": "old",
+                        "timestamp": "2026-02-01T10:00:00",
+                        "emq_score": 8.0,
+                        "match_keys": {},
+                        "user_data": {},
+                    }
+                ]
+            },
+            indent=2,
+        )
+    )
+
+    validator = EMQValidator(storage_path=str(tmp_path / "emq"))
+
+    assert validator.get_daily_report(datetime(2026, 2, 1))["avg_emq"] == 8.0
+    assert (tmp_path / "emq" / "2026-02-01.jsonl").exists()
+    assert not legacy.exists()
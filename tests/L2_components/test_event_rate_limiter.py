@@ -0,0 +1,86 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.infrastructure.persistence.rate_limiter_events import EventRateLimiter
+
+
+def _local_limiter() -> EventRateLimiter:
+    limiter = EventRateLimiter(redis_client=MagicMock())
+    limiter.redis = None
+    limiter._async_redis = None
+    limiter._provider = MagicMock(async_client=None)
+    return limiter
+
+
+@pytest.mark.asyncio
+async def test_async_limiter_uses_a_single_eval_round_trip():
+    redis = AsyncMock()
+    redis.eval.return_value = [0, 1, 0]
+    limiter = EventRateLimiter(redis_client=MagicMock(), async_redis_client=redis)
+
+    allowed, reason = await limiter.is_allowed_async("user1", "Lead", event_id="evt_1")
+
+    assert (allowed, reason) == (True, "OK")
+    redis.eval.assert_awaited_once()
+    script, keys, args = redis.eval.await_args.args
+    assert script == EventRateLimiter.RATE_LIMIT_SCRIPT
+    assert keys == [
+        "rate_limit:user1:Lead",
+        "last_event:user1:Lead",
+        "event_dedup:user1:Lead:evt_1",
+    ]
+    assert args[1:5] == ["2", "3600", "300", "1"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "result, expected",
+    [
+        ([1, 0, 0], "Duplicate event_id"),
+        ([2, 2, 0], "Rate limit exceeded"),
+        ([3, 1, 4000], "Cooldown active: wait 4s"),
+    ],
+)
+async def test_script_result_codes_map_to_reasons(result, expected):
+    redis = AsyncMock()
+    redis.eval.return_value = result
+    limiter = EventRateLimiter(redis_client=MagicMock(), async_redis_client=redis)
+
+    allowed, reason = await limiter.is_allowed_async("user1", "Lead", event_id="evt_1")
+
+    assert allowed is False
+    assert reason.startswith(expected)
+
+
+@pytest.mark.asyncio
+async def test_local_sliding_window_keeps_default_limits():
+    limiter = _local_limiter()
+
+    with patch("app.infrastructure.persistence.rate_limiter_events.time.time") as clock:
+        clock.return_value = 1000.0
+        assert (await limiter.is_allowed_async("u", "PageView"))[0] is True
+        # Cooldown: 10s between PageViews
+        clock.return_value = 1005.0
+        assert "Cooldown" in (await limiter.is_allowed_async("u", "PageView"))[1]
+        clock.return_value = 1011.0
+        assert (await limiter.is_allowed_async("u", "PageView"))[0] is True
+        clock.return_value = 1022.0
+        assert (await limiter.is_allowed_async("u", "PageView"))[0] is True
+        # Max 3 per 60s
+        clock.return_value = 1033.0
+        assert "Rate limit" in (await limiter.is_allowed_async("u", "PageView"))[1]
+        # Window slides: the first event (t=1000) has left the window
+        clock.return_value = 1061.0
+        assert (await limiter.is_allowed_async("u", "PageView"))[0] is True
+
+
+@pytest.mark.asyncio
+async def test_local_fallback_rejects_duplicate_event_ids():
+    limiter = _local_limiter()
+
+    assert (await limiter.is_allowed_async("u", "Purchase", event_id="p1"))[0] is True
+    allowed, reason = await limiter.is_allowed_async("u", "Purchase", event_id="p1")
+
+    assert allowed is False
+    assert reason == "Duplicate event_id: p1"
@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.infrastructure.external.meta_capi.limiter import (
+    AdaptiveConcurrencyLimiter,
+    LimiterTimeout,
+    parse_usage,
+)
+
+
+def _response(status: int = 200, headers=None, body=None) -> httpx.Response:
+    return httpx.Response(status, headers=headers or {}, json=body or {"events_received": 1})
+
+
+def test_parse_usage_headers():
+    headers = httpx.Headers(
+        {
+            "x-app-usage": json.dumps({"call_count": 28, "total_time": 41, "total_cputime": 9}),
+            "x-business-use-case-usage": json.dumps(
+                {"123": [{"type": "ads_management", "call_count": 96,
+                          "estimated_time_to_regain_access": 2}]}
+            ),
+        }
+    )
+    assert parse_usage(headers) == (96.0, 120.0)
+    assert parse_usage(httpx.Headers({"x-app-usage": "not json"})) == (0.0, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_window_bounds_inflight_requests():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot() as permit:
+            peak = max(peak, limiter.inflight)
+            await asyncio.sleep(0.01)
+            permit.observe(_response())
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert peak == 2
+    assert limiter.inflight == 0 and limiter.stats()["waits"] >= 4
+
+
+@pytest.mark.asyncio
+async def test_additive_increase_when_saturated_and_hold_near_quota():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=10)
+    for _ in range(3):
+        async with limiter.slot() as permit:
+            permit.observe(_response())
+    # Solo crece con la ventana llena: 1 → 2, luego 1 en vuelo de 2 no la amplía
+    assert limiter.limit == 2
+
+    # Ventana llena pero uso cerca de la cuota: no crece
+    near_quota = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=10)
+    busy = _response(headers={"x-app-usage": json.dumps({"call_count": 80})})
+    async with near_quota.slot() as permit:
+        permit.observe(busy)
+    assert near_quota.limit == 1 and near_quota.usage == 80
+
+
+@pytest.mark.asyncio
+async def test_throttling_halves_window_once_per_cooldown_and_blocks_retries():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, cooldown=60)
+    throttled = _response(400, body={"error": {"code": 80004, "message": "too many calls"}})
+
+    for _ in range(3):
+        async with limiter.slot() as permit:
+            permit.observe(throttled)
+
+    assert limiter.limit == 8
+    assert limiter.stats()["throttled"] == 3 and limiter.stats()["decreases"] == 1
+    assert not limiter.allow_retry()
+
+
+@pytest.mark.asyncio
+async def test_errors_and_latency_gradient_shrink_window():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, cooldown=0)
+
+    with pytest.raises(httpx.ConnectError):
+        async with limiter.slot():
+            raise httpx.ConnectError("boom")
+    assert limiter.limit == 8 and limiter.inflight == 0
+
+    limiter._on_success(0.05)
+    limiter._on_success(1.0)  # latencia suavizada > 2x la base
+    assert limiter.limit == pytest.approx(7.2)
+
+
+@pytest.mark.asyncio
+async def test_regain_access_pauses_sends():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    blocked = _response(
+        429,
+        headers={
+            "x-business-use-case-usage": json.dumps(
+                {"1": [{"call_count": 100, "estimated_time_to_regain_access": 5}]}
+            )
+        },
+    )
+    async with limiter.slot() as permit:
+        permit.observe(blocked)
+
+    with pytest.raises(LimiterTimeout):
+        async with limiter.slot(timeout=1):
+            pass
+    assert limiter.stats()["paused_for_s"] > 250
+
+
+@pytest.mark.asyncio
+async def test_local_errors_do_not_shrink_window():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, cooldown=0)
+
+    # p. ej. CircuitBreakerOpenException: no hubo request a Graph API
+    with pytest.raises(RuntimeError):
+        async with limiter.slot():
+            raise RuntimeError("circuit open")
+    assert limiter.limit == 10 and limiter.inflight == 0
+    assert limiter.stats()["errors"] == 0
+
+
+def test_latency_baseline_is_kept_per_batch_size():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, cooldown=0)
+
+    for _ in range(5):
+        limiter._on_success(0.05, size=1)
+    # Un lote de 500 eventos tarda más por su tamaño, no porque Meta encole
+    for _ in range(5):
+        limiter._on_success(0.4, size=500)
+    assert limiter.limit == 10 and limiter.stats()["decreases"] == 0
+    assert limiter.baseline_latency(500) == pytest.approx(0.4)
+    assert limiter.stats()["baseline_ms"] == {"1": 50.0, "256-511": 400.0}
+
+    limiter._on_success(3.0, size=500)  # ahora sí: > 2x la base de su tamaño
+    assert limiter.limit == 9
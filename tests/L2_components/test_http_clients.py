@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from app.infrastructure.external.http_clients import UPSTREAMS, HTTPClientRegistry
+
+
+@pytest.mark.asyncio
+async def test_clients_are_pooled_per_upstream():
+    registry = HTTPClientRegistry()
+    await registry.open()
+
+    meta = registry.get("meta")
+    assert registry.get("meta") is meta
+    assert registry.get("turnstile") is not meta
+    assert registry.get_sync("n8n") is registry.get_sync("n8n")
+
+    await registry.aclose()
+    assert meta.is_closed
+    assert registry.get("meta") is not meta  # reopened lazily after close
+    await registry.aclose()
+
+
+def test_async_client_is_rebound_to_a_new_event_loop():
+    registry = HTTPClientRegistry()
+
+    async def _get():
+        return registry.get("qstash")
+
+    first = asyncio.run(_get())
+    second = asyncio.run(_get())
+
+    assert first is not second
+
+
+def test_unknown_upstream_is_rejected():
+    with pytest.raises(KeyError):
+        HTTPClientRegistry().get_sync("nope")
+    assert {"meta", "turnstile", "qstash", "tinybird", "n8n"} <= set(UPSTREAMS)
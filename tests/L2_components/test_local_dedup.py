@@ -0,0 +1,59 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.infrastructure.cache.local_dedup import BloomFilter, LocalDedupTier, TTLLRUSet
+from app.infrastructure.cache.redis_cache import RedisDeduplication
+
+
+def test_lru_evicts_oldest_and_expires_entries():
+    lru = TTLLRUSet(maxsize=2, ttl_seconds=60)
+    lru.add("a")
+    lru.add("b")
+    assert lru.add("c") == "a"
+    assert not lru.contains("a")
+    assert lru.contains("b") and lru.contains("c")
+
+    lru.add("short", ttl_seconds=1)
+    assert not lru.contains("short", now=10**12)
+
+
+def test_bloom_filter_remembers_evicted_keys():
+    tier = LocalDedupTier(max_entries=1, bloom_capacity=100)
+    tier.remember("evt:1")
+    tier.remember("evt:2")  # evicts evt:1 from the LRU into the Bloom filter
+
+    assert tier.seen("evt:1") is True
+    assert tier.seen("evt:2") is True
+    assert tier.seen("evt:never") is False
+    assert tier.stats()["bloom_hits"] == 1
+    assert tier.stats()["local_hits"] == 1
+
+
+def test_bloom_false_positive_rate_is_bounded():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"in:{i}")
+    false_positives = sum(f"out:{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+@pytest.mark.asyncio
+async def test_redis_is_only_called_for_possibly_new_ids():
+    redis = AsyncMock()
+    redis.set.return_value = True
+    tier = LocalDedupTier()
+
+    with patch("app.infrastructure.cache.redis_cache.local_dedup", tier), patch(
+        "app.infrastructure.cache.redis_cache.redis_provider"
+    ) as provider:
+        provider.async_client = redis
+        dedup = RedisDeduplication()
+
+        assert await dedup.is_unique("PageView:abc") is True
+        assert await dedup.is_unique("PageView:abc") is False
+        assert await dedup.is_unique("PageView:abc") is False
+
+    assert redis.set.await_count == 1
+    assert tier.stats()["local_hits"] == 2
+    assert tier.stats()["misses"] == 1
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from app.infrastructure.monitoring import LoopLagMonitor
+
+
+def _blocking_call(seconds: float) -> None:
+    time.sleep(seconds)  # sync I/O on the event loop
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_site_is_captured_and_ranked():
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+        _blocking_call(0.3)
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    snapshot = monitor.snapshot()
+    top = snapshot["top_blocking_sites"][0]
+    assert top["site"].startswith("tests/L2_components/test_loop_monitor.py")
+    assert top["site"].endswith("in _blocking_call")
+    assert top["count"] == 1 and top["max_ms"] >= 200
+    assert snapshot["lag"]["max_ms"] >= 200
+    assert snapshot["recent_stalls"][0]["site"] == top["site"]
+    assert not snapshot["running"]
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_records_lag_without_stalls():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.2)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    histogram = monitor.histogram()
+    assert histogram["count"] >= 3
+    assert histogram["buckets_ms"][-1] == ("+Inf", histogram["count"])
+    assert monitor.snapshot()["top_blocking_sites"] == []
+
+
+def test_idle_selector_frame_is_never_blamed():
+    import os
+    import traceback
+
+    from app.infrastructure.monitoring.loop_monitor import _PROJECT_ROOT
+
+    # Runtime empaquetado bajo el proyecto (p. ej. /var/task en serverless)
+    stack = traceback.StackSummary.from_list(
+        [
+            traceback.FrameSummary(os.path.join(_PROJECT_ROOT, "main.py"), 10, "serve"),
+            traceback.FrameSummary(
+                os.path.join(_PROJECT_ROOT, "runtime", "lib", "selectors.py"), 468, "select"
+            ),
+        ]
+    )
+
+    site, _ = LoopLagMonitor._blame(stack)
+    assert site == "main.py:10 in serve"
@@ -0,0 +1,112 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.infrastructure.cache.redis_provider import (
+    REDIS_ERRORS,
+    REDIS_LATENCY,
+    _InstrumentedRedis,
+)
+from app.infrastructure.config.settings import settings
+from app.infrastructure.external.http_clients import (
+    UPSTREAM_LATENCY,
+    _MeteredAsyncClient,
+    _metric_hooks,
+)
+from app.infrastructure.monitoring import MetricsRegistry
+from app.infrastructure.persistence.database import DB_ACQUIRE, db
+
+
+def test_text_exposition_format():
+    registry = MetricsRegistry()
+    hits = registry.counter("cache_hits_total", "Cache hits", ("tier",))
+    depth = registry.gauge("queue_depth", "Depth").set_function(lambda: 3)
+    latency = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+
+    hits.inc("local")
+    hits.inc("local", amount=2)
+    latency.observe(0.1, "get")
+    latency.observe(5, "get")
+
+    text = registry.render()
+    assert '# TYPE cache_hits_total counter\ncache_hits_total{tier="local"} 3' in text
+    assert "queue_depth 3" in text and depth.value() == 3
+    assert 'op_seconds_bucket{op="get",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="get",le="1"} 1' in text
+    assert 'op_seconds_bucket{op="get",le="+Inf"} 2' in text
+    assert 'op_seconds_sum{op="get"} 5.1' in text and 'op_seconds_count{op="get"} 2' in text
+    with pytest.raises(ValueError):
+        registry.gauge("cache_hits_total", "clash")
+
+
+@pytest.mark.asyncio
+async def test_upstream_hooks_and_db_acquire_are_timed():
+    before = UPSTREAM_LATENCY.count("tinybird", "202")
+    transport = httpx.MockTransport(lambda request: httpx.Response(202))
+    async with httpx.AsyncClient(
+        transport=transport, event_hooks=_metric_hooks("tinybird", is_async=True)
+    ) as client:
+        await client.post("https://api.tinybird.co/v0/events")
+    assert UPSTREAM_LATENCY.count("tinybird", "202") == before + 1
+
+    acquired = DB_ACQUIRE.count(db.backend)
+    async with db.connection():
+        pass
+    assert DB_ACQUIRE.count(db.backend) == acquired + 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_transport_errors_are_recorded():
+    def refuse(request):
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    before = UPSTREAM_LATENCY.count("qstash", "error")
+    async with _MeteredAsyncClient("qstash", transport=httpx.MockTransport(refuse)) as client:
+        with pytest.raises(httpx.ConnectTimeout):
+            await client.post("https://qstash.upstash.io/v2/publish")
+    assert UPSTREAM_LATENCY.count("qstash", "error") == before + 1
+
+
+class _Pending:
+    """Awaitable que no es coroutine function (como el cliente async de upstash)."""
+
+    def __init__(self, delay: float, error: Exception | None = None):
+        self._delay, self._error = delay, error
+
+    def __await__(self):
+        yield from asyncio.sleep(self._delay).__await__()
+        if self._error:
+            raise self._error
+        return "value"
+
+
+@pytest.mark.asyncio
+async def test_redis_awaitable_commands_are_timed_until_resolved():
+    client = MagicMock()
+    client.get = lambda key: _Pending(0.05)
+    client.eval = lambda script: _Pending(0.0, ConnectionError("reset"))
+    redis = _InstrumentedRedis(client, "async_test")
+
+    assert await redis.get("k") == "value"
+    with pytest.raises(ConnectionError):
+        await redis.eval("return 1")
+
+    assert REDIS_LATENCY.count("async_test", "get") == 1
+    assert REDIS_LATENCY._series[("async_test", "get")][-2] >= 0.05
+    assert REDIS_ERRORS.value("async_test", "eval") == 1
+
+
+def test_metrics_endpoint_reports_route_templates():
+    from main import app
+
+    with TestClient(app) as client:
+        client.get("/track/health")
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"x-admin-key": settings.ADMIN_KEY})
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/track/health",status="200"}' in response.text
+    assert "http_request_duration_seconds_bucket" in response.text
@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.outbox_dispatcher import OutboxDispatcher
+
+
+@pytest.fixture
+def relay():
+    with patch(
+        "app.services.outbox_dispatcher.OutboxRelay.process_pending_events",
+        new_callable=AsyncMock,
+    ) as process, patch("app.services.outbox_dispatcher.db") as db:
+        db.backend = "sqlite"
+        process.return_value = 0
+        yield process
+
+
+@pytest.mark.asyncio
+async def test_notify_wakes_loop_and_drains_until_empty(relay):
+    dispatcher = OutboxDispatcher(batch_size=5, fallback_poll_interval=60)
+    dispatcher.start()
+    await asyncio.sleep(0)
+
+    relay.side_effect = [5, 2, 0]
+    dispatcher.notify()
+    await asyncio.sleep(0.05)
+
+    assert relay.await_count == 3
+    assert dispatcher.delivered == 7
+    relay.side_effect = None
+    await dispatcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_polling_fallback_without_notify(relay):
+    dispatcher = OutboxDispatcher(fallback_poll_interval=0.01)
+    dispatcher.start()
+    await asyncio.sleep(0.05)
+    await dispatcher.stop()
+
+    assert relay.await_count >= 2
+
+
+@pytest.mark.asyncio
+async def test_stop_runs_a_final_drain(relay):
+    dispatcher = OutboxDispatcher(fallback_poll_interval=60)
+    dispatcher.start()
+    await asyncio.sleep(0)
+
+    relay.side_effect = [3, 0]
+    await dispatcher.stop(timeout=1)
+
+    assert dispatcher.delivered == 3
+    assert not dispatcher.running
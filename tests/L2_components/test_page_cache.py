@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from jinja2 import DictLoader, Environment
+
+from app.interfaces.api.page_cache import PageRenderCache
+
+TEMPLATES = {
+    "page.html": (
+        "<h1>{{ title }}</h1>"
+        '<script>window.ID = "{{ external_id }}"; window.EV = "{{ pageview_event_id }}";</script>'
+    )
+}
+
+
+def _cache(**kwargs):
+    return PageRenderCache(Environment(loader=DictLoader(TEMPLATES), autoescape=True), **kwargs)
+
+
+def _request(host="https://example.com/"):
+    return SimpleNamespace(base_url=host)
+
+
+def test_shell_is_rendered_once_and_identity_is_spliced():
+    cache = _cache()
+    content = [{"title": "v1"}]
+
+    first = cache.render(
+        _request(), "page.html", {"title": "Hola"}, {"external_id": "abc", "pageview_event_id": "1"},
+        content=content,
+    )
+    second = cache.render(
+        _request(), "page.html", {"title": "Hola"}, {"external_id": '"><x>', "pageview_event_id": "2"},
+        content=content,
+    )
+
+    assert 'window.ID = "abc"; window.EV = "1"' in first.body.decode()
+    body = second.body.decode()
+    assert "&#34;&gt;&lt;x&gt;" in body and "<x>" not in body
+    assert "__pc_" not in body
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_content_change_host_and_variant_are_separate_entries():
+    cache = _cache()
+    identity = {"external_id": "abc"}
+
+    cache.render(_request(), "page.html", {"title": "A"}, identity, content=[{"v": 1}])
+    cache.render(_request(), "page.html", {"title": "B"}, identity, content=[{"v": 2}])
+    cache.render(_request("http://localhost/"), "page.html", {}, identity, content=[{"v": 2}])
+    cache.render(_request(), "page.html", {}, identity, variant=("lips",), content=[{"v": 2}])
+
+    assert cache.stats()["misses"] == 4 and cache.stats()["hits"] == 0
+
+
+def test_lru_evicts_oldest_shell():
+    cache = _cache(max_entries=1)
+
+    cache.render(_request(), "page.html", {}, {}, variant=("a",))
+    cache.render(_request(), "page.html", {}, {}, variant=("b",))
+    cache.render(_request(), "page.html", {}, {}, variant=("a",))
+
+    stats = cache.stats()
+    assert stats["evictions"] == 2 and stats["entries"] == 1 and stats["hits"] == 0
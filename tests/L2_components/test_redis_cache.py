@@ -0,0 +1,54 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.cache import RedisCache
+from app.services import ContentManager
+
+
+@pytest.fixture
+def redis():
+    client = AsyncMock()
+    with patch("app.cache.redis_provider") as provider:
+        provider.async_client = client
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_get_many_is_one_mget(redis):
+    redis.mget.return_value = [json.dumps({"a": 1}), None]
+
+    result = await RedisCache().get_many(["k1", "k2"])
+
+    assert result == {"k1": {"a": 1}}
+    redis.mget.assert_awaited_once_with("k1", "k2")
+    redis.get.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_slow_redis_degrades_to_a_miss(redis):
+    async def _slow(*_):
+        await asyncio.sleep(1)
+
+    redis.get.side_effect = _slow
+
+    assert await RedisCache(read_timeout=0.01).get_json("k") is None
+
+
+@pytest.mark.asyncio
+async def test_content_manager_batches_ram_misses():
+    ContentManager._ram_cache.clear()
+    contact = {"whatsapp": "https://wa.me/1"}
+
+    with patch("app.services.redis_cache.get_many", new_callable=AsyncMock) as get_many, patch.object(
+        ContentManager, "_refresh_in_background", new_callable=AsyncMock
+    ):
+        get_many.return_value = {"content:contact_config": contact}
+        result = await ContentManager.get_many(["services_config", "contact_config"])
+
+    get_many.assert_awaited_once_with(["content:services_config", "content:contact_config"])
+    assert result["contact_config"] == contact
+    assert result["services_config"][0]["id"] == "microblading"  # fallback
+    ContentManager._ram_cache.clear()
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app import retry_queue
+from app.retry_queue import DLQ_KEY, LEGACY_DLQ_KEY, POP_DUE_SCRIPT, RedisDLQ
+
+
+def _item(attempt: int = 1, event_name: str = "Lead") -> dict:
+    return {
+        "id": f"id_{attempt}_{event_name}",
+        "event_name": event_name,
+        "payload": {"event_id": "evt_1", "user_data": {}},
+        "failed_at": 0,
+        "attempt": attempt,
+        "next_retry": 100,
+    }
+
+
+@pytest.fixture
+def redis():
+    client = AsyncMock()
+    with patch("app.retry_queue.redis_provider") as provider:
+        provider.async_client = client
+        provider.sync_client = MagicMock()
+        yield provider
+
+
+def test_push_schedules_by_next_retry(redis):
+    RedisDLQ().push("Lead", {"event_id": "evt_1"}, attempt=2)
+
+    key, mapping = redis.sync_client.zadd.call_args.args
+    assert key == DLQ_KEY
+    (member, score), = mapping.items()
+    assert json.loads(member)["next_retry"] == score
+    assert json.loads(member)["attempt"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pop_due_is_a_single_round_trip(redis):
+    redis.async_client.eval.return_value = [json.dumps(_item())]
+
+    items = await RedisDLQ().pop_due(batch_size=20, now=500)
+
+    assert [i["event_name"] for i in items] == ["Lead"]
+    redis.async_client.eval.assert_awaited_once_with(
+        POP_DUE_SCRIPT, [DLQ_KEY, LEGACY_DLQ_KEY], ["500", "20"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_due_items_are_retried_concurrently_and_failures_requeued_once(redis):
+    items = [json.dumps(_item(1, f"E{i}")) for i in range(4)] + [json.dumps(_item(5, "Last"))]
+    redis.async_client.eval.return_value = items
+    in_flight, peak = 0, 0
+
+    async def _retry(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return item["event_name"] == "E0"
+
+    with patch.object(retry_queue, "_retry_item", side_effect=_retry), patch.object(
+        retry_queue, "dlq", RedisDLQ()
+    ) as dlq:
+        await retry_queue.process_retry_queue(batch_size=10, concurrency=3)
+
+    assert peak == 3
+    redis.async_client.zadd.assert_awaited_once()
+    requeued = [json.loads(m) for m in redis.async_client.zadd.await_args.args[1]]
+    assert sorted(i["event_name"] for i in requeued) == ["E1", "E2", "E3"]
+    assert all(i["attempt"] == 2 for i in requeued)
+    assert dlq.counters == {"recovered": 1, "requeued": 3, "dropped": 1}
+
+
+@pytest.mark.asyncio
+async def test_stats_report_depth_due_and_lag(redis):
+    redis.async_client.eval.return_value = [7, 2, "1000"]
+
+    with patch("app.retry_queue.time.time", return_value=1030):
+        stats = await RedisDLQ().stats()
+
+    assert stats["depth"] == 7
+    assert stats["due"] == 2
+    assert stats["max_lag_seconds"] == 30
@@ -0,0 +1,50 @@
+import copy
+from unittest.mock import patch
+
+from app.services import ContentManager
+from app.services.seo_engine import SEOBundleCache, SEOEngine
+
+
+def _services():
+    return copy.deepcopy(ContentManager._FALLBACKS["services_config"])
+
+
+def test_bundles_match_inline_rendering():
+    services = _services()
+    cache = SEOBundleCache()
+
+    home = cache.get("/", services)
+    service = cache.get_service("lips", services[3], services)
+
+    expected_home = SEOEngine.generate_all_json_ld(
+        [
+            SEOEngine.get_global_schema(),
+            SEOEngine.get_breadcrumb_schema([{"name": "Inicio", "path": "/"}]),
+        ]
+    )
+    assert home["json_ld"] == expected_home
+    assert home["canonical"] == "https://jorgeaguirreflores.com/"
+    assert service["title"] == "Labios Velvet Gloss | Jorge Aguirre Flores Elite"
+    assert '"@type": "Service"' in service["json_ld"]
+    assert "json_ld" not in cache.get("/onboarding", services)
+
+
+def test_lookups_do_not_rebuild_until_content_changes():
+    services = _services()
+    cache = SEOBundleCache()
+    version = cache.build(services)
+
+    with patch.object(SEOEngine, "generate_all_json_ld") as render:
+        for _ in range(100):
+            cache.get("/", services)
+            cache.get_service("brows", services[2], services)
+        # Same content in a new object: hash matches, nothing is rebuilt
+        assert cache.build(_services()) == version
+    render.assert_not_called()
+
+    changed = _services()
+    changed[0]["title"] = "Microblading 4D"
+    assert cache.build(changed) != version
+    assert cache.get_service("microblading", changed[0], changed)["title"].startswith(
+        "Microblading 4D"
+    )
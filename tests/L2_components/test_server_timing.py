@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.infrastructure.config.settings import settings
+from app.infrastructure.monitoring import server_timing
+from app.infrastructure.persistence.database import db
+
+
+def test_phases_are_noop_without_active_timer():
+    assert server_timing.current() is None
+    with server_timing.phase("content"):
+        pass
+    server_timing.record("db", 0.5)
+    assert server_timing.current() is None
+
+
+@pytest.mark.asyncio
+async def test_timer_accumulates_phases_and_db_time():
+    token = server_timing.activate()
+    try:
+        with server_timing.phase("content"):
+            await asyncio.sleep(0.01)
+        server_timing.record("redis", 0.002)
+        server_timing.record("redis", 0.003)
+        async with db.connection():
+            pass
+        timer = server_timing.current()
+        phases = timer.phases()
+    finally:
+        server_timing.deactivate(token)
+
+    assert phases["content"] >= 0.01
+    assert phases["redis"] == pytest.approx(0.005)
+    assert "db" in phases
+    header = timer.header_value(total=0.05)
+    assert 'redis;dur=5.0;desc="2 calls"' in header
+    assert header.endswith("app;dur=50.0")
+    assert server_timing.current() is None
+
+
+def test_header_only_on_admin_opt_in_or_sample(monkeypatch):
+    from main import app
+
+    admin = {"X-Server-Timing": "1", "X-Admin-Key": settings.ADMIN_KEY}
+    with TestClient(app) as client:
+        plain = client.get("/track/health")
+        anonymous = client.get("/track/health", headers={"X-Server-Timing": "1"})
+        opted = client.get("/track/health", headers=admin)
+        page = client.get("/", headers=admin)
+        monkeypatch.setattr(settings.features, "server_timing_sample_rate", 1.0)
+        sampled = client.get("/track/health")
+        sampled_page = client.get("/")
+
+    assert "server-timing" not in plain.headers
+    assert "server-timing" not in anonymous.headers
+    assert "app;dur=" in opted.headers["server-timing"]
+    assert "server-timing" in sampled.headers
+    for name in ("content", "identity", "seo", "splice"):
+        assert f"{name};dur=" in page.headers["server-timing"]
+    # Timings never reach a shared cache
+    assert page.headers["cache-control"] == "private, no-store"
+    assert "cdn-cache-control" not in page.headers
+    assert "public" in sampled_page.headers["cache-control"]
+    assert "server-timing" not in sampled_page.headers
@@ -0,0 +1,57 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.infrastructure.cache.single_flight import SingleFlight
+from app.services import ContentManager
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def _load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(flight.do("k", _load) for _ in range(50)))
+
+    assert results == ["value"] * 50
+    assert calls == 1
+    assert flight.stats()["coalesced"] == 49
+    assert not flight.is_refreshing("k")
+
+
+@pytest.mark.asyncio
+async def test_schedule_drops_duplicates_while_in_flight_including_jitter():
+    flight = SingleFlight(jitter=0.02)
+    refresh = AsyncMock()
+
+    assert flight.schedule("k", refresh) is True
+    assert flight.is_refreshing("k")  # flag is set during the jitter delay
+    assert flight.schedule("k", refresh) is False
+    assert flight.schedule("other", refresh, jitter=0) is True
+
+    await asyncio.sleep(0.05)
+    assert refresh.await_count == 2
+    assert flight.schedule("k", refresh) is True  # free again once finished
+    await asyncio.sleep(0.05)
+
+
+@pytest.mark.asyncio
+async def test_stale_content_triggers_a_single_refresh():
+    ContentManager._ram_cache["services_config"] = [{"id": "x"}]
+    ContentManager._cache_times["services_config"] = 0  # stale
+
+    with patch.object(
+        ContentManager, "_refresh_flight", SingleFlight(jitter=0)
+    ), patch.object(ContentManager, "_refresh_in_background", new_callable=AsyncMock) as refresh:
+        await asyncio.gather(*(ContentManager.get_content("services_config") for _ in range(100)))
+        await asyncio.sleep(0.01)
+
+    assert refresh.await_count == 1
+    ContentManager._ram_cache.clear()
@@ -0,0 +1,218 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.infrastructure.monitoring import server_timing
+from app.services.work_queue import LaneConfig, WorkQueue
+
+
+@pytest.mark.asyncio
+async def test_runs_async_and_sync_tasks_per_lane():
+    queue = WorkQueue([LaneConfig("io", concurrency=2), LaneConfig("blocking", concurrency=1)])
+    done = []
+
+    async def send(value):
+        await asyncio.sleep(0)
+        done.append(("async", value))
+
+    def save(value, suffix=""):
+        done.append((threading.current_thread().name, value + suffix))
+
+    assert queue.submit("io", send, 1)
+    assert queue.submit("blocking", save, "v", suffix="!")
+    await queue.join()
+
+    assert ("async", 1) in done
+    assert any(name.startswith("work-blocking") and value == "v!" for name, value in done)
+    stats = queue.stats()
+    assert stats["io"]["completed"] == 1 and stats["blocking"]["completed"] == 1
+    await queue.drain()
+
+
+@pytest.mark.asyncio
+async def test_bounded_concurrency_and_overflow_policies():
+    queue = WorkQueue(
+        [
+            LaneConfig("strict", concurrency=1, max_queue=2, overflow="reject"),
+            LaneConfig("lossy", concurrency=1, max_queue=2, overflow="drop_oldest"),
+        ]
+    )
+    gate = asyncio.Event()
+    seen = []
+
+    async def job(lane, value):
+        await gate.wait()
+        seen.append((lane, value))
+
+    for lane in ("strict", "lossy"):
+        queue.submit(lane, job, lane, 0)
+    await asyncio.sleep(0)  # cada worker toma su primer job y queda bloqueado
+
+    results = [queue.submit("strict", job, "strict", i) for i in (1, 2, 3)]
+    for i in (1, 2, 3):
+        queue.submit("lossy", job, "lossy", i)
+    assert results == [True, True, False]
+    assert queue.depths() == {"strict": 2, "lossy": 2}
+
+    gate.set()
+    await queue.join()
+    assert [v for lane, v in seen if lane == "strict"] == [0, 1, 2]
+    assert [v for lane, v in seen if lane == "lossy"] == [0, 2, 3]
+    stats = queue.stats()
+    assert stats["strict"]["rejected"] == 1 and stats["lossy"]["shed"] == 1
+    await queue.drain()
+
+
+@pytest.mark.asyncio
+async def test_submit_wait_applies_backpressure_and_failures_are_counted():
+    queue = WorkQueue([LaneConfig("lane", concurrency=1, max_queue=1)])
+
+    async def slow():
+        await asyncio.sleep(0.05)
+
+    async def boom():
+        raise RuntimeError("boom")
+
+    queue.submit("lane", slow)
+    await asyncio.sleep(0)
+    queue.submit("lane", boom)
+    # La cola está llena: espera a que el worker libere hueco en vez de descartar
+    assert await queue.submit_wait("lane", slow, timeout=1.0)
+    await queue.join()
+    stats = queue.stats()["lane"]
+    assert stats["completed"] == 2 and stats["failed"] == 1 and stats["rejected"] == 0
+    await queue.drain()
+
+
+@pytest.mark.asyncio
+async def test_workers_do_not_inherit_request_context_and_drain_on_shutdown():
+    queue = WorkQueue([LaneConfig("lane", concurrency=1)], drain_timeout=1.0)
+    timers = []
+
+    async def job():
+        await asyncio.sleep(0.01)
+        timers.append(server_timing.current())
+
+    token = server_timing.activate()
+    try:
+        for _ in range(3):
+            queue.submit("lane", job)
+    finally:
+        server_timing.deactivate(token)
+
+    await queue.drain()
+    assert timers == [None, None, None]
+    assert queue.depths() == {"lane": 0}
+
+
+@pytest.mark.asyncio
+async def test_weighted_lanes_favour_conversions_and_reserve_workers():
+    queue = WorkQueue(
+        [
+            LaneConfig("conversions", concurrency=2, group="events", weight=4),
+            LaneConfig("engagement", concurrency=1, group="events", weight=1),
+        ]
+    )
+    order = []
+    gate = asyncio.Event()
+
+    async def job(lane):
+        await gate.wait()
+        await asyncio.sleep(0)  # I/O real: cede el loop entre jobs
+        order.append(lane)
+
+    for _ in range(10):
+        queue.submit("engagement", job, "engagement")
+    await asyncio.sleep(0)
+    # Pool de 2 workers: engagement no puede ocupar más de 1 aunque tenga cola
+    assert queue.stats()["engagement"]["active"] == 1
+
+    for _ in range(5):
+        queue.submit("conversions", job, "conversions")
+    await asyncio.sleep(0)
+    # El worker reservado toma la conversión sin esperar al engagement
+    assert queue.stats()["conversions"]["active"] == 1
+
+    gate.set()
+    await queue.join()
+    # Las 5 conversiones terminan antes que la mayoría del engagement
+    assert order.index("conversions") < 2
+    assert max(i for i, lane in enumerate(order) if lane == "conversions") <= 7
+    await queue.drain()
+
+
+@pytest.mark.asyncio
+async def test_sample_policy_sheds_engagement_before_queue_is_full(monkeypatch):
+    queue = WorkQueue(
+        [LaneConfig("engagement", concurrency=1, max_queue=10, overflow="sample", shed_above=0.5)]
+    )
+    gate = asyncio.Event()
+
+    async def job():
+        await gate.wait()
+
+    queue.submit("engagement", job)
+    await asyncio.sleep(0)
+    monkeypatch.setattr("app.services.work_queue.random.random", lambda: 0.5)
+    admitted = [queue.submit("engagement", job) for _ in range(20)]
+
+    # 5 admitidas hasta el umbral; luego solo mientras la fracción admitida > 0.5
+    assert admitted.count(True) == 8
+    assert queue.stats()["engagement"]["shed"] == 12
+    gate.set()
+    await queue.drain()
+
+
+def test_lane_for_event_routes_conversions():
+    from app.services.work_queue import lane_for_event
+
+    assert lane_for_event("Lead") == "conversions"
+    assert lane_for_event("Purchase") == "conversions"
+    assert lane_for_event("PageView") == "engagement"
+    assert lane_for_event("SliderInteraction") == "engagement"
+
+
+@pytest.mark.asyncio
+async def test_request_scope_runs_tasks_before_the_call_returns():
+    queue = WorkQueue(
+        [LaneConfig("engagement", weight=1), LaneConfig("conversions", weight=4)],
+        request_scoped=True,
+    )
+    done = []
+
+    async with queue.request_scope():
+        assert queue.submit("engagement", done.append, "view")
+        assert queue.submit("conversions", done.append, "lead")
+        assert done == []  # nada corre mientras se atiende el request
+
+    assert done == ["lead", "view"]
+    assert queue.stats()["conversions"]["completed"] == 1
+    assert queue.depths() == {"engagement": 0, "conversions": 0}
+
+
+@pytest.mark.asyncio
+async def test_scope_middleware_flushes_emq_rows_before_returning():
+    from unittest.mock import AsyncMock, patch
+
+    from app.infrastructure.persistence.write_behind import WriteBehindBuffer
+    from app.middleware.work_scope import WorkQueueScopeMiddleware
+
+    queue = WorkQueue([LaneConfig("engagement")], request_scoped=True)
+    writer = AsyncMock()
+    buffer = WriteBehindBuffer("emq_scores", writer=writer, max_linger_seconds=60)
+
+    async def log_emq(row):
+        buffer.add(row)
+
+    async def app(scope, receive, send):
+        queue.submit("engagement", log_emq, ("client", "PageView", 7.5, 120, True))
+
+    with patch("app.middleware.work_scope.work_queue", queue), patch(
+        "app.tracking.emq_buffer", buffer
+    ):
+        await WorkQueueScopeMiddleware(app)({"type": "http"}, None, None)
+
+    # Sin esperar al timer de 60 s: la instancia puede congelarse al volver
+    writer.assert_awaited_once()
+    assert buffer.pending_rows == 0
@@ -0,0 +1,65 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.infrastructure.persistence.write_behind import WriteBehindBuffer
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_size_and_by_linger():
+    writer = AsyncMock()
+    buffer = WriteBehindBuffer("t", writer, max_rows=3, max_linger_seconds=0.05)
+
+    for i in range(4):
+        buffer.add((i,))
+    await asyncio.sleep(0)
+    writer.assert_awaited_once_with([(0,), (1,), (2,)])
+
+    await asyncio.sleep(0.1)  # the 4th row waits for the linger timer
+    assert writer.await_args_list[-1].args == ([(3,)],)
+    assert buffer.stats()["flushes"] == 2 and buffer.pending_rows == 0
+
+
+@pytest.mark.asyncio
+async def test_flush_all_drains_and_failed_rows_are_retried():
+    writer = AsyncMock(side_effect=[RuntimeError("db down"), None])
+    buffer = WriteBehindBuffer("t", writer, max_rows=100, max_linger_seconds=60)
+
+    buffer.add(("a",))
+    buffer.add(("b",))
+    await buffer.flush_all()
+    assert buffer.pending_rows == 2  # kept for the next flush
+
+    await buffer.flush_all()
+    assert writer.await_args_list[-1].args == ([("a",), ("b",)],)
+    assert buffer.stats()["failed_flushes"] == 1 and buffer.stats()["dropped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_overflow_is_dropped_and_counted():
+    buffer = WriteBehindBuffer("t", AsyncMock(), max_rows=2, max_linger_seconds=60, max_pending=2)
+    buffer._flush = lambda: None  # writer never catches up
+
+    for i in range(5):
+        buffer.add((i,))
+
+    assert buffer.pending_rows == 2 and buffer.stats()["dropped"] == 3
+
+
+@pytest.mark.asyncio
+async def test_emq_scores_are_buffered_and_bulk_inserted():
+    from app.tracking import _log_emq, emq_buffer
+
+    payload = {"data": [{"user_data": {"em": "x", "external_id": "e"}}]}
+    repo = AsyncMock()
+    with patch("app.tracking.get_event_repository", return_value=repo):
+        await emq_buffer.flush_all()  # rows left by other tests
+        repo.reset_mock()
+        for _ in range(3):
+            await _log_emq("Lead", payload, client_id="c1")
+        repo.save_emq_scores.assert_not_awaited()
+        await emq_buffer.flush_all()
+
+    (rows,) = repo.save_emq_scores.await_args.args
+    assert len(rows) == 3 and rows[0][:2] == ("c1", "Lead") and rows[0][4] is True
@@ -0,0 +1,50 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.infrastructure.persistence.database import Database
+
+
+def _pg_settings():
+    return SimpleNamespace(
+        db=SimpleNamespace(
+            url="postgresql://u:p@db.example.com:6543/postgres?pgbouncer=true",
+            is_configured=True,
+            pool_min_size=1,
+            pool_size=5,
+            pool_timeout=30,
+            pool_max_idle=300,
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_postgres_pool_is_lazy_bounded_and_pgbouncer_safe():
+    fake_pool = MagicMock()
+    fake_pool.open = AsyncMock()
+
+    with patch("psycopg_pool.AsyncConnectionPool", return_value=fake_pool) as pool_cls:
+        database = Database(settings=_pg_settings())
+        assert pool_cls.call_count == 0  # nothing opened at import/instantiation
+
+        pools = await asyncio.gather(*(database._get_pool() for _ in range(5)))
+
+    assert all(p is fake_pool for p in pools)
+    pool_cls.assert_called_once()
+    args, kwargs = pool_cls.call_args
+    assert args[0] == "postgresql://u:p@db.example.com:6543/postgres"
+    assert kwargs["max_size"] == 5
+    assert kwargs["open"] is False
+    assert kwargs["kwargs"]["prepare_threshold"] is None
+    assert kwargs["kwargs"]["sslmode"] == "require"
+    fake_pool.open.assert_awaited_once_with(wait=False)
+
+
+@pytest.mark.asyncio
+async def test_sqlite_connection_exposes_async_cursor(db_sqlite):
+    async with db_sqlite.connection() as conn:
+        cur = conn.cursor()
+        await cur.execute("SELECT ?", (1,))
+        assert await cur.fetchone() == (1,)
@@ -71,17 +71,32 @@ async def test_meta_tracker_circuit_breaker_integration():
         assert result is False
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("event_name, urgent", [(EventName.LEAD, True), (EventName.PAGE_VIEW, False)])
+async def test_meta_tracker_flushes_conversions_immediately(event_name, urgent):
+    """Lead/Purchase se envían sin esperar el linger del batcher."""
+    event = TrackingEvent.create(
+        event_name=event_name,
+        external_id=ExternalId("a" * 32),
+        source_url="https://test.com",
+    )
+    visitor = Visitor.create(ip="127.0.0.1", user_agent="pytest")
+
+    tracker = MetaTracker(http_client=AsyncMock())
+    tracker._enabled = True
+    tracker._dispatcher = MagicMock()
+    tracker._dispatcher.submit = AsyncMock(return_value=True)
+
+    assert await tracker.track(event, visitor) is True
+    assert tracker._dispatcher.submit.await_args.kwargs["urgent"] is urgent
+
+
 @pytest.mark.asyncio
 async def test_outbox_relay_processing_logic():
     """
     Verifies that OutboxRelay correctly fetches 'pending' events,
     processes them, and marks them 'completed'.
     """
-    # Mock Database interaction
-    mock_db = MagicMock()
-    mock_conn = AsyncMock()
-    mock_cur = MagicMock()
-    
     # Mock fetching pending rows
     fake_row = {
         "id": "outbox_123",
@@ -91,16 +106,35 @@ async def test_outbox_relay_processing_logic():
         "payload": json.dumps({"event_name": "PageView", "source_url": "test.com"})
     }
     
-    with patch("app.services.outbox_relay.db", mock_db):
-        mock_db.connection.return_value.__aenter__.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cur
-        
-        with patch("app.services.outbox_relay.OutboxRelay._fetch_pending", return_value=[fake_row]):
+    with patch("app.services.outbox_relay.OutboxRelay._claim_pending", new_callable=AsyncMock, return_value=[fake_row]):
+        with patch("app.services.outbox_relay.OutboxRelay._mark_batch", new_callable=AsyncMock) as mock_mark:
             with patch("app.services.outbox_relay.OutboxRelay._process_single", new_callable=AsyncMock) as mock_process:
-                mock_process.return_value = True
+                mock_process.return_value = (True, None)
                 
                 # Run the relay
                 processed_count = await OutboxRelay.process_pending_events(batch_size=10)
                 
                 assert processed_count == 1
                 mock_process.assert_called_once()
+                mock_mark.assert_awaited_once_with(["outbox_123"], [])
+
+
+@pytest.mark.asyncio
+async def test_limiter_timeout_does_not_trip_the_breaker():
+    """Sin hueco en la ventana no se envía nada: no es un fallo de Meta."""
+    from app.infrastructure.external.meta_capi import tracker as tracker_module
+    from app.infrastructure.external.meta_capi.limiter import LimiterTimeout
+
+    slot = MagicMock()
+    slot.__aenter__ = AsyncMock(side_effect=LimiterTimeout("no Graph API slot"))
+    slot.__aexit__ = AsyncMock(return_value=False)
+    client = AsyncMock()
+
+    with patch.object(tracker_module.graph_limiter, "slot", return_value=slot), patch.object(
+        DistributedCircuitBreaker, "record_failure", new_callable=AsyncMock
+    ) as record_failure:
+        with pytest.raises(LimiterTimeout):
+            await tracker_module._post_batch(client, "https://graph.facebook.com", {"data": []})
+
+    record_failure.assert_not_awaited()
+    client.post.assert_not_awaited()
@@ -0,0 +1,143 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services.outbox_relay import OutboxRelay
+
+
+async def _seed(db, count: int, prefix: str) -> None:
+    payload = json.dumps({"event_name": "PageView", "source_url": "https://test.com"})
+    async with db.connection() as conn:
+        cur = conn.cursor()
+        await cur.execute("DELETE FROM outbox_events WHERE id LIKE ?", (f"{prefix}%",))
+        await cur.executemany(
+            "INSERT INTO outbox_events (id, aggregate_type, aggregate_id, event_type, payload) "
+            "VALUES (?, 'TrackingEvent', ?, 'TRACKING_EVENT_SAVED', ?)",
+            [(f"{prefix}{i:03d}", f"agg_{i}", payload) for i in range(count)],
+        )
+
+
+async def _statuses(db, prefix: str) -> dict:
+    async with db.connection() as conn:
+        cur = conn.cursor()
+        await cur.execute(
+            "SELECT id, status, error_msg FROM outbox_events WHERE id LIKE ?", (f"{prefix}%",)
+        )
+        return {row[0]: (row[1], row[2]) for row in await cur.fetchall()}
+
+
+@pytest.fixture
+def pending_only(db_sqlite):
+    """Aísla el test de filas pendientes dejadas por otros tests."""
+    import sqlite3
+
+    conn = sqlite3.connect(db_sqlite._sqlite_path())
+    conn.execute("UPDATE outbox_events SET status = 'completed' WHERE status != 'completed'")
+    conn.commit()
+    conn.close()
+    return db_sqlite
+
+
+@pytest.mark.asyncio
+async def test_concurrent_relays_never_deliver_the_same_row_twice(pending_only):
+    await _seed(pending_only, 12, "claim_")
+    delivered = []
+
+    async def _handle(agg_type, event_type, payload):
+        await asyncio.sleep(0.01)
+        delivered.append(payload["event_name"])
+        return True
+
+    with patch.object(OutboxRelay, "_handle_event", side_effect=_handle) as handle:
+        counts = await asyncio.gather(
+            OutboxRelay.process_pending_events(batch_size=5),
+            OutboxRelay.process_pending_events(batch_size=5),
+            OutboxRelay.process_pending_events(batch_size=5),
+        )
+
+    assert sum(counts) == 12
+    assert handle.await_count == 12
+    statuses = await _statuses(pending_only, "claim_")
+    assert {status for status, _ in statuses.values()} == {"completed"}
+
+
+@pytest.mark.asyncio
+async def test_batch_outcome_is_written_back_per_row(pending_only):
+    await _seed(pending_only, 3, "mixed_")
+
+    async def _handle(agg_type, event_type, payload):
+        if handle.await_count == 2:
+            raise RuntimeError("meta down")
+        return True
+
+    with patch.object(OutboxRelay, "_handle_event", new_callable=AsyncMock) as handle:
+        handle.side_effect = _handle
+        processed = await OutboxRelay.process_pending_events(batch_size=10, concurrency=1)
+
+    assert processed == 2
+    statuses = await _statuses(pending_only, "mixed_")
+    assert statuses["mixed_001"] == ("failed", "meta down")
+    assert statuses["mixed_000"][0] == statuses["mixed_002"][0] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(pending_only):
+    await _seed(pending_only, 1, "lease_")
+    async with pending_only.connection() as conn:
+        await conn.cursor().execute(
+            "UPDATE outbox_events SET status = 'processing', "
+            "locked_until = datetime('now', '-1 seconds') WHERE id = 'lease_000'"
+        )
+
+    with patch.object(OutboxRelay, "_handle_event", new_callable=AsyncMock):
+        assert await OutboxRelay.process_pending_events(batch_size=5) == 1
+
+
+@pytest.mark.asyncio
+async def test_tracking_payload_is_mapped_to_domain_objects():
+    tracker = AsyncMock()
+    payload = {
+        "event_name": "Lead",
+        "event_id": "evt_1707612345678901234_a3f9b2",
+        "external_id": "a" * 32,
+        "source_url": "https://test.com",
+        "custom_data": {"fbclid": "abc", "fbp": "fb.1.1.1"},
+        "created_at": "2026-01-01T00:00:00+00:00",
+    }
+
+    await OutboxRelay._handle_tracking_event(tracker, payload)
+
+    event, visitor = tracker.track.await_args.args
+    assert event.event_name.value == "Lead"
+    assert str(event.event_id) == payload["event_id"]
+    assert visitor.fbp == "fb.1.1.1"
+    assert visitor.fbclid.startswith("fb.1.") and visitor.fbclid.endswith(".abc")
+
+
+@pytest.mark.asyncio
+async def test_rejected_delivery_is_not_marked_completed(pending_only):
+    await _seed(pending_only, 2, "rejected_")
+
+    with patch.object(OutboxRelay, "_handle_event", new_callable=AsyncMock) as handle:
+        handle.side_effect = [True, False]
+        processed = await OutboxRelay.process_pending_events(batch_size=10, concurrency=1)
+
+    assert processed == 1
+    statuses = await _statuses(pending_only, "rejected_")
+    assert statuses["rejected_001"] == ("failed", "meta rejected/unavailable")
+    assert statuses["rejected_000"][0] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_lead_event_id_is_stable_across_deliveries():
+    tracker = AsyncMock()
+    tracker.track.return_value = True
+    payload = {"id": "lead_42", "phone": "+51987654321", "email": None, "status": "new"}
+
+    assert await OutboxRelay._handle_lead_event(tracker, payload) is True
+    await OutboxRelay._handle_lead_event(tracker, payload)
+
+    first, second = (call.args[0] for call in tracker.track.await_args_list)
+    assert first.event_id == second.event_id
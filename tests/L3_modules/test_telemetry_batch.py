@@ -0,0 +1,96 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.interfaces.api.dependencies import get_track_event_handler
+from app.limiter import limiter
+from app.services.work_queue import work_queue
+from main import app
+
+limiter.enabled = False
+
+
+def _event(i: int) -> dict:
+    return {
+        "event_name": "ViewContent",
+        "event_id": f"evt_batch_{i}",
+        "external_id": f"ext_batch_{i:04d}",
+        "source_url": "https://test.com/servicios",
+    }
+
+
+@pytest.fixture
+def handler():
+    mock = MagicMock()
+    mock.handle_batch = AsyncMock(return_value=[])
+    app.dependency_overrides[get_track_event_handler] = lambda: mock
+    yield mock
+    app.dependency_overrides.pop(get_track_event_handler, None)
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@patch("app.interfaces.api.routes.tracking.validate_turnstile", new_callable=AsyncMock)
+def test_json_array_batch_validates_each_event(mock_validate, handler, client):
+    mock_validate.return_value = True
+    body = [_event(1), _event(2), {"event_name": "Broken"}]
+
+    response = client.post(
+        "/api/v1/telemetry/batch", json=body, headers={"x-turnstile-token": "tok"}
+    )
+
+    data = response.json()
+    assert data["status"] == "queued"
+    assert data["accepted"] == 2
+    assert [r["index"] for r in data["rejected"]] == [2]
+    mock_validate.assert_awaited_once_with("tok")
+    client.portal.call(work_queue.join)
+    cmds = handler.handle_batch.await_args.args[0]
+    assert [c.request.event_id for c in cmds] == ["evt_batch_1", "evt_batch_2"]
+
+
+@patch("app.interfaces.api.routes.tracking.validate_turnstile", new_callable=AsyncMock)
+def test_ndjson_batch_is_accepted(mock_validate, handler, client):
+    mock_validate.return_value = True
+    body = "\n".join(json.dumps(_event(i)) for i in range(5)) + "\n"
+
+    response = client.post(
+        "/api/v1/telemetry/batch",
+        content=body,
+        headers={"content-type": "application/x-ndjson", "x-turnstile-token": "tok"},
+    )
+
+    assert response.json()["accepted"] == 5
+    client.portal.call(work_queue.join)
+    assert len(handler.handle_batch.await_args.args[0]) == 5
+
+
+@patch("app.interfaces.api.routes.tracking.validate_turnstile", new_callable=AsyncMock)
+def test_batch_without_valid_turnstile_is_filtered(mock_validate, handler, client):
+    mock_validate.return_value = False
+
+    response = client.post("/api/v1/telemetry/batch", json=[_event(1), _event(2)])
+
+    assert response.json()["status"] == "filtered"
+    mock_validate.assert_awaited_once()
+    handler.handle_batch.assert_not_awaited()
+
+
+@patch("app.interfaces.api.routes.tracking.validate_turnstile", new_callable=AsyncMock)
+def test_full_queue_answers_503_so_clients_retry(mock_validate, handler, client):
+    mock_validate.return_value = True
+
+    with patch.object(work_queue, "submit", return_value=False):
+        single = client.post("/api/v1/telemetry", json={**_event(1), "event_name": "Lead"})
+        batch = client.post("/api/v1/telemetry/batch", json=[_event(2)])
+
+    assert single.status_code == batch.status_code == 503
+    assert single.headers["retry-after"] == "1"
+    assert single.json()["status"] == "rejected"
+    assert batch.json()["event_ids"] == ["evt_batch_2"]
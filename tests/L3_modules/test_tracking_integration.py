@@ -25,12 +25,13 @@ def test_build_payload_validation():
         assert any("Invalid Email Format" in w for w in warnings)
 
 
-@patch("app.tracking.sync_client.post")
+@patch("app.tracking.http_clients.get_sync")
 @patch("app.tracking.dedup_service.try_consume_event")
 @patch("app.tracking._log_emq")
-def test_send_event_success(mock_log, mock_dedup, mock_post):
+def test_send_event_success(mock_log, mock_dedup, mock_get_sync):
     """Test successful event sending with validation pass."""
     mock_dedup.return_value = True  # New event
+    mock_post = mock_get_sync.return_value.post
     mock_post.return_value.status_code = 200
 
     success = send_event(
@@ -52,7 +53,8 @@ def test_deduplication_skips_send(mock_dedup):
     """Test that duplicate events are skipped (return True)."""
     mock_dedup.return_value = False  # Duplicate!
 
-    with patch("app.tracking.sync_client.post") as mock_post:
+    with patch("app.tracking.http_clients.get_sync") as mock_get_sync:
+        mock_post = mock_get_sync.return_value.post
         success = send_event(
             event_name="PageView",
             event_source_url="http://test.com",
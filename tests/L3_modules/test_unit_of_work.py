@@ -0,0 +1,214 @@
+import sqlite3
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.application.commands.track_event import TrackEventCommand, TrackEventHandler
+from app.application.dto.tracking_dto import TrackEventRequest, TrackingContext
+from app.infrastructure.persistence.repositories.event_repository import (
+    PostgreSQLEventRepository,
+)
+from app.infrastructure.persistence.repositories.visitor_repository import (
+    VisitorRepository,
+)
+from app.infrastructure.persistence.unit_of_work import DatabaseUnitOfWork
+
+
+async def _count_outbox(db, aggregate_id: str) -> int:
+    async with db.connection() as conn:
+        cur = conn.cursor()
+        await cur.execute(
+            "SELECT COUNT(*) FROM outbox_events WHERE aggregate_id = ?", (aggregate_id,)
+        )
+        return (await cur.fetchone())[0]
+
+
+@pytest.mark.asyncio
+async def test_transaction_shares_connection_and_rolls_back(db_sqlite):
+    insert = (
+        "INSERT INTO outbox_events (id, aggregate_type, aggregate_id, event_type, payload) "
+        "VALUES (?, 'Test', 'uow_rollback', 'TEST', '{}')"
+    )
+
+    with pytest.raises(RuntimeError):
+        async with db_sqlite.transaction() as outer:
+            assert db_sqlite.in_transaction
+            async with db_sqlite.connection() as inner:
+                assert inner is outer
+                await inner.cursor().execute(insert, ("uow_rb_1",))
+            raise RuntimeError("boom")
+
+    assert not db_sqlite.in_transaction
+    assert await _count_outbox(db_sqlite, "uow_rollback") == 0
+
+
+@pytest.mark.asyncio
+async def test_track_event_handler_uses_a_single_connection(db_sqlite):
+    dedup = MagicMock()
+    dedup.is_unique = AsyncMock(return_value=True)
+    handler = TrackEventHandler(
+        deduplicator=dedup,
+        visitor_repo=VisitorRepository(),
+        event_repo=PostgreSQLEventRepository(),
+        trackers=[],
+        uow=DatabaseUnitOfWork(),
+    )
+    cmd = TrackEventCommand(
+        request=TrackEventRequest(
+            event_name="PageView",
+            event_id="evt_uow_1",
+            external_id="b" * 32,
+            source_url="https://test.com",
+        ),
+        context=TrackingContext(ip_address="127.0.0.1", user_agent="pytest"),
+    )
+
+    real_connect = sqlite3.connect
+    with patch(
+        "app.infrastructure.persistence.database.sqlite3.connect",
+        side_effect=real_connect,
+    ) as connect:
+        response = await handler.handle(cmd)
+
+    assert response.success is True
+    assert connect.call_count == 1
+    assert await _count_outbox(db_sqlite, response.event_id) == 1
+
+
+@pytest.mark.asyncio
+async def test_rollback_releases_dedup_key_for_retry(db_sqlite):
+    from app.infrastructure.cache.memory_cache import InMemoryDeduplication
+
+    event_repo = PostgreSQLEventRepository()
+    real_save = event_repo.save
+    event_repo.save = AsyncMock(side_effect=[RuntimeError("db down"), None])
+    handler = TrackEventHandler(
+        deduplicator=InMemoryDeduplication(),
+        visitor_repo=VisitorRepository(),
+        event_repo=event_repo,
+        trackers=[],
+        uow=DatabaseUnitOfWork(),
+    )
+    cmd = TrackEventCommand(
+        request=TrackEventRequest(
+            event_name="Lead",
+            event_id="evt_uow_retry",
+            external_id="c" * 32,
+            source_url="https://test.com",
+        ),
+        context=TrackingContext(ip_address="127.0.0.1", user_agent="pytest"),
+    )
+
+    failed = await handler.handle(cmd)
+    event_repo.save.side_effect = real_save
+    retried = await handler.handle(cmd)
+
+    assert failed.success is False
+    assert retried.success is True
+    assert retried.status == "queued"
+
+
+@pytest.mark.asyncio
+async def test_trackers_are_awaited_inside_the_job(db_sqlite):
+    from app.infrastructure.cache.memory_cache import InMemoryDeduplication
+
+    tracker = MagicMock()
+    tracker.name = "meta_capi"
+    tracker.track = AsyncMock(return_value=True)
+    handler = TrackEventHandler(
+        deduplicator=InMemoryDeduplication(),
+        visitor_repo=VisitorRepository(),
+        event_repo=PostgreSQLEventRepository(),
+        trackers=[tracker],
+        uow=DatabaseUnitOfWork(),
+    )
+    cmd = TrackEventCommand(
+        request=TrackEventRequest(
+            event_name="Lead",
+            event_id="evt_uow_send",
+            external_id="d" * 32,
+            source_url="https://test.com",
+        ),
+        context=TrackingContext(ip_address="127.0.0.1", user_agent="pytest"),
+    )
+
+    response = await handler.handle(cmd)
+
+    # El envío ocurre antes de que termine el job (cuenta para el lane y drain())
+    assert response.success is True
+    tracker.track.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_meta_tracker_delivery_skips_the_outbox_row(db_sqlite):
+    from app.infrastructure.cache.memory_cache import InMemoryDeduplication
+
+    tracker = MagicMock()
+    tracker.name = "meta_capi"
+    tracker.track = AsyncMock(return_value=True)
+    handler = TrackEventHandler(
+        deduplicator=InMemoryDeduplication(),
+        visitor_repo=VisitorRepository(),
+        event_repo=PostgreSQLEventRepository(),
+        trackers=[tracker],
+        uow=DatabaseUnitOfWork(),
+    )
+    cmd = TrackEventCommand(
+        request=TrackEventRequest(
+            event_name="PageView",
+            event_id="evt_uow_single_path",
+            external_id="e" * 32,
+            source_url="https://test.com",
+        ),
+        context=TrackingContext(ip_address="127.0.0.1", user_agent="pytest"),
+    )
+
+    response = await handler.handle(cmd)
+
+    # Un solo camino hacia Meta: el tracker, no el relay del outbox
+    assert response.success is True
+    tracker.track.assert_awaited_once()
+    assert await _count_outbox(db_sqlite, response.event_id) == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_sends_share_one_graph_request(db_sqlite):
+    from app.infrastructure.cache.memory_cache import InMemoryDeduplication
+    from app.infrastructure.external.meta_capi.batcher import CAPIBatchDispatcher
+
+    response = MagicMock(status_code=200)
+    sender = AsyncMock(return_value=response)
+    dispatcher = CAPIBatchDispatcher(sender, max_batch_size=50, max_linger_seconds=0.2)
+
+    class _BatchingTracker:
+        name = "meta_capi"
+
+        async def track(self, event, visitor):
+            return await dispatcher.submit({"event_id": event.event_id.value}, "pixel-1", "token")
+
+    handler = TrackEventHandler(
+        deduplicator=InMemoryDeduplication(),
+        visitor_repo=VisitorRepository(),
+        event_repo=PostgreSQLEventRepository(),
+        trackers=[_BatchingTracker()],
+        uow=DatabaseUnitOfWork(),
+    )
+    cmds = [
+        TrackEventCommand(
+            request=TrackEventRequest(
+                event_name="PageView",
+                event_id=f"evt_uow_batch_{i}",
+                external_id=f"{i:x}" * 32,
+                source_url="https://test.com",
+            ),
+            context=TrackingContext(ip_address="127.0.0.1", user_agent="pytest"),
+        )
+        for i in range(1, 6)
+    ]
+
+    responses = await handler.handle_batch(cmds)
+
+    # Persistidos en orden; los 5 envíos caen en la misma ventana del batcher
+    assert [r.success for r in responses] == [True] * 5
+    assert sender.await_count == 1
+    assert len(sender.await_args.args[1]["data"]) == 5
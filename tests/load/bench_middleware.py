@@ -0,0 +1,99 @@
+"""
+⏱️ Middleware stack overhead benchmark.
+
+Mide el coste por request de la pila de middlewares de main.py (identity,
+early hints, security, cache-control, API key, métricas) frente a la misma ruta sin
+middlewares, llamando a la app ASGI directamente (sin servidor ni red).
+
+Uso:
+    python tests/load/bench_middleware.py [requests]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse
+from starlette.routing import Route
+
+from app.middleware.auth import APIKeyMiddleware
+from app.middleware.cache import CacheControlMiddleware
+from app.middleware.early_hints import EarlyHintsMiddleware
+from app.middleware.identity import ServerSideIdentityMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.security import SecurityHeadersMiddleware
+
+BODY = "<html><body>" + "x" * 2048 + "</body></html>"
+
+
+async def _page(request):
+    return HTMLResponse(BODY)
+
+
+def _app(with_stack: bool) -> Starlette:
+    app = Starlette(routes=[Route("/", _page)])
+    if with_stack:
+        # Mismo orden que main.py (el último añadido es el más externo)
+        app.add_middleware(ServerSideIdentityMiddleware)
+        app.add_middleware(EarlyHintsMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(CacheControlMiddleware)
+        app.add_middleware(APIKeyMiddleware)
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "https",
+    "path": "/",
+    "raw_path": b"/",
+    "root_path": "",
+    "query_string": b"fbclid=abc123",
+    "headers": [
+        (b"host", b"jorgeaguirreflores.com"),
+        (b"user-agent", b"Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X)"),
+        (b"accept", b"text/html"),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("jorgeaguirreflores.com", 443),
+}
+
+
+async def _request(app) -> None:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(dict(SCOPE), receive, send)
+
+
+async def _measure(app, n: int) -> float:
+    for _ in range(200):  # warm-up
+        await _request(app)
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(n):
+            await _request(app)
+        samples.append((time.perf_counter() - start) / n)
+    return statistics.median(samples) * 1e6
+
+
+async def main(n: int) -> None:
+    bare = await _measure(_app(False), n)
+    stacked = await _measure(_app(True), n)
+    print(f"bare route         : {bare:8.1f} µs/request")
+    print(f"with middleware    : {stacked:8.1f} µs/request")
+    print(f"middleware overhead: {stacked - bare:8.1f} µs/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))